@@ -1,6 +1,6 @@
 from django.contrib import admin
 from django.contrib.auth.admin import UserAdmin as BaseUserAdmin
-from .models import User, Recruiter, Employee, Job, Application
+from .models import User, Recruiter, Employee, Job, Application, City, OutboxMessage
 
 # Custom User admin with role-based display
 class UserAdmin(BaseUserAdmin):
@@ -55,9 +55,27 @@ class ApplicationAdmin(admin.ModelAdmin):
     ordering = ('-submitted_at',)
 
 
+# Gazetteer cities, loaded by `manage.py load_gazetteer`
+class CityAdmin(admin.ModelAdmin):
+    list_display = ('name', 'region', 'country', 'latitude', 'longitude', 'population')
+    search_fields = ('name', 'region', 'country', 'aliases__name')
+    list_filter = ('country',)
+    ordering = ('-population',)
+
+
+# Queued task calls; unsent rows with attempts left are what the relay still has to send
+class OutboxMessageAdmin(admin.ModelAdmin):
+    list_display = ('task', 'dedup_key', 'created_at', 'sent_at', 'attempts', 'last_error')
+    search_fields = ('task', 'dedup_key')
+    list_filter = ('task',)
+    ordering = ('-id',)
+
+
 # Registering all models with custom admin configurations
 admin.site.register(User, UserAdmin)
 admin.site.register(Recruiter, RecruiterAdmin)
 admin.site.register(Employee, EmployeeAdmin)
 admin.site.register(Job, JobAdmin)
 admin.site.register(Application, ApplicationAdmin)
+admin.site.register(City, CityAdmin)
+admin.site.register(OutboxMessage, OutboxMessageAdmin)
@@ -0,0 +1,111 @@
+import hashlib
+
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import http_date
+from rest_framework import viewsets
+from rest_framework.pagination import CursorPagination
+from rest_framework.response import Response
+
+from .models import Application, Job
+from .serializers import ApplicationSerializer, JobSerializer, requested_fields
+
+
+class JobCursorPagination(CursorPagination):
+    ordering = ('-posted_date', '-id')
+    page_size = 20
+    max_page_size = 100
+    page_size_query_param = 'page_size'
+
+
+class ApplicationCursorPagination(JobCursorPagination):
+    ordering = ('-submitted_at', '-id')
+
+
+class ConditionalGetMixin:
+    """
+    Adds ETag and Last-Modified to list and detail responses and answers 304
+    when the client's copy is current. Validators come from the rows'
+    ``updated_at`` (see ``modified``), so a 304 costs the page query but no
+    serialization. The query string is part of the ETag, as ?fields= and
+    cursors change the body.
+    """
+    # Extra timestamps a representation depends on, e.g. the recruiter's company name
+    related_modified = ()
+
+    def modified(self, obj):
+        return max([obj.updated_at] + [self._attr(obj, path) for path in self.related_modified])
+
+    @staticmethod
+    def _attr(obj, path):
+        for name in path.split('__'):
+            obj = getattr(obj, name)
+        return obj
+
+    def validators(self, request, objects):
+        objects = list(objects)
+        digest = hashlib.md5(request.get_full_path().encode())
+        for obj in objects:
+            digest.update(f'{obj.pk}:{self.modified(obj).timestamp()};'.encode())
+        last_modified = max((self.modified(obj) for obj in objects), default=None)
+        return f'"{digest.hexdigest()}"', last_modified.timestamp() if last_modified else None
+
+    def conditional(self, request, objects, respond):
+        etag, last_modified = self.validators(request, objects)
+        response = get_conditional_response(request, etag=etag, last_modified=last_modified)
+        if response is None:
+            response = respond()
+        response['ETag'] = etag
+        if last_modified is not None:
+            response['Last-Modified'] = http_date(last_modified)
+        # Per-user data: clients may keep it but must revalidate before reuse
+        patch_cache_control(response, private=True, no_cache=True)
+        return response
+
+    def list(self, request, *args, **kwargs):
+        page = self.paginate_queryset(self.filter_queryset(self.get_queryset()))
+        return self.conditional(
+            request, page,
+            lambda: self.get_paginated_response(self.get_serializer(page, many=True).data),
+        )
+
+    def retrieve(self, request, *args, **kwargs):
+        instance = self.get_object()
+        return self.conditional(
+            request, [instance],
+            lambda: Response(self.get_serializer(instance).data),
+        )
+
+
+class JobViewSet(ConditionalGetMixin, viewsets.ReadOnlyModelViewSet):
+    """Active job postings."""
+    serializer_class = JobSerializer
+    pagination_class = JobCursorPagination
+    related_modified = ('recruiter__updated_at',)
+
+    def get_queryset(self):
+        jobs = Job.objects.active().select_related('recruiter')
+        fields = requested_fields(self.request)
+        if fields is not None and 'description' not in fields:
+            jobs = jobs.defer('description')
+        return jobs
+
+
+class ApplicationViewSet(ConditionalGetMixin, viewsets.ReadOnlyModelViewSet):
+    """An employee's own applications, or the applications to a recruiter's jobs."""
+    serializer_class = ApplicationSerializer
+    pagination_class = ApplicationCursorPagination
+    related_modified = ('job__updated_at', 'job__recruiter__updated_at')
+
+    def get_queryset(self):
+        user = self.request.user
+        if user.role == 'employee':
+            applications = Application.objects.filter(employee__user=user)
+        elif user.role == 'recruiter':
+            applications = Application.objects.filter(job__recruiter__user=user)
+        else:
+            applications = Application.objects.none()
+        applications = applications.select_related('job__recruiter')
+        fields = requested_fields(self.request)
+        if fields is not None and 'cover_letter' not in fields:
+            applications = applications.defer('cover_letter')
+        return applications
@@ -5,3 +5,5 @@ class JobportalConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'JobPortal'
 
+    def ready(self):
+        from . import signals  # noqa: F401
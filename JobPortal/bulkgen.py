@@ -0,0 +1,308 @@
+"""
+Fast generation of users, profiles, jobs and applications for tests, seeding
+and benchmarks. Rows are built in memory from seeded random choices over small
+Faker-made pools and written with bulk_create in dependency order
+(User -> Recruiter/Employee -> Job -> Application). No per-row saves, no
+per-row Faker calls, one password hash shared by every generated user.
+"""
+import datetime
+import random
+import secrets
+from functools import lru_cache
+from multiprocessing import get_context
+
+from django.contrib.auth.hashers import make_password
+from django.db import connections
+from django.utils import timezone
+from faker import Faker
+
+from .models import Application, Employee, Job, Recruiter, User
+
+
+DEFAULT_PASSWORD = 'password123'
+EMAIL_PATTERN = '{prefix}-{role}-{n}@example.com'
+JOB_TYPES = ['full_time', 'part_time', 'internship', 'contract']
+STATUSES = ['submitted', 'under_review', 'interview', 'offered', 'rejected']
+STATUS_WEIGHTS = [50, 25, 12, 3, 10]
+
+
+@lru_cache(maxsize=None)
+def password_hash(raw=DEFAULT_PASSWORD):
+    """
+    A hash of ``raw`` computed once per process. Every user generated with the
+    same password shares its salt, which is fine for test data only.
+    """
+    return make_password(raw)
+
+
+@lru_cache(maxsize=None)
+def pools(seed=0):
+    """Value pools drawn from Faker once; rows then pick from them."""
+    fake = Faker()
+    fake.seed_instance(seed)
+    return {
+        'names': [fake.name() for _ in range(1000)],
+        'companies': [fake.company() for _ in range(500)],
+        'domains': [fake.domain_name() for _ in range(500)],
+        'cities': [fake.city() for _ in range(300)],
+        'titles': [fake.job() for _ in range(300)],
+        'sentences': [fake.sentence(nb_words=12) for _ in range(1000)],
+    }
+
+
+def _text(rng, pool, sentences):
+    return ' '.join(rng.choices(pool['sentences'], k=sentences))
+
+
+def build_users(role, numbers, rng, prefix='bulk', raw_password=DEFAULT_PASSWORD, seed=0):
+    pool = pools(seed)
+    password = password_hash(raw_password)
+    return [
+        User(
+            email=EMAIL_PATTERN.format(prefix=prefix, role=role, n=n),
+            name=rng.choice(pool['names']),
+            role=role,
+            password=password,
+        )
+        for n in numbers
+    ]
+
+
+def build_recruiters(user_ids, rng, seed=0):
+    pool = pools(seed)
+    return [
+        Recruiter(
+            user_id=user_id,
+            company_name=rng.choice(pool['companies']),
+            website=f"https://{rng.choice(pool['domains'])}/",
+        )
+        for user_id in user_ids
+    ]
+
+
+def build_employees(user_ids, rng, seed=0):
+    pool = pools(seed)
+    return [
+        Employee(
+            user_id=user_id,
+            phone_number=''.join(rng.choices('0123456789', k=10)),
+            location=rng.choice(pool['cities']),
+        )
+        for user_id in user_ids
+    ]
+
+
+def build_jobs(recruiter_ids, rng, seed=0):
+    """One job per entry of ``recruiter_ids``."""
+    pool = pools(seed)
+    now = timezone.now()
+    return [
+        Job(
+            title=rng.choice(pool['titles']),
+            description=_text(rng, pool, rng.randint(3, 8)),
+            recruiter_id=recruiter_id,
+            location=rng.choice(pool['cities']),
+            job_type=rng.choice(JOB_TYPES),
+            salary=rng.randrange(10_000, 200_000, 500),
+            application_deadline=now + datetime.timedelta(days=rng.randint(1, 90)),
+        )
+        for recruiter_id in recruiter_ids
+    ]
+
+
+def build_applications(pairs, rng, seed=0):
+    """One application per (employee_id, job_id) pair."""
+    pool = pools(seed)
+    return [
+        Application(
+            employee_id=employee_id,
+            job_id=job_id,
+            cover_letter=_text(rng, pool, rng.randint(2, 5)),
+            status=rng.choices(STATUSES, STATUS_WEIGHTS)[0],
+        )
+        for employee_id, job_id in pairs
+    ]
+
+
+def insert(model, objs, batch_size=2000):
+    """
+    bulk_create that leaves primary keys set on every backend. MySQL returns no
+    ids from multi-row inserts, so they are read back by range; that assumes no
+    one else inserts into the table meanwhile.
+    """
+    if not objs:
+        return objs
+    last_pk = model.objects.order_by('-pk').values_list('pk', flat=True).first() or 0
+    model.objects.bulk_create(objs, batch_size=batch_size)
+    if objs[0].pk is None:
+        pks = model.objects.filter(pk__gt=last_pk).order_by('pk').values_list('pk', flat=True)[:len(objs)]
+        for obj, pk in zip(objs, pks):
+            obj.pk = pk
+    return objs
+
+
+# In-process helpers used by the factories for large batches
+
+def create_users(count, role='employee', rng=None, raw_password=DEFAULT_PASSWORD, **fields):
+    rng = rng or random.Random()
+    users = build_users(role, range(count), rng, prefix=f'bulk{secrets.token_hex(4)}', raw_password=raw_password)
+    return insert(User, _apply(users, fields))
+
+
+def create_recruiters(count, rng=None, **fields):
+    rng = rng or random.Random()
+    users = create_users(count, 'recruiter', rng)
+    recruiters = build_recruiters([user.pk for user in users], rng)
+    for recruiter, user in zip(recruiters, users):
+        recruiter.user = user
+    return insert(Recruiter, _apply(recruiters, fields))
+
+
+def create_employees(count, rng=None, **fields):
+    rng = rng or random.Random()
+    users = create_users(count, 'employee', rng)
+    employees = build_employees([user.pk for user in users], rng)
+    for employee, user in zip(employees, users):
+        employee.user = user
+    return insert(Employee, _apply(employees, fields))
+
+
+def create_jobs(count, recruiter=None, rng=None, **fields):
+    """Jobs for one recruiter, or each with a new recruiter like JobFactory does."""
+    rng = rng or random.Random()
+    recruiters = [recruiter] * count if recruiter else create_recruiters(count, rng)
+    jobs = build_jobs([r.pk for r in recruiters], rng)
+    for job, r in zip(jobs, recruiters):
+        job.recruiter = r
+    return insert(Job, _apply(jobs, fields))
+
+
+def create_applications(count, employee=None, job=None, rng=None, **fields):
+    """Applications with new employees and/or jobs where none is given, like ApplicationFactory."""
+    rng = rng or random.Random()
+    if employee and job:
+        raise ValueError('An employee can apply to a job only once.')
+    employees = [employee] * count if employee else create_employees(count, rng)
+    jobs = [job] * count if job else create_jobs(count, rng=rng)
+    applications = build_applications([(e.pk, j.pk) for e, j in zip(employees, jobs)], rng)
+    for application, e, j in zip(applications, employees, jobs):
+        application.employee, application.job = e, j
+    return insert(Application, _apply(applications, fields))
+
+
+def _apply(objs, fields):
+    for obj in objs:
+        for name, value in fields.items():
+            setattr(obj, name, value)
+    return objs
+
+
+# Parallel generation of whole datasets
+
+_shared = {}
+
+
+def _init_worker(shared):
+    _shared.clear()
+    _shared.update(shared)
+
+
+def _chunk_rng(seed, *key):
+    # Each chunk has its own stream, so output doesn't depend on which process ran it
+    return random.Random('-'.join(map(str, (seed, *key))))
+
+
+def _profiles_task(args):
+    role, start, stop, seed, prefix = args
+    rng = _chunk_rng(seed, role, start)
+    users = build_users(role, range(start, stop), rng, prefix=prefix, seed=seed)
+    User.objects.bulk_create(users)
+    pks = dict(User.objects.filter(email__in=[user.email for user in users]).values_list('email', 'pk'))
+    user_ids = [pks[user.email] for user in users]
+    if role == 'recruiter':
+        Recruiter.objects.bulk_create(build_recruiters(user_ids, rng, seed))
+    else:
+        Employee.objects.bulk_create(build_employees(user_ids, rng, seed))
+    return stop - start
+
+
+def _jobs_task(args):
+    start, stop, seed = args
+    rng = _chunk_rng(seed, 'job', start)
+    recruiter_ids = rng.choices(_shared['recruiter_ids'], k=stop - start)
+    Job.objects.bulk_create(build_jobs(recruiter_ids, rng, seed))
+    return stop - start
+
+
+def _applications_task(args):
+    start, stop, seed = args
+    rng = _chunk_rng(seed, 'application', start)
+    employee_ids, per_employee, job_ids = _shared['employee_ids'], _shared['per_employee'], _shared['job_ids']
+    pairs = [
+        (employee_ids[i], job_id)
+        for i in range(start, stop)
+        for job_id in rng.sample(job_ids, per_employee[i])
+    ]
+    Application.objects.bulk_create(build_applications(pairs, rng, seed), batch_size=2000)
+    return len(pairs)
+
+
+def _run(task, chunks, processes, shared, progress, label):
+    done = 0
+    if processes > 1:
+        # Children are forked with Django set up; none may inherit an open connection
+        connections.close_all()
+        with get_context('fork').Pool(processes, initializer=_init_worker, initargs=(shared,)) as pool:
+            for rows in pool.imap_unordered(task, chunks):
+                done += rows
+                if progress:
+                    progress(label, done)
+    else:
+        _init_worker(shared)
+        for chunk in chunks:
+            done += task(chunk)
+            if progress:
+                progress(label, done)
+    return done
+
+
+def _ranges(count, size):
+    return [(start, min(start + size, count)) for start in range(0, count, size)]
+
+
+def generate(recruiters=0, employees=0, jobs=0, applications=0, seed=0, processes=1,
+             batch_size=2000, prefix='bulk', progress=None):
+    """
+    Write a whole dataset, each stage split into ``batch_size`` chunks spread
+    over ``processes`` forked workers. A serial run is reproducible from
+    ``seed``; parallel runs write the same rows but link them by ids assigned
+    in completion order. Users get ``EMAIL_PATTERN`` emails with the default
+    password. ``progress(label, rows_done)`` is called per chunk.
+    """
+    pools(seed)  # build once before forking
+    password_hash()
+
+    for role, count in (('recruiter', recruiters), ('employee', employees)):
+        chunks = [(role, start, stop, seed, prefix) for start, stop in _ranges(count, batch_size)]
+        _run(_profiles_task, chunks, processes, {}, progress, f'{role}s')
+
+    recruiter_ids = list(
+        Recruiter.objects.filter(user__email__startswith=f'{prefix}-recruiter-').order_by('pk').values_list('pk', flat=True)
+    )
+    if jobs and recruiter_ids:
+        chunks = [(start, stop, seed) for start, stop in _ranges(jobs, batch_size)]
+        _run(_jobs_task, chunks, processes, {'recruiter_ids': recruiter_ids}, progress, 'jobs')
+
+    employee_ids = list(
+        Employee.objects.filter(user__email__startswith=f'{prefix}-employee-').order_by('pk').values_list('pk', flat=True)
+    )
+    job_ids = list(Job.objects.filter(recruiter_id__in=recruiter_ids).order_by('pk').values_list('pk', flat=True)) if recruiter_ids else []
+    if applications and employee_ids and job_ids:
+        # Spread applications evenly; each employee applies to distinct jobs
+        applications = min(applications, len(employee_ids) * len(job_ids))
+        base, extra = divmod(applications, len(employee_ids))
+        per_employee = [base + (i < extra) for i in range(len(employee_ids))]
+        employees_per_chunk = max(1, batch_size // max(1, base))
+        chunks = [(start, stop, seed) for start, stop in _ranges(len(employee_ids), employees_per_chunk)]
+        shared = {'employee_ids': employee_ids, 'per_employee': per_employee, 'job_ids': job_ids}
+        _run(_applications_task, chunks, processes, shared, progress, 'applications')
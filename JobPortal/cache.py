@@ -0,0 +1,204 @@
+import time
+
+from asgiref.sync import sync_to_async
+from django.core.cache import cache
+from django.http import Http404
+from django.template.loader import render_to_string
+from django.utils.safestring import mark_safe
+
+from . import metrics
+from .models import Job, Recruiter
+
+
+metrics.register('job_cards.hits', 'job_cards.misses', 'job_bundles.hits', 'job_bundles.misses')
+
+JOB_CARD_TIMEOUT = 60 * 60 * 24
+JOB_BUNDLE_TIMEOUT = 60 * 60
+# A process rebuilding a bundle holds the lock at most this long; others poll
+# for its result every RECOMPUTE_POLL seconds for up to RECOMPUTE_WAIT seconds
+RECOMPUTE_LOCK_TIMEOUT = 10
+RECOMPUTE_POLL = 0.02
+RECOMPUTE_WAIT = 1.0
+
+
+def _version_key(kind, pk):
+    return f'version:{kind}:{pk}'
+
+
+def _new_version():
+    # Start from the clock rather than 1, so a version key that was evicted can
+    # never come back at a number an older cached entry was stored under.
+    return time.time_ns() // 1000
+
+
+def get_versions(objects):
+    """Current cache version of each (kind, pk) pair, fetched in one round trip."""
+    objects = set(objects)
+    found = cache.get_many([_version_key(kind, pk) for kind, pk in objects])
+    versions = {}
+    missing = {}
+    for kind, pk in objects:
+        key = _version_key(kind, pk)
+        if key not in found:
+            found[key] = missing[key] = _new_version()
+        versions[kind, pk] = found[key]
+    if missing:
+        cache.set_many(missing, timeout=None)
+    return versions
+
+
+def bump_version(kind, pk):
+    """Invalidate every cache entry derived from the object."""
+    try:
+        cache.incr(_version_key(kind, pk))
+    except ValueError:
+        cache.set(_version_key(kind, pk), _new_version(), timeout=None)
+
+
+def bump_versions(kind, pks):
+    """bump_version for many objects in one round trip, e.g. after a queryset update()."""
+    # A fresh clock reading is above any version these keys held before
+    version = _new_version()
+    cache.set_many({_version_key(kind, pk): version for pk in pks}, timeout=None)
+
+
+def job_cards(jobs):
+    """
+    Rendered job cards for a listing page, as dicts of ``job``, ``header`` and
+    ``body``. The card markup is cached per job under a key that includes the
+    job and recruiter versions, so a save of either re-renders it; misses are
+    rendered and stored in one batch. Expects job.recruiter to be loaded.
+    """
+    jobs = list(jobs)
+    versions = get_versions(
+        [('job', job.pk) for job in jobs] + [('recruiter', job.recruiter_id) for job in jobs]
+    )
+    keys = {
+        job.pk: f"jobcard:{job.pk}:{versions['job', job.pk]}:{versions['recruiter', job.recruiter_id]}"
+        for job in jobs
+    }
+
+    fragments = cache.get_many(list(keys.values()))
+    missed = {}
+    for job in jobs:
+        if keys[job.pk] not in fragments:
+            fragment = {
+                'header': render_to_string('jobs/job_card_header.html', {'job': job}),
+                'body': render_to_string('jobs/job_card_body.html', {'job': job}),
+            }
+            fragments[keys[job.pk]] = missed[keys[job.pk]] = fragment
+    if missed:
+        cache.set_many(missed, JOB_CARD_TIMEOUT)
+
+    metrics.incr('job_cards.hits', len(jobs) - len(missed))
+    metrics.incr('job_cards.misses', len(missed))
+    return [
+        {
+            'job': job,
+            'header': mark_safe(fragments[keys[job.pk]]['header']),
+            'body': mark_safe(fragments[keys[job.pk]]['body']),
+        }
+        for job in jobs
+    ]
+
+
+def _dump(obj):
+    fields = obj._meta.concrete_fields
+    return [field.attname for field in fields], [getattr(obj, field.attname) for field in fields]
+
+
+def _load(model, dumped):
+    names, values = dumped
+    if names != [field.attname for field in model._meta.concrete_fields]:
+        return None  # written before a schema change
+    return model.from_db('default', names, values)
+
+
+def _bundle_key(job_id, version):
+    return f'jobbundle:{job_id}:{version}'
+
+
+def _recruiter_key(job_id):
+    # A job's recruiter id, so a read can fetch the bundle and the recruiter's
+    # version together
+    return f'jobrecruiter:{job_id}'
+
+
+def _cached_job(job_id):
+    found = cache.get_many([_version_key('job', job_id), _recruiter_key(job_id)])
+    job_version, recruiter_id = found.get(_version_key('job', job_id)), found.get(_recruiter_key(job_id))
+    if job_version is None or recruiter_id is None:
+        return None
+    key = _bundle_key(job_id, job_version)
+    found = cache.get_many([key, _version_key('recruiter', recruiter_id)])
+    bundle = found.get(key)
+    if (bundle is None or bundle['recruiter_id'] != recruiter_id
+            or bundle['recruiter_version'] != found.get(_version_key('recruiter', recruiter_id))):
+        return None
+    job, recruiter = _load(Job, bundle['job']), _load(Recruiter, bundle['recruiter'])
+    if job is None or recruiter is None:
+        return None
+    job.recruiter = recruiter
+    return job
+
+
+def _fetch_job(job_id):
+    # Versions are read before the query, so a save racing with it leaves the
+    # bundle under a version that is already stale rather than a current one
+    recruiter_id = cache.get(_recruiter_key(job_id))
+    versions = get_versions([('job', job_id)] + ([('recruiter', recruiter_id)] if recruiter_id else []))
+    job = Job.objects.select_related('recruiter').get(pk=job_id)
+    if job.recruiter_id != recruiter_id:
+        versions.update(get_versions([('recruiter', job.recruiter_id)]))
+    cache.set_many({
+        _bundle_key(job_id, versions['job', job_id]): {
+            'job': _dump(job),
+            'recruiter': _dump(job.recruiter),
+            'recruiter_id': job.recruiter_id,
+            'recruiter_version': versions['recruiter', job.recruiter_id],
+        },
+        _recruiter_key(job_id): job.recruiter_id,
+    }, JOB_BUNDLE_TIMEOUT)
+    return job
+
+
+def get_job(job_id):
+    """
+    The Job with its recruiter loaded, read through the cache. Bundles of both
+    rows' field values are keyed by the job version and stamped with the
+    recruiter version, so saving or deleting either makes them stale (see
+    signals). On a miss only one process queries the database while the others
+    wait briefly for its result. Raises Job.DoesNotExist.
+    """
+    job = _cached_job(job_id)
+    if job is not None:
+        metrics.incr('job_bundles.hits')
+        return job
+
+    lock = f'lock:jobbundle:{job_id}'
+    deadline = time.monotonic() + RECOMPUTE_WAIT
+    while not cache.add(lock, 1, RECOMPUTE_LOCK_TIMEOUT):
+        if time.monotonic() >= deadline:
+            # The holder is slow or gone; stop waiting for it
+            metrics.incr('job_bundles.misses')
+            return _fetch_job(job_id)
+        time.sleep(RECOMPUTE_POLL)
+        job = _cached_job(job_id)
+        if job is not None:
+            metrics.incr('job_bundles.hits')
+            return job
+    try:
+        metrics.incr('job_bundles.misses')
+        return _fetch_job(job_id)
+    finally:
+        cache.delete(lock)
+
+
+def get_job_or_404(job_id):
+    try:
+        return get_job(job_id)
+    except Job.DoesNotExist:
+        raise Http404('No Job matches the given query.')
+
+
+aget_job_or_404 = sync_to_async(get_job_or_404)
@@ -0,0 +1,113 @@
+"""
+Notification emails rendered from templates/emails/.
+
+Each kind has ``subject.txt``, ``body.txt`` and ``body.html`` under
+``emails/<kind>/``; the bodies go inside ``emails/layout.txt`` and
+``emails/layout.html``. A kind's layout (with its heading and sign-off) is
+rendered once per process and split around the content slot, so a message
+only renders its own body between the two halves. Templates come through the
+engine's cached loader and stay compiled for the life of the worker.
+
+    email = build('welcome', 'ana@example.com', {'name': 'Ana', 'role': 'employee'})
+    emails = build_batch('status_update', [(address, context), ...])
+"""
+from functools import lru_cache
+
+from django.conf import settings
+from django.core.mail import EmailMultiAlternatives
+from django.core.signals import setting_changed
+from django.dispatch import receiver
+from django.template import Context
+from django.template.loader import get_template
+from django.urls import reverse
+from django.utils.safestring import mark_safe
+
+
+# Per kind: the band across the top of the HTML layout and the closing lines
+KINDS = {
+    'welcome': {'heading': '', 'signoff': 'Best Regards,\nYour Job Portal Team'},
+    'application_received': {'heading': '', 'signoff': 'Thank you,\nYour Job Portal Team'},
+    'status_update': {'heading': 'Application Status Update', 'signoff': 'Thank you for your interest!\nYour Job Portal Team'},
+    'recruiter_digest': {'heading': '', 'signoff': 'Thank you,\nYour Job Portal Team'},
+}
+SLOT = '<!--email-content-->'
+PLACEHOLDER_ID = 987654321
+
+
+def site_url():
+    return settings.SITE_URL.rstrip('/')
+
+
+@lru_cache(maxsize=None)
+def _path(name):
+    # Reversed once; each message then only puts its own id in
+    return reverse(name, args=[PLACEHOLDER_ID])
+
+
+def link(name, pk):
+    """Absolute URL of a view taking one id, e.g. link('job_detail', 3)."""
+    return site_url() + _path(name).replace(str(PLACEHOLDER_ID), str(pk))
+
+
+class CompiledEmail:
+    """A kind's compiled templates and its layout, pre-rendered around the content slot."""
+
+    def __init__(self, kind):
+        template = lambda name: get_template(f'emails/{name}').template
+        self.subject = template(f'{kind}/subject.txt')
+        self.text = template(f'{kind}/body.txt')
+        self.html = template(f'{kind}/body.html')
+        chrome = {**KINDS[kind], 'site_url': site_url(), 'content': mark_safe(SLOT)}
+        self.text_head, self.text_tail = get_template('emails/layout.txt').render(chrome).split(SLOT)
+        self.html_head, self.html_tail = get_template('emails/layout.html').render(chrome).split(SLOT)
+
+    def render(self, context):
+        """(subject, text, html) for one recipient's values, already pushed onto ``context``."""
+        return (
+            ' '.join(self.subject.render(context).split()),
+            self.text_head + self.text.render(context).strip() + self.text_tail,
+            self.html_head + self.html.render(context) + self.html_tail,
+        )
+
+
+@lru_cache(maxsize=None)
+def compiled(kind):
+    if kind not in KINDS:
+        raise ValueError(f'Unknown email kind {kind!r}.')
+    return CompiledEmail(kind)
+
+
+@receiver(setting_changed)
+def _reset(setting, **kwargs):
+    if setting in ('SITE_URL', 'TEMPLATES', 'ROOT_URLCONF'):
+        compiled.cache_clear()
+        _path.cache_clear()
+
+
+def render(kind, values):
+    """(subject, text, html) of one message."""
+    return compiled(kind).render(Context({'site_url': site_url(), **values}))
+
+
+def build_batch(kind, recipients):
+    """
+    One message per ``(to, values)`` pair, rendered in a single pass over one
+    Context. ``to`` is an address or a list of them.
+    """
+    email = compiled(kind)
+    context = Context({'site_url': site_url()})
+    messages = []
+    for to, values in recipients:
+        with context.push(values):
+            subject, text, html = email.render(context)
+        message = EmailMultiAlternatives(
+            subject=subject, body=text, from_email=settings.EMAIL_HOST_USER,
+            to=[to] if isinstance(to, str) else list(to),
+        )
+        message.attach_alternative(html, 'text/html')
+        messages.append(message)
+    return messages
+
+
+def build(kind, to, values):
+    return build_batch(kind, [(to, values)])[0]
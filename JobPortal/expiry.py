@@ -0,0 +1,44 @@
+"""
+Deactivation of jobs whose application deadline has passed, run by the
+expire_jobs beat task. Rows are found through the (is_active,
+application_deadline) index and updated ``batch_size`` at a time, each batch
+in its own short transaction, so a large backlog never holds long locks.
+"""
+import time
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from . import metrics
+from .cache import bump_versions
+from .models import Job
+
+
+metrics.register('job_expiry.expired', 'job_expiry.last_rows', 'job_expiry.last_batches', 'job_expiry.last_seconds')
+
+
+def expire_jobs(batch_size=None, max_batches=None, now=None):
+    """Deactivate expired jobs; returns how many were deactivated."""
+    batch_size = batch_size or settings.JOB_EXPIRY_BATCH_SIZE
+    now = now or timezone.now()
+    start = time.perf_counter()
+    expired = batches = 0
+    while max_batches is None or batches < max_batches:
+        # Any expired rows will do; Job's default ordering would add a sort
+        ids = list(Job.objects.expired(now).order_by().values_list('pk', flat=True)[:batch_size])
+        if not ids:
+            break
+        batches += 1
+        with transaction.atomic():
+            expired += Job.objects.filter(pk__in=ids, is_active=True).update(is_active=False, updated_at=now)
+        # update() sends no signals, so drop the cached cards and bundles here
+        bump_versions('job', ids)
+        if len(ids) < batch_size:
+            break
+
+    metrics.incr('job_expiry.expired', expired)
+    metrics.set_value('job_expiry.last_rows', expired)
+    metrics.set_value('job_expiry.last_batches', batches)
+    metrics.set_value('job_expiry.last_seconds', round(time.perf_counter() - start, 3))
+    return expired
@@ -0,0 +1,85 @@
+"""
+Facet counts for job_search: how many of the matching jobs fall under each job
+type, the most common locations and salary thresholds.
+
+Every count comes from one query grouped by location, with a conditional
+COUNT per job type and per salary threshold; the per-type and per-threshold
+totals are the sums over its rows. Results are cached for FACETS_TIMEOUT
+seconds under a signature of the normalized filters, so searches that differ
+only in case, spacing or word order share an entry. Counts may lag job edits
+by up to that long.
+"""
+import hashlib
+import json
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Count, Q
+
+from . import metrics
+from .models import Job
+from .search import tokenize
+
+
+metrics.register('facets.hits', 'facets.misses', 'facets.last_seconds')
+
+JOB_TYPES = Job._meta.get_field('job_type').choices
+# Salary facets are "at least" thresholds, so each one maps onto min_salary
+SALARY_THRESHOLDS = [25000, 50000, 75000, 100000, 150000]
+TOP_LOCATIONS = 10
+
+TEXT_PARAMS = ('q', 'company_name', 'job_title', 'location')
+
+
+def signature(params):
+    """Cache key for a set of job_search parameters; empty ones are left out."""
+    normalized = {}
+    for name, value in params.items():
+        value = str(value or '').strip()
+        if name in TEXT_PARAMS:
+            # Term order, case and repeats don't change what the search index matches.
+            # Text with no index terms ("IT", "++") is matched as a substring instead.
+            value = ' '.join(sorted(set(tokenize(value)))) or value.lower()
+        elif name in ('min_salary', 'radius'):
+            value = str(int(value)) if value.isdigit() else ''
+        if value:
+            normalized[name] = value
+    digest = hashlib.sha1(json.dumps(normalized, sort_keys=True).encode()).hexdigest()
+    return f'facets:{digest}'
+
+
+def compute(jobs):
+    """Facet counts for a Job queryset, in one query."""
+    # A ranked search queryset is already grouped; count over its ids instead
+    if jobs.query.annotations:
+        jobs = Job.objects.filter(pk__in=jobs.order_by().values('pk'))
+    aggregates = {f'type_{value}': Count('pk', filter=Q(job_type=value)) for value, _ in JOB_TYPES}
+    aggregates.update({f'salary_{floor}': Count('pk', filter=Q(salary__gte=floor)) for floor in SALARY_THRESHOLDS})
+    rows = list(jobs.order_by().values('location').annotate(total=Count('pk'), **aggregates))
+
+    locations = sorted(rows, key=lambda row: (-row['total'], row['location']))[:TOP_LOCATIONS]
+    return {
+        'total': sum(row['total'] for row in rows),
+        'job_type': [
+            (value, label, sum(row[f'type_{value}'] for row in rows)) for value, label in JOB_TYPES
+        ],
+        'location': [(row['location'], row['total']) for row in locations],
+        'salary': [(floor, sum(row[f'salary_{floor}'] for row in rows)) for floor in SALARY_THRESHOLDS],
+    }
+
+
+def job_facets(params, jobs):
+    """Cached facet counts for ``jobs``, the queryset the search ``params`` produced."""
+    key = signature(params)
+    facets = cache.get(key)
+    if facets is not None:
+        metrics.incr('facets.hits')
+        return facets
+
+    start = time.perf_counter()
+    facets = compute(jobs)
+    metrics.incr('facets.misses')
+    metrics.set_value('facets.last_seconds', round(time.perf_counter() - start, 4))
+    cache.set(key, facets, settings.FACETS_TIMEOUT)
+    return facets
@@ -1,22 +1,67 @@
+import datetime
+
 import factory
 from django.contrib.auth import get_user_model
+from factory.declarations import BaseDeclaration
 from factory.django import DjangoModelFactory
+from . import bulkgen
 from .models import Employee, Recruiter, Job, Application
 
 User = get_user_model()
 
 
-class UserFactory(DjangoModelFactory):
+class BulkFactoryMixin:
+    """
+    Hands create_batch() calls of ``_bulk_threshold`` objects or more to
+    JobPortal.bulkgen, which writes them with bulk_create instead of one save
+    per object (so no signals fire). Overrides must be plain field values or
+    ``_bulk_arguments``; anything else takes the usual path.
+    """
+    _bulk_threshold = 1000
+    _bulk_arguments = ()
+
+    @classmethod
+    def create_batch(cls, size, **kwargs):
+        plain = all(
+            not isinstance(value, BaseDeclaration) and '__' not in name
+            and (name in cls._bulk_arguments or name in cls._model_fields())
+            for name, value in kwargs.items()
+        )
+        if size < cls._bulk_threshold or not plain:
+            return super().create_batch(size, **kwargs)
+        return cls._bulk_create(size, **kwargs)
+
+    @classmethod
+    def _model_fields(cls):
+        return {field.attname for field in cls._meta.model._meta.concrete_fields}
+
+
+class UserFactory(BulkFactoryMixin, DjangoModelFactory):
     class Meta:
         model = User
 
     email = factory.Faker('email')
     name = factory.Faker('name')
     role = 'employee'  # Default role as employee
-    password = factory.PostGenerationMethodCall('set_password', 'password123')
+    # The raw password, as set_password() takes it
+    password = bulkgen.DEFAULT_PASSWORD
+
+    _bulk_arguments = ('role',)
+
+    @classmethod
+    def _adjust_kwargs(cls, **kwargs):
+        # Hashed once per distinct password and process, not once per user
+        kwargs['password'] = bulkgen.password_hash(kwargs['password'])
+        return kwargs
 
+    @classmethod
+    def _bulk_create(cls, size, **kwargs):
+        if 'password' in kwargs:
+            kwargs['raw_password'] = kwargs.pop('password')
+        return bulkgen.create_users(size, **kwargs)
 
-class RecruiterFactory(DjangoModelFactory):
+
+class RecruiterFactory(BulkFactoryMixin, DjangoModelFactory):
     class Meta:
         model = Recruiter
 
@@ -24,8 +69,12 @@ class RecruiterFactory(DjangoModelFactory):
     company_name = factory.Faker('company')
     website = factory.Faker('url')
 
+    @classmethod
+    def _bulk_create(cls, size, **kwargs):
+        return bulkgen.create_recruiters(size, **kwargs)
+
 
-class JobFactory(DjangoModelFactory):
+class JobFactory(BulkFactoryMixin, DjangoModelFactory):
     class Meta:
         model = Job
 
@@ -35,10 +84,16 @@ class JobFactory(DjangoModelFactory):
     location = factory.Faker('city')
     job_type = 'full_time'
     salary = factory.Faker('random_number', digits=5)
-    application_deadline = factory.Faker('future_datetime')
+    application_deadline = factory.Faker('future_datetime', tzinfo=datetime.timezone.utc)
 
+    _bulk_arguments = ('recruiter',)
 
-class EmployeeFactory(DjangoModelFactory):
+    @classmethod
+    def _bulk_create(cls, size, **kwargs):
+        return bulkgen.create_jobs(size, **kwargs)
+
+
+class EmployeeFactory(BulkFactoryMixin, DjangoModelFactory):
     class Meta:
         model = Employee
 
@@ -46,11 +101,21 @@ class EmployeeFactory(DjangoModelFactory):
     phone_number = factory.Faker('bothify', text='##########')
     location = factory.Faker('city')
 
+    @classmethod
+    def _bulk_create(cls, size, **kwargs):
+        return bulkgen.create_employees(size, **kwargs)
+
 
-class ApplicationFactory(DjangoModelFactory):
+class ApplicationFactory(BulkFactoryMixin, DjangoModelFactory):
     class Meta:
         model = Application
 
     employee = factory.SubFactory(EmployeeFactory)
     job = factory.SubFactory(JobFactory)
     cover_letter = factory.Faker('paragraph')
+
+    _bulk_arguments = ('employee', 'job')
+
+    @classmethod
+    def _bulk_create(cls, size, **kwargs):
+        return bulkgen.create_applications(size, **kwargs)
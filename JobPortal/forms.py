@@ -54,19 +54,19 @@ class ApplicationForm(forms.ModelForm):
         fields = ['cover_letter', 'phone_number', 'resume']  # Include cover letter, phone number, and resume
 
     def __init__(self, *args, **kwargs):
+        # Pass the applicant's Employee row when the caller has it; a user costs a lookup
+        employee = kwargs.pop('employee', None)
         user = kwargs.pop('user', None)
         super().__init__(*args, **kwargs)
 
-        if user and user.role == 'employee':
-            try:
-                employee = Employee.objects.get(user=user)
-                self.initial['phone_number'] = employee.phone_number  # Pre-fill phone number
-                self.initial['name'] = user.name 
-                # If you want to show existing resume, consider adding that to the form context
-                if employee.resume:
-                    self.initial['resume'] = employee.resume  # Pre-fill resume if exists
-            except Employee.DoesNotExist:
-                pass
+        if employee is None and user and user.role == 'employee':
+            employee = Employee.objects.select_related('user').filter(user=user).first()
+        if employee:
+            self.initial['phone_number'] = employee.phone_number  # Pre-fill phone number
+            self.initial['name'] = employee.user.name
+            # If you want to show existing resume, consider adding that to the form context
+            if employee.resume:
+                self.initial['resume'] = employee.resume  # Pre-fill resume if exists
 
 
 # Form for updating employee profile
@@ -80,7 +80,7 @@ class EmployeeForm(forms.ModelForm):
 class RecruiterForm(forms.ModelForm):
     class Meta:
         model = Recruiter
-        fields = ['company_name', 'website', 'logo']
+        fields = ['company_name', 'website', 'logo', 'notification_mode']
 
 
 # Form for updating User (admin form to update role, etc.)
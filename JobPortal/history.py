@@ -0,0 +1,102 @@
+"""
+Application status history. Every status change appends an
+ApplicationStatusEvent; events are never updated afterwards.
+
+``record`` inserts an event at once, or, inside a ``buffered()`` block, holds
+it and writes the block's events with bulk_create when the block ends (and
+every ``batch_size`` events on the way), so a bulk status change adds one
+INSERT per batch instead of one per application. Run the block inside the
+transaction that changes the statuses and both commit together.
+
+``funnel`` and ``time_in_stage`` read only the event table and its indexes.
+"""
+import contextvars
+import datetime
+from collections import defaultdict
+from contextlib import contextmanager
+
+from django.db.models import Count
+
+from .models import ApplicationStatusEvent
+
+
+HISTORY_BATCH_SIZE = 1000
+
+_buffer = contextvars.ContextVar('status_event_buffer', default=None)
+
+
+def record(application_id, job_id, from_status, to_status, actor=None, at=None):
+    event = ApplicationStatusEvent(
+        application_id=application_id, job_id=job_id,
+        from_status=from_status, to_status=to_status, actor=actor,
+    )
+    if at is not None:
+        event.created_at = at
+    buffer = _buffer.get()
+    if buffer is None:
+        event.save()
+        return
+    events, batch_size = buffer
+    events.append(event)
+    if len(events) >= batch_size:
+        _flush(events)
+
+
+@contextmanager
+def buffered(batch_size=HISTORY_BATCH_SIZE):
+    """Collect the events recorded in the block; nested blocks share the outer buffer."""
+    if _buffer.get() is not None:
+        yield
+        return
+    events = []
+    token = _buffer.set((events, batch_size))
+    try:
+        yield
+        _flush(events)
+    finally:
+        # Events of a block that raised are dropped along with its transaction
+        _buffer.reset(token)
+
+
+def _flush(events):
+    ApplicationStatusEvent.objects.bulk_create(events)
+    events.clear()
+
+
+def _events(job_id=None, since=None):
+    events = ApplicationStatusEvent.objects.all()
+    if job_id is not None:
+        events = events.filter(job_id=job_id)
+    if since is not None:
+        events = events.filter(created_at__gte=since)
+    return events
+
+
+def funnel(job_id=None, since=None):
+    """How many applications reached each status, e.g. {'submitted': 120, 'interview': 9}."""
+    rows = (
+        _events(job_id, since).values('to_status')
+        .annotate(applications=Count('application_id', distinct=True))
+        .values_list('to_status', 'applications')
+    )
+    return dict(rows)
+
+
+def time_in_stage(job_id=None, since=None):
+    """
+    Average time applications spent in each status before moving on, as
+    timedeltas by status. Stays that haven't ended yet are left out.
+    """
+    events = (
+        _events(job_id, since).order_by('application_id', 'created_at', 'id')
+        .values_list('application_id', 'to_status', 'created_at')
+    )
+    totals, counts = defaultdict(datetime.timedelta), defaultdict(int)
+    previous = None
+    for application_id, status, created_at in events.iterator(chunk_size=HISTORY_BATCH_SIZE):
+        if previous and previous[0] == application_id:
+            _, entered, entered_at = previous
+            totals[entered] += created_at - entered_at
+            counts[entered] += 1
+        previous = (application_id, status, created_at)
+    return {status: totals[status] / counts[status] for status in counts}
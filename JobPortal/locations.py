@@ -0,0 +1,189 @@
+"""
+Normalized locations and radius search.
+
+Free-text locations on Job and Employee are resolved to a City from the
+gazetteer (data/cities.csv, loaded by ``manage.py load_gazetteer``) through
+CityAlias, a table of normalized spellings, so "Bangalore", "Bengaluru" and
+"Bengaluru, KA" all land on the same row. Rows are linked as they are saved
+(see signals) and in bulk by ``link_locations``.
+
+A radius search first narrows the cities to a latitude/longitude bounding box
+through city_lat_lon_idx, then computes exact great-circle distances for those
+candidates in one NumPy pass; jobs are filtered on the matching city ids.
+
+    origin = find_city('Bangalore')
+    nearby = jobs_within(Job.objects.active(), origin, 50)
+"""
+import csv
+import math
+import re
+import unicodedata
+from collections import defaultdict
+from functools import reduce
+from operator import or_
+from pathlib import Path
+
+import numpy as np
+from django.db import connection, transaction
+from django.db.models import Q
+
+from .cache import bump_versions
+from .models import City, CityAlias, Job
+
+
+GAZETTEER = Path(__file__).resolve().parent / 'data' / 'cities.csv'
+EARTH_RADIUS_KM = 6371.0088
+MAX_ALIAS_LENGTH = CityAlias._meta.get_field('name').max_length
+SEPARATORS_RE = re.compile(r'[\W_]+')
+
+
+def normalize(text):
+    """Lowercase ASCII words of a place name: 'São Paulo, SP' -> 'sao paulo sp'."""
+    text = unicodedata.normalize('NFKD', text or '').encode('ascii', 'ignore').decode()
+    return SEPARATORS_RE.sub(' ', text.lower()).strip()[:MAX_ALIAS_LENGTH]
+
+
+def candidates(text):
+    """Alias names to look up for a location, most specific first."""
+    names = [normalize(text)]
+    if ',' in (text or ''):
+        # "Bengaluru, KA": fall back to the part before the first comma
+        names.append(normalize(text.split(',', 1)[0]))
+    return [name for name in names if name]
+
+
+def resolve_many(texts):
+    """{text: city id or None} for many locations, in one query."""
+    tried = {text: candidates(text) for text in set(texts)}
+    names = {name for names in tried.values() for name in names}
+    aliases = dict(CityAlias.objects.filter(name__in=names).values_list('name', 'city_id')) if names else {}
+    return {text: next((aliases[name] for name in names if name in aliases), None) for text, names in tried.items()}
+
+
+def resolve(text):
+    return resolve_many([text])[text]
+
+
+def find_city(text):
+    """The City a location resolves to, or None."""
+    names = candidates(text)
+    found = {alias.name: alias.city for alias in CityAlias.objects.select_related('city').filter(name__in=names)} if names else {}
+    return next((found[name] for name in names if name in found), None)
+
+
+def _upsert(model, objs, unique_fields, update_fields, batch_size):
+    # MySQL's ON DUPLICATE KEY UPDATE takes no conflict target
+    target = unique_fields if connection.features.supports_update_conflicts_with_target else None
+    model.objects.bulk_create(
+        objs, batch_size=batch_size, update_conflicts=True, unique_fields=target, update_fields=update_fields,
+    )
+
+
+def load_gazetteer(path=GAZETTEER, batch_size=1000):
+    """
+    Insert or update the cities of a gazetteer CSV (name, region, country,
+    latitude, longitude, population and ``|``-separated aliases) and their
+    aliases. Each city is also known as "<name> <region>" and "<name>
+    <country>"; a name shared by several places goes to the most populous.
+    Returns the number of cities and of aliases.
+    """
+    with open(path, newline='', encoding='utf-8') as f:
+        rows = list(csv.DictReader(f))
+    cities = [
+        City(
+            name=row['name'].strip(),
+            region=(row.get('region') or '').strip(),
+            country=row['country'].strip(),
+            latitude=float(row['latitude']),
+            longitude=float(row['longitude']),
+            population=int(row.get('population') or 0),
+        )
+        for row in rows
+    ]
+    with transaction.atomic():
+        _upsert(City, cities, ['country', 'region', 'name'], ['latitude', 'longitude', 'population'], batch_size)
+        ids = {(country, region, name): pk for pk, country, region, name in City.objects.values_list('pk', 'country', 'region', 'name')}
+        aliases = {}
+        for city, row in sorted(zip(cities, rows), key=lambda pair: pair[0].population):
+            names = [city.name, f'{city.name} {city.region}', f'{city.name} {city.country}', *(row.get('aliases') or '').split('|')]
+            for name in filter(None, map(normalize, names)):
+                aliases[name] = ids[city.country, city.region, city.name]
+        _upsert(CityAlias, [CityAlias(name=name, city_id=pk) for name, pk in aliases.items()], ['name'], ['city'], batch_size)
+    return len(cities), len(aliases)
+
+
+def link_locations(model, batch_size=1000, max_batches=None):
+    """
+    Point Job or Employee rows without a city at the one their location
+    resolves to, ``batch_size`` rows per transaction. Returns how many were linked.
+    """
+    linked = batches = last_id = 0
+    while max_batches is None or batches < max_batches:
+        rows = list(
+            model.objects.filter(city__isnull=True, pk__gt=last_id).order_by('pk').values_list('pk', 'location')[:batch_size]
+        )
+        if not rows:
+            break
+        batches += 1
+        last_id = rows[-1][0]
+        cities = resolve_many(location for _, location in rows)
+        by_city = defaultdict(list)
+        for pk, location in rows:
+            if cities[location]:
+                by_city[cities[location]].append(pk)
+        with transaction.atomic():
+            for city_id, pks in by_city.items():
+                linked += model.objects.filter(pk__in=pks).update(city_id=city_id)
+        if model is Job:
+            # update() sends no signals, so drop the cached bundles here
+            bump_versions('job', [pk for pks in by_city.values() for pk in pks])
+        if len(rows) < batch_size:
+            break
+    return linked
+
+
+def bounding_box(lat, lon, km):
+    """
+    ``(min_lat, max_lat, longitude ranges)`` of a box enclosing the circle of
+    ``km`` around a point. The circle's longitude extent is widest north or
+    south of its centre, hence asin rather than a plain division by cos(lat).
+    A circle over the antimeridian gets two longitude ranges, one over a pole
+    every longitude.
+    """
+    angle = km / EARTH_RADIUS_KM
+    min_lat, max_lat = lat - math.degrees(angle), lat + math.degrees(angle)
+    ratio = math.sin(angle) / math.cos(math.radians(lat)) if min_lat > -90 and max_lat < 90 else 1
+    if ratio >= 1:
+        return max(min_lat, -90), min(max_lat, 90), [(-180, 180)]
+    delta = math.degrees(math.asin(ratio))
+    min_lon, max_lon = lon - delta, lon + delta
+    if min_lon < -180:
+        return min_lat, max_lat, [(min_lon + 360, 180), (-180, max_lon)]
+    if max_lon > 180:
+        return min_lat, max_lat, [(min_lon, 180), (-180, max_lon - 360)]
+    return min_lat, max_lat, [(min_lon, max_lon)]
+
+
+def haversine_km(lat, lon, lats, lons):
+    """
+    Great-circle distances in km between points, with NumPy broadcasting: one
+    point against arrays of points, or a column of points against a row.
+    """
+    lat, lon, lats, lons = map(np.radians, (lat, lon, lats, lons))
+    a = np.sin((lats - lat) / 2) ** 2 + np.cos(lat) * np.cos(lats) * np.sin((lons - lon) / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(np.clip(a, 0, 1)))
+
+
+def cities_within(lat, lon, km):
+    """{city id: distance in km} for every city at most ``km`` from the point."""
+    min_lat, max_lat, lon_ranges = bounding_box(lat, lon, km)
+    in_box = Q(latitude__range=(min_lat, max_lat)) & reduce(or_, (Q(longitude__range=r) for r in lon_ranges))
+    rows = np.array(list(City.objects.filter(in_box).values_list('pk', 'latitude', 'longitude')), dtype=float).reshape(-1, 3)
+    distances = haversine_km(lat, lon, rows[:, 1], rows[:, 2])
+    within = distances <= km
+    return dict(zip(rows[within, 0].astype(int).tolist(), distances[within].tolist()))
+
+
+def jobs_within(queryset, city, km):
+    """Restrict a Job queryset to postings in cities at most ``km`` from ``city``."""
+    return queryset.filter(city_id__in=list(cities_within(city.latitude, city.longitude, km)))
@@ -0,0 +1,116 @@
+import logging
+import smtplib
+import threading
+import time
+from contextlib import contextmanager
+
+from celery.signals import worker_process_init, worker_process_shutdown
+from django.conf import settings
+from django.core.mail import get_connection
+
+
+logger = logging.getLogger(__name__)
+
+
+class ConnectionPool:
+    """
+    Open mail backend connections kept for reuse, so consecutive sends skip the
+    TCP + TLS + AUTH handshake. At most ``size`` idle connections are kept and
+    ones idle for more than ``max_idle`` seconds are dropped, as SMTP servers
+    close quiet sessions on their own. Extra keyword arguments go to
+    get_connection(), e.g. host and port.
+
+        with pool.connection() as connection:
+            connection.send_messages(messages)
+    """
+
+    def __init__(self, size=2, max_idle=60, **backend_kwargs):
+        self.size = size
+        self.max_idle = max_idle
+        self.backend_kwargs = backend_kwargs
+        self._idle = []
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def connection(self):
+        connection = self._take()
+        try:
+            yield connection
+        except Exception:
+            # The session may be half way through a command; don't hand it out again
+            connection.close()
+            raise
+        self._give_back(connection)
+
+    def _take(self):
+        now = time.monotonic()
+        while True:
+            with self._lock:
+                if not self._idle:
+                    break
+                connection, last_used = self._idle.pop()
+            if now - last_used < self.max_idle and is_alive(connection):
+                return connection
+            connection.close()
+
+        connection = get_connection(fail_silently=False, **self.backend_kwargs)
+        connection.open()
+        return connection
+
+    def _give_back(self, connection):
+        with self._lock:
+            if len(self._idle) < self.size:
+                self._idle.append((connection, time.monotonic()))
+                return
+        connection.close()
+
+    def close(self):
+        with self._lock:
+            idle, self._idle = self._idle, []
+        for connection, _ in idle:
+            connection.close()
+
+
+def is_alive(connection):
+    """NOOP round trip on SMTP sessions; other backends keep no session."""
+    session = getattr(connection, 'connection', None)
+    if not isinstance(session, smtplib.SMTP):
+        return True
+    try:
+        return session.noop()[0] == 250
+    except (smtplib.SMTPException, OSError):
+        return False
+
+
+_pool = None
+
+
+def get_pool():
+    """The connection pool of this process, created on first use."""
+    global _pool
+    if _pool is None:
+        _pool = ConnectionPool(
+            size=getattr(settings, 'EMAIL_POOL_SIZE', 2),
+            max_idle=getattr(settings, 'EMAIL_POOL_MAX_IDLE', 60),
+        )
+    return _pool
+
+
+@worker_process_init.connect
+def reset_pool(**kwargs):
+    # A forked worker must not share SMTP sockets with its parent; drop the
+    # inherited connections without QUITting them on the parent's behalf.
+    global _pool
+    _pool = None
+
+
+@worker_process_shutdown.connect
+def close_pool(**kwargs):
+    if _pool is not None:
+        _pool.close()
+
+
+def send_messages(messages):
+    """Send EmailMessages over one pooled connection. Returns the number sent."""
+    with get_pool().connection() as connection:
+        return connection.send_messages(messages)
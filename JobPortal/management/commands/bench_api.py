@@ -0,0 +1,48 @@
+import statistics
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.test import Client
+from django.urls import reverse
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from JobPortal.models import User
+
+
+class Command(BaseCommand):
+    help = 'Measure throughput and payload size of the job list API: full, ?fields= and conditional GET'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=200)
+        parser.add_argument('--email', help='User to authenticate as; defaults to the first active user')
+        parser.add_argument('--fields', default='id,title,company_name,location,posted_date')
+
+    def handle(self, *args, **options):
+        user = User.objects.filter(email=options['email']) if options['email'] else User.objects.filter(is_active=True)
+        user = user.first()
+        if user is None:
+            raise CommandError('No user to authenticate as.')
+
+        client = Client(HTTP_AUTHORIZATION=f'Bearer {RefreshToken.for_user(user).access_token}')
+        url = reverse('api-job-list')
+        etag = client.get(url)['ETag']
+
+        for label, params, headers in (
+            ('full', {}, {}),
+            ('fields', {'fields': options['fields']}, {}),
+            ('if-none-match', {}, {'HTTP_IF_NONE_MATCH': etag}),
+        ):
+            timings, sizes = [], []
+            start = time.perf_counter()
+            for _ in range(options['requests']):
+                request_start = time.perf_counter()
+                response = client.get(url, params, **headers)
+                timings.append((time.perf_counter() - request_start) * 1000)
+                sizes.append(len(response.content))
+            elapsed = time.perf_counter() - start
+            timings.sort()
+            self.stdout.write(
+                f'{label:<14} status={response.status_code}  {options["requests"] / elapsed:7.1f} req/s  '
+                f'p50={statistics.median(timings):6.2f}ms  p95={timings[int(len(timings) * 0.95)]:6.2f}ms  '
+                f'bytes={statistics.mean(sizes):8.0f}'
+            )
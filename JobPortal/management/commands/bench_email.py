@@ -0,0 +1,58 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from JobPortal import emails
+from JobPortal.tasks import status_update_values
+
+
+# Representative per-recipient values for each kind
+SAMPLES = {
+    'welcome': lambda n: {'name': f'User {n}', 'role': 'employee'},
+    'application_received': lambda n: {
+        'applicant_name': f'Applicant {n}', 'job_title': 'Backend Developer', 'job_link': emails.link('job_detail', n),
+    },
+    'status_update': lambda n: status_update_values('under_review', 'Backend Developer', n),
+    'recruiter_digest': lambda n: {
+        'count': 6,
+        'jobs': [
+            {'title': f'Job {job}', 'link': emails.link('job_detail', job), 'names': [f'Applicant {n}-{i}' for i in range(3)]}
+            for job in range(2)
+        ],
+    },
+}
+
+
+class Command(BaseCommand):
+    help = 'Measure how many notification emails per second the template renderer builds'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--kinds', default=','.join(SAMPLES), help='Comma-separated email kinds')
+        parser.add_argument('--messages', type=int, default=5000)
+        parser.add_argument('--repeat', type=int, default=3, help='Runs per mode; the best one is reported')
+
+    def handle(self, *args, **options):
+        kinds = [kind.strip() for kind in options['kinds'].split(',')]
+        for kind in kinds:
+            if kind not in SAMPLES:
+                raise CommandError(f'Unknown email kind {kind!r}.')
+
+        self.stdout.write(f"{'kind':<22} {'first':>10} {'build':>12} {'build_batch':>12}")
+        for kind in kinds:
+            recipients = [(f'user{n}@example.com', SAMPLES[kind](n)) for n in range(options['messages'])]
+            emails.compiled.cache_clear()
+            start = time.perf_counter()
+            emails.build(kind, *recipients[0])  # compiles the templates and the layout
+            first = (time.perf_counter() - start) * 1000
+            single = self.best(lambda: [emails.build(kind, to, values) for to, values in recipients], options['repeat'])
+            batch = self.best(lambda: emails.build_batch(kind, recipients), options['repeat'])
+            n = len(recipients)
+            self.stdout.write(f'{kind:<22} {first:>8.1f}ms {n / single:>8.0f}/s {n / batch:>10.0f}/s')
+
+    def best(self, run, repeat):
+        timings = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            run()
+            timings.append(time.perf_counter() - start)
+        return min(timings)
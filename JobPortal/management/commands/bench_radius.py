@@ -0,0 +1,94 @@
+import math
+import random
+import statistics
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from JobPortal import bulkgen
+from JobPortal.locations import EARTH_RADIUS_KM, cities_within, find_city, jobs_within, load_gazetteer
+from JobPortal.models import City, Job
+
+
+ORIGINS = ['Bengaluru', 'Delhi', 'London', 'New York']
+
+
+def python_scan(lat, lon, km):
+    """Distance to every city in a Python loop: what the bounding box and NumPy replace."""
+    lat, lon = math.radians(lat), math.radians(lon)
+    within = []
+    for pk, city_lat, city_lon in City.objects.values_list('pk', 'latitude', 'longitude').iterator(chunk_size=10000):
+        city_lat, city_lon = math.radians(city_lat), math.radians(city_lon)
+        a = math.sin((city_lat - lat) / 2) ** 2 + math.cos(lat) * math.cos(city_lat) * math.sin((city_lon - lon) / 2) ** 2
+        if 2 * EARTH_RADIUS_KM * math.asin(math.sqrt(min(1.0, a))) <= km:
+            within.append(pk)
+    return within
+
+
+class Command(BaseCommand):
+    help = 'Time radius searches against a text location match over a seeded set of jobs'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--jobs', type=int, default=1_000_000)
+        parser.add_argument('--cities', type=int, default=50_000, help='Random cities added to the gazetteer')
+        parser.add_argument('--radius', default='25,100,500', help='Comma-separated distances in km')
+        parser.add_argument('--repeat', type=int, default=5)
+        parser.add_argument('--page-size', type=int, default=10)
+        parser.add_argument('--seed', type=int, default=42)
+
+    def handle(self, *args, **options):
+        radii = [int(km) for km in options['radius'].split(',')]
+        # Everything seeded here is rolled back at the end
+        with transaction.atomic():
+            self.seed(options)
+            for name in ORIGINS:
+                origin = find_city(name)
+                if origin is None:
+                    raise CommandError(f'{name} is not in the gazetteer.')
+                self.stdout.write(f'\n{origin}')
+                self.report('icontains', lambda: Job.objects.filter(location__icontains=origin.name).count(), options)
+                for km in radii:
+                    self.stdout.write(f'  within {km} km')
+                    self.report('  python scan', lambda: len(python_scan(origin.latitude, origin.longitude, km)), options)
+                    self.report('  bbox+numpy', lambda: len(cities_within(origin.latitude, origin.longitude, km)), options)
+                    self.report('  job count', lambda: jobs_within(Job.objects.all(), origin, km).count(), options)
+                    self.report('  first page', lambda: len(jobs_within(Job.objects.all(), origin, km)[:options['page_size']]), options)
+            transaction.set_rollback(True)
+
+    def seed(self, options):
+        rng = random.Random(options['seed'])
+        start = time.perf_counter()
+        load_gazetteer()
+        City.objects.bulk_create([
+            City(
+                name=f'Bench City {i}', country='Benchland',
+                latitude=rng.uniform(-60, 70), longitude=rng.uniform(-180, 180),
+            )
+            for i in range(options['cities'])
+        ], batch_size=5000)
+        cities = list(City.objects.values_list('pk', 'name'))
+
+        recruiter = bulkgen.create_recruiters(1, rng)[0]
+        for offset in range(0, options['jobs'], 50_000):
+            jobs = []
+            for _ in range(min(50_000, options['jobs'] - offset)):
+                city_id, name = rng.choice(cities)
+                jobs.append(Job(
+                    title='Bench job', description='', recruiter=recruiter,
+                    location=name, city_id=city_id, job_type='full_time',
+                ))
+            Job.objects.bulk_create(jobs, batch_size=5000)
+        self.stdout.write(
+            f"Seeded {options['jobs']} jobs over {len(cities)} cities in {time.perf_counter() - start:.1f}s"
+        )
+
+    def report(self, label, run, options):
+        timings = []
+        for _ in range(options['repeat']):
+            start = time.perf_counter()
+            rows = run()
+            timings.append((time.perf_counter() - start) * 1000)
+        timings.sort()
+        p99 = timings[min(len(timings) - 1, int(len(timings) * 0.99))]
+        self.stdout.write(f'  {label:<14} p50={statistics.median(timings):9.2f}ms  p99={p99:9.2f}ms  rows={rows}')
@@ -0,0 +1,72 @@
+import random
+import time
+import tracemalloc
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from JobPortal import bulkgen
+from JobPortal.locations import load_gazetteer
+from JobPortal.models import City, Employee, Job
+from JobPortal.recommendations import compute_recommendations
+from JobPortal.search import rebuild_index
+
+
+def spread_cities(model, ids, city_ids, rng):
+    """Give each row a random city, one UPDATE per city."""
+    ids = list(ids)
+    rng.shuffle(ids)
+    for i, city_id in enumerate(city_ids):
+        model.objects.filter(pk__in=ids[i::len(city_ids)]).update(city_id=city_id)
+
+
+class Command(BaseCommand):
+    help = 'Time the recommendation pipeline and measure its peak memory at several data sizes'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--sizes', default='1000x1000,5000x5000,20000x10000',
+                            help='Comma-separated EMPLOYEESxJOBS datasets')
+        parser.add_argument('--applications', type=int, default=5, help='Applications per employee')
+        parser.add_argument('--top-k', type=int)
+        parser.add_argument('--block-size', type=int, help='Score cells per NumPy block (default RECOMMENDATION_BLOCK_SIZE)')
+        parser.add_argument('--seed', type=int, default=42)
+
+    def handle(self, *args, **options):
+        try:
+            sizes = [tuple(int(n) for n in size.split('x')) for size in options['sizes'].split(',')]
+        except ValueError:
+            raise CommandError('Sizes look like 1000x2000 (employees x jobs).')
+
+        self.stdout.write(f"{'employees':>10} {'jobs':>8} {'pairs':>12} {'seconds':>8} {'pairs/s':>12} {'peak MB':>8} {'rows':>8}")
+        for employees, jobs in sizes:
+            # Everything seeded here is rolled back at the end
+            with transaction.atomic():
+                self.seed(employees, jobs, options)
+                run = lambda: compute_recommendations(top_k=options['top_k'], block_size=options['block_size'])
+                start = time.perf_counter()
+                rows = run()
+                seconds = time.perf_counter() - start
+                # A second, traced run for memory: tracing slows allocation down
+                tracemalloc.start()
+                run()
+                peak = tracemalloc.get_traced_memory()[1] / 2 ** 20
+                tracemalloc.stop()
+                pairs = employees * Job.objects.active().count()
+                self.stdout.write(
+                    f'{employees:>10} {jobs:>8} {pairs:>12} {seconds:>8.2f} {pairs / seconds:>12.0f} {peak:>8.1f} {rows:>8}'
+                )
+                transaction.set_rollback(True)
+
+    def seed(self, employees, jobs, options):
+        rng = random.Random(options['seed'])
+        start = time.perf_counter()
+        bulkgen.generate(
+            recruiters=max(1, jobs // 20), employees=employees, jobs=jobs,
+            applications=employees * options['applications'], seed=options['seed'], prefix='benchrec',
+        )
+        rebuild_index()
+        load_gazetteer()
+        city_ids = list(City.objects.values_list('pk', flat=True))
+        spread_cities(Job, Job.objects.values_list('pk', flat=True), city_ids, rng)
+        spread_cities(Employee, Employee.objects.values_list('pk', flat=True), city_ids, rng)
+        self.stderr.write(f'Seeded {employees} employees and {jobs} jobs in {time.perf_counter() - start:.1f}s')
@@ -0,0 +1,132 @@
+import random
+import statistics
+import time
+
+from django.contrib.auth.hashers import make_password
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Q
+
+from JobPortal import facets
+from JobPortal.models import Job, Recruiter, User
+from JobPortal.search import rebuild_index, search_jobs
+
+
+WORDS = [
+    'python', 'django', 'backend', 'frontend', 'developer', 'engineer', 'senior', 'junior',
+    'data', 'analyst', 'manager', 'product', 'design', 'cloud', 'devops', 'mobile',
+    'android', 'ios', 'java', 'golang', 'react', 'sales', 'marketing', 'support',
+    'security', 'platform', 'machine', 'learning', 'finance', 'operations', 'lead', 'intern',
+]
+CITIES = ['Bengaluru', 'Mumbai', 'Delhi', 'Pune', 'Hyderabad', 'Chennai', 'Kolkata', 'Noida']
+COMPANIES = ['Acme', 'Globex', 'Initech', 'Umbrella', 'Hooli', 'Vandelay', 'Stark', 'Wayne']
+
+QUERIES = [
+    {'job_title': 'python developer'},
+    {'job_title': 'engineer', 'location': 'pune'},
+    {'company_name': 'hooli'},
+    {'job_title': 'data analyst', 'company_name': 'globex', 'location': 'mumbai'},
+    {'location': 'bengaluru'},
+    {'q': 'term1200'},
+]
+
+
+def filter_chain(params):
+    """The icontains filter chain job_search used before the search index."""
+    jobs = Job.objects.select_related('recruiter')
+    for word in params.get('q', '').split():
+        jobs = jobs.filter(
+            Q(title__icontains=word) | Q(description__icontains=word)
+            | Q(recruiter__company_name__icontains=word) | Q(location__icontains=word)
+        )
+    if params.get('company_name'):
+        jobs = jobs.filter(recruiter__company_name__icontains=params['company_name'])
+    if params.get('job_title'):
+        jobs = jobs.filter(title__icontains=params['job_title'])
+    if params.get('location'):
+        jobs = jobs.filter(location__icontains=params['location'])
+    return jobs
+
+
+def indexed(params):
+    return search_jobs(
+        Job.objects.select_related('recruiter'),
+        text=params.get('q', ''),
+        title=params.get('job_title', ''),
+        company=params.get('company_name', ''),
+        location=params.get('location', ''),
+    )
+
+
+class Command(BaseCommand):
+    help = 'Compare the indexed job search against the icontains filter chain on a seeded dataset, and time its facet counts'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--jobs', type=int, default=20000)
+        parser.add_argument('--recruiters', type=int, default=200)
+        parser.add_argument('--repeat', type=int, default=20)
+        parser.add_argument('--page-size', type=int, default=10)
+        parser.add_argument('--vocabulary', type=int, default=5000)
+        parser.add_argument('--seed', type=int, default=42)
+
+    def handle(self, *args, **options):
+        # Everything seeded here is rolled back at the end
+        with transaction.atomic():
+            self.seed(options)
+            for params in QUERIES:
+                self.compare(params, options)
+            transaction.set_rollback(True)
+
+    def seed(self, options):
+        rng = random.Random(options['seed'])
+        password = make_password('password123')
+        start = time.perf_counter()
+
+        users = User.objects.bulk_create([
+            User(email=f'bench-recruiter-{i}@example.com', password=password, role='recruiter')
+            for i in range(options['recruiters'])
+        ])
+        users = User.objects.filter(email__startswith='bench-recruiter-')
+        Recruiter.objects.bulk_create([
+            Recruiter(user=user, company_name=f'{rng.choice(COMPANIES)} {rng.choice(WORDS).title()}')
+            for user in users
+        ])
+        recruiters = list(Recruiter.objects.filter(user__email__startswith='bench-recruiter-'))
+
+        # Descriptions draw from a long-tailed vocabulary like real postings do;
+        # the WORDS that queries use stay the frequent ones.
+        vocabulary = WORDS + [f'term{i}' for i in range(options['vocabulary'])]
+        weights = [1 / rank for rank in range(1, len(vocabulary) + 1)]
+        jobs = [
+            Job(
+                title=' '.join(rng.sample(WORDS, 3)).title(),
+                description=' '.join(rng.choices(vocabulary, weights=weights, k=60)),
+                recruiter=rng.choice(recruiters),
+                location=rng.choice(CITIES),
+                job_type='full_time',
+            )
+            for _ in range(options['jobs'])
+        ]
+        Job.objects.bulk_create(jobs, batch_size=1000)
+        rebuild_index()
+        self.stdout.write(f"Seeded {options['jobs']} jobs in {time.perf_counter() - start:.1f}s")
+
+    def compare(self, params, options):
+        self.stdout.write(f'\n{params}')
+        runs = (
+            ('icontains', lambda: list(filter_chain(params)[:options['page_size']])),
+            ('indexed', lambda: list(indexed(params)[:options['page_size']])),
+            # The uncached cost job_search adds on a facet cache miss
+            ('facets', lambda: facets.compute(indexed(params))['location']),
+        )
+        for label, run in runs:
+            timings = []
+            for _ in range(options['repeat']):
+                start = time.perf_counter()
+                page = run()
+                timings.append((time.perf_counter() - start) * 1000)
+            timings.sort()
+            p99 = timings[min(len(timings) - 1, int(len(timings) * 0.99))]
+            self.stdout.write(
+                f'  {label:<10} p50={statistics.median(timings):8.2f}ms  p99={p99:8.2f}ms  rows={len(page)}'
+            )
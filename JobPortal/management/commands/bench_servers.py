@@ -0,0 +1,80 @@
+import importlib.util
+import os
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+
+from django.conf import settings
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+
+from .bench_smtp import free_port
+
+
+# How each server is started; {workers}, {host} and {port} are filled in
+SERVERS = {
+    'gunicorn': ['-m', 'gunicorn', 'TalentHunt.wsgi:application', '--worker-class', 'sync',
+                 '--workers', '{workers}', '--bind', '{host}:{port}', '--log-level', 'warning'],
+    'uvicorn': ['-m', 'uvicorn', 'TalentHunt.asgi:application',
+                '--workers', '{workers}', '--host', '{host}', '--port', '{port}', '--log-level', 'warning'],
+}
+
+
+def wait_for_port(host, port, timeout):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            with socket.create_connection((host, port), timeout=1):
+                return True
+        except OSError:
+            time.sleep(0.2)
+    return False
+
+
+class Command(BaseCommand):
+    help = 'Run the loadtest mix against gunicorn (sync workers, WSGI) and uvicorn (ASGI) and compare them'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--servers', default='gunicorn,uvicorn', help=f"Comma-separated, from {', '.join(SERVERS)}")
+        parser.add_argument('--workers', type=int, default=4, help='Processes per server')
+        parser.add_argument('--duration', type=float, default=30)
+        parser.add_argument('--concurrency', type=int, default=128)
+        parser.add_argument('--output-dir', help='Keep each run as <server>.json here')
+
+    def handle(self, *args, **options):
+        servers = [name.strip() for name in options['servers'].split(',')]
+        for name in servers:
+            if name not in SERVERS:
+                raise CommandError(f'Unknown server {name!r}.')
+            if importlib.util.find_spec(name) is None:
+                raise CommandError(f'Install {name} to benchmark it.')
+
+        output_dir = options['output_dir'] or tempfile.mkdtemp(prefix='bench_servers-')
+        os.makedirs(output_dir, exist_ok=True)
+        previous = None
+        for name in servers:
+            output = os.path.join(output_dir, f'{name}.json')
+            self.stdout.write(f'\n== {name}: {options["workers"]} workers, {options["concurrency"]} concurrent clients')
+            self.run(name, options, output, compare=previous)
+            previous = output
+        self.stdout.write(f'\nresults in {output_dir}')
+
+    def run(self, name, options, output, compare):
+        host, port = '127.0.0.1', free_port()
+        argv = [sys.executable] + [
+            part.format(workers=options['workers'], host=host, port=port) for part in SERVERS[name]
+        ]
+        # The server imports the same settings module this command runs with
+        server = subprocess.Popen(argv, cwd=settings.BASE_DIR, env={**os.environ, 'PYTHONUNBUFFERED': '1'})
+        try:
+            if not wait_for_port(host, port, timeout=30):
+                raise CommandError(f'{name} did not start listening on {host}:{port}.')
+            call_command(
+                'loadtest', base_url=f'http://{host}:{port}', duration=options['duration'],
+                concurrency=options['concurrency'], output=output, compare=compare, stdout=self.stdout,
+            )
+        finally:
+            server.terminate()
+            server.wait(timeout=30)
@@ -0,0 +1,109 @@
+import asyncio
+import socket
+import time
+
+from django.core.mail import EmailMultiAlternatives, get_connection
+from django.core.management.base import BaseCommand, CommandError
+
+from JobPortal.mailer import ConnectionPool
+
+
+SMTP_BACKEND = 'django.core.mail.backends.smtp.EmailBackend'
+
+
+class SlowHandshakeSink:
+    """aiosmtpd handler that discards mail and delays EHLO to stand in for a remote server's handshake."""
+
+    def __init__(self, delay):
+        self.delay = delay
+
+    async def handle_EHLO(self, server, session, envelope, hostname, responses):
+        session.host_name = hostname
+        await asyncio.sleep(self.delay)
+        return responses
+
+    async def handle_DATA(self, server, session, envelope):
+        return '250 OK'
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+class Command(BaseCommand):
+    help = 'Measure email throughput with a connection per message, a pooled connection and batched sends'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--messages', type=int, default=200)
+        parser.add_argument('--batch-size', type=int, default=50)
+        parser.add_argument('--host', help='SMTP server to send to; by default a local aiosmtpd sink is started')
+        parser.add_argument('--port', type=int, default=1025)
+        parser.add_argument('--handshake-delay', type=float, default=20,
+                            help='Milliseconds the local sink waits before answering EHLO')
+
+    def handle(self, *args, **options):
+        controller = None
+        host, port = options['host'], options['port']
+        if not host:
+            try:
+                from aiosmtpd.controller import Controller
+            except ImportError:
+                raise CommandError('Install aiosmtpd or pass --host/--port of an SMTP server to test against.')
+            host, port = '127.0.0.1', free_port()
+            controller = Controller(SlowHandshakeSink(options['handshake_delay'] / 1000), hostname=host, port=port)
+            controller.start()
+
+        backend_kwargs = {
+            'backend': SMTP_BACKEND, 'host': host, 'port': port,
+            'username': '', 'password': '', 'use_tls': False, 'use_ssl': False,
+        }
+        try:
+            for label, run in (
+                ('per message', self.per_message),
+                ('pooled', self.pooled),
+                ('batched', self.batched),
+            ):
+                messages = self.build_messages(options['messages'])
+                start = time.perf_counter()
+                run(messages, backend_kwargs, options)
+                elapsed = time.perf_counter() - start
+                self.stdout.write(f'{label:<12} {len(messages) / elapsed:8.1f} msg/s  ({elapsed:.2f}s)')
+        finally:
+            if controller is not None:
+                controller.stop()
+
+    def build_messages(self, count):
+        messages = []
+        for i in range(count):
+            email = EmailMultiAlternatives(
+                subject=f'Benchmark message {i}',
+                body='Plain text body',
+                from_email='bench@example.com',
+                to=[f'recipient-{i}@example.com'],
+            )
+            email.attach_alternative('<p>HTML body</p>', 'text/html')
+            messages.append(email)
+        return messages
+
+    def per_message(self, messages, backend_kwargs, options):
+        # What the tasks did before: EmailMessage.send() opens and closes its own session
+        for message in messages:
+            message.connection = get_connection(**backend_kwargs)
+            message.send()
+
+    def pooled(self, messages, backend_kwargs, options):
+        pool = ConnectionPool(**backend_kwargs)
+        for message in messages:
+            with pool.connection() as connection:
+                connection.send_messages([message])
+        pool.close()
+
+    def batched(self, messages, backend_kwargs, options):
+        pool = ConnectionPool(**backend_kwargs)
+        size = options['batch_size']
+        for i in range(0, len(messages), size):
+            with pool.connection() as connection:
+                connection.send_messages(messages[i:i + size])
+        pool.close()
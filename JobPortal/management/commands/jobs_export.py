@@ -0,0 +1,61 @@
+import csv
+import json
+import time
+
+from django.core.management.base import BaseCommand
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import F
+
+from JobPortal.models import Job
+
+
+# Same columns jobs_import reads, plus the read-only ones
+EXPORT_FIELDS = [
+    'id', 'title', 'description', 'location', 'job_type', 'salary',
+    'application_deadline', 'posted_date', 'is_active', 'recruiter_email',
+]
+
+
+class Command(BaseCommand):
+    help = 'Export jobs as CSV or JSONL, streaming rows in chunks'
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help="File to write, or '-' for stdout")
+        parser.add_argument('--format', choices=['csv', 'jsonl'], help='Defaults to the file extension')
+        parser.add_argument('--recruiter', help='Only export jobs of the recruiter with this email')
+        parser.add_argument('--active-only', action='store_true')
+        parser.add_argument('--chunk-size', type=int, default=2000)
+
+    def handle(self, *args, **options):
+        path = options['path']
+        fmt = options['format'] or ('jsonl' if path.endswith(('.jsonl', '.json')) else 'csv')
+
+        jobs = Job.objects.annotate(recruiter_email=F('recruiter__user__email')).order_by('pk')
+        if options['recruiter']:
+            jobs = jobs.filter(recruiter__user__email=options['recruiter'])
+        if options['active_only']:
+            jobs = jobs.filter(is_active=True)
+        rows = jobs.values(*EXPORT_FIELDS).iterator(chunk_size=options['chunk_size'])
+
+        stream = self.stdout if path == '-' else open(path, 'w', newline='', encoding='utf-8')
+        exported = 0
+        start = time.perf_counter()
+        try:
+            if fmt == 'csv':
+                writer = csv.DictWriter(stream, fieldnames=EXPORT_FIELDS)
+                writer.writeheader()
+                for row in rows:
+                    writer.writerow(row)
+                    exported += 1
+            else:
+                for row in rows:
+                    stream.write(json.dumps(row, cls=DjangoJSONEncoder) + '\n')
+                    exported += 1
+        finally:
+            if stream is not self.stdout:
+                stream.close()
+
+        elapsed = time.perf_counter() - start
+        self.stderr.write(self.style.SUCCESS(
+            f'Exported {exported} jobs in {elapsed:.1f}s ({exported / elapsed if elapsed else 0:.0f} rows/s)'
+        ))
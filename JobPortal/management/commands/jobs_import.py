@@ -0,0 +1,112 @@
+import csv
+import json
+import sys
+import time
+from itertools import islice
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from JobPortal.forms import JobForm
+from JobPortal.models import Job, Recruiter
+from JobPortal.locations import resolve_many
+from JobPortal.search import index_jobs
+
+
+def read_rows(stream, fmt):
+    """Yield (line number, row dict) from a CSV or JSONL stream without reading it all."""
+    if fmt == 'csv':
+        reader = csv.DictReader(stream)
+        for row in reader:
+            yield reader.line_num, row
+        return
+    for line_num, line in enumerate(stream, 1):
+        if not line.strip():
+            continue
+        try:
+            row = json.loads(line)
+        except ValueError as e:
+            row = e
+        yield line_num, row
+
+
+class Command(BaseCommand):
+    help = 'Import jobs from a CSV or JSONL file, validating each row like the job form'
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help="File to read, or '-' for stdin")
+        parser.add_argument('--format', choices=['csv', 'jsonl'], help='Defaults to the file extension')
+        parser.add_argument('--recruiter', help='Email of the recruiter posting rows without a recruiter_email column')
+        parser.add_argument('--chunk-size', type=int, default=500)
+        parser.add_argument('--dry-run', action='store_true', help='Validate only')
+
+    def handle(self, *args, **options):
+        path = options['path']
+        fmt = options['format'] or ('jsonl' if path.endswith(('.jsonl', '.json')) else 'csv')
+        self.recruiters = {}
+        self.default_recruiter = self.get_recruiter(options['recruiter']) if options['recruiter'] else None
+        if options['recruiter'] and self.default_recruiter is None:
+            raise CommandError(f"No recruiter with email {options['recruiter']}")
+
+        stream = sys.stdin if path == '-' else open(path, newline='', encoding='utf-8')
+        imported = errors = 0
+        start = time.perf_counter()
+        try:
+            rows = read_rows(stream, fmt)
+            while chunk := list(islice(rows, options['chunk_size'])):
+                jobs = []
+                for line_num, row in chunk:
+                    job, error = self.build_job(row)
+                    if error:
+                        errors += 1
+                        self.stderr.write(f'line {line_num}: {error}')
+                    else:
+                        jobs.append(job)
+                if not options['dry_run']:
+                    self.save_chunk(jobs)
+                imported += len(jobs)
+                elapsed = time.perf_counter() - start
+                self.stderr.write(f'{imported} rows imported, {errors} rejected, {imported / elapsed:.0f} rows/s')
+        finally:
+            if stream is not sys.stdin:
+                stream.close()
+
+        elapsed = time.perf_counter() - start
+        verb = 'Validated' if options['dry_run'] else 'Imported'
+        self.stdout.write(self.style.SUCCESS(
+            f'{verb} {imported} jobs in {elapsed:.1f}s ({imported / elapsed if elapsed else 0:.0f} rows/s), {errors} rows rejected'
+        ))
+
+    def get_recruiter(self, email):
+        if email not in self.recruiters:
+            self.recruiters[email] = Recruiter.objects.select_related('user').filter(user__email=email).first()
+        return self.recruiters[email]
+
+    def build_job(self, row):
+        """An unsaved Job for a row, or an error message."""
+        if not isinstance(row, dict):
+            return None, f'not a JSON object: {row}'
+        email = row.get('recruiter_email')
+        recruiter = self.get_recruiter(email) if email else self.default_recruiter
+        if recruiter is None:
+            return None, f'unknown recruiter {email}' if email else 'no recruiter_email and no --recruiter given'
+
+        form = JobForm(data=row)
+        if not form.is_valid():
+            return None, '; '.join(f'{field}: {" ".join(messages)}' for field, messages in form.errors.items())
+        job = form.save(commit=False)
+        job.recruiter = recruiter
+        return job, None
+
+    def save_chunk(self, jobs):
+        if not jobs:
+            return
+        cities = resolve_many(job.location for job in jobs)
+        for job in jobs:
+            job.city_id = cities[job.location]
+        with transaction.atomic():
+            # bulk_create sends no post_save, so index the new rows here. MySQL
+            # does not return their ids, hence the id range.
+            last_id = Job.objects.order_by('-pk').values_list('pk', flat=True).first() or 0
+            Job.objects.bulk_create(jobs)
+            index_jobs(Job.objects.select_related('recruiter').filter(pk__gt=last_id))
@@ -0,0 +1,22 @@
+from django.core.management.base import BaseCommand
+
+from JobPortal.locations import GAZETTEER, link_locations, load_gazetteer
+from JobPortal.models import Employee, Job
+
+
+class Command(BaseCommand):
+    help = 'Load cities and their aliases from a gazetteer CSV, then link unlinked jobs and employees to them'
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', nargs='?', default=str(GAZETTEER), help='Defaults to the bundled JobPortal/data/cities.csv')
+        parser.add_argument('--batch-size', type=int, default=1000)
+        parser.add_argument('--no-link', action='store_true', help='Only load the gazetteer')
+
+    def handle(self, *args, **options):
+        cities, aliases = load_gazetteer(options['path'], batch_size=options['batch_size'])
+        self.stdout.write(f'Loaded {cities} cities and {aliases} aliases')
+        if options['no_link']:
+            return
+        for model in (Job, Employee):
+            linked = link_locations(model, batch_size=options['batch_size'])
+            self.stdout.write(f'Linked {linked} {model._meta.verbose_name_plural.lower()}')
@@ -0,0 +1,209 @@
+import json
+import random
+import re
+import threading
+import time
+from collections import defaultdict
+
+import requests
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.db.models import Max, Min
+from django.urls import reverse
+from django.utils import timezone
+
+from JobPortal.models import Application, Job
+
+from .seed_loadtest import EMAIL_PATTERN, PASSWORD
+
+
+CSRF_RE = re.compile(r'name="csrfmiddlewaretoken" value="([^"]+)"')
+SEARCH_WORDS = ['developer', 'engineer', 'manager', 'analyst', 'designer', 'sales', 'python', 'data']
+
+# (weight, label, url builder) per role; builders get the sampled ids
+MIX = {
+    'anonymous': [
+        (6, 'job_list', lambda ids: reverse('job_list')),
+        (4, 'job_search', lambda ids: reverse('job_search') + f'?q={random.choice(SEARCH_WORDS)}'),
+    ],
+    'employee': [
+        (4, 'job_list', lambda ids: reverse('job_list')),
+        (3, 'job_search', lambda ids: reverse('job_search') + f'?q={random.choice(SEARCH_WORDS)}'),
+        (3, 'job_detail', lambda ids: reverse('job_detail', args=[random.choice(ids['jobs'])])),
+        (2, 'application_list', lambda ids: reverse('application_list')),
+        (1, 'employee_dashboard', lambda ids: reverse('employee_dashboard')),
+    ],
+    'recruiter': [
+        (3, 'recruiter_dashboard', lambda ids: reverse('recruiter_dashboard')),
+        (3, 'application_list', lambda ids: reverse('application_list')),
+        (2, 'job_list', lambda ids: reverse('job_list')),
+        (1, 'application_detail', lambda ids: reverse('application_detail', args=[random.choice(ids['applications'])])),
+    ],
+}
+ROLE_WEIGHTS = {'anonymous': 3, 'employee': 5, 'recruiter': 2}
+
+
+def random_ids(model, count, rounds=5):
+    """
+    Up to ``count`` random primary keys of ``model``. Candidates are drawn from
+    the pk range and looked up by pk, so no query sorts or scans the table;
+    each round redraws for the ones that fell into gaps left by deletes.
+    """
+    bounds = model.objects.aggregate(low=Min('pk'), high=Max('pk'))
+    if bounds['low'] is None:
+        return []
+    ids = set()
+    for _ in range(rounds):
+        wanted = min(count, bounds['high'] - bounds['low'] + 1) - len(ids)
+        if wanted <= 0:
+            break
+        candidates = {random.randint(bounds['low'], bounds['high']) for _ in range(wanted * 2)} - ids
+        ids.update(model.objects.filter(pk__in=candidates).values_list('pk', flat=True))
+    ids = sorted(ids)
+    return ids if len(ids) <= count else random.sample(ids, count)
+
+
+def percentile(values, fraction):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * fraction))] if values else None
+
+
+def summarize(samples, elapsed):
+    latencies = [sample['ms'] for sample in samples]
+    queries = [sample['queries'] for sample in samples if sample['queries'] is not None]
+    return {
+        'requests': len(samples),
+        'errors': sum(1 for sample in samples if sample['status'] >= 400),
+        'rps': round(len(samples) / elapsed, 1),
+        'p50_ms': round(percentile(latencies, 0.50), 2) if latencies else None,
+        'p95_ms': round(percentile(latencies, 0.95), 2) if latencies else None,
+        'p99_ms': round(percentile(latencies, 0.99), 2) if latencies else None,
+        'queries_per_request': round(sum(queries) / len(queries), 1) if queries else None,
+    }
+
+
+class Command(BaseCommand):
+    help = 'Replay a weighted mix of page views against a running server and report latency percentiles'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--base-url', default='http://127.0.0.1:8000')
+        parser.add_argument('--duration', type=float, default=60, help='Seconds to run')
+        parser.add_argument('--concurrency', type=int, default=8)
+        parser.add_argument('--seed', type=int, default=1)
+        parser.add_argument('--output', help='Write the results as JSON to this file')
+        parser.add_argument('--compare', help='Earlier JSON results to print the differences against')
+
+    def handle(self, *args, **options):
+        random.seed(options['seed'])
+        self.base_url = options['base_url'].rstrip('/')
+        self.ids = self.sample_ids()
+
+        samples = []
+        lock = threading.Lock()
+        deadline = time.monotonic() + options['duration']
+
+        def worker(n):
+            sessions = {role: self.session(role, n) for role in ROLE_WEIGHTS}
+            ids = self.ids_for(n)
+            roles, weights = zip(*ROLE_WEIGHTS.items())
+            while time.monotonic() < deadline:
+                role = random.choices(roles, weights)[0]
+                _, label, build = random.choices(MIX[role], [weight for weight, *_ in MIX[role]])[0]
+                sample = self.fetch(sessions[role], build(ids[role]))
+                sample.update(role=role, url=label)
+                with lock:
+                    samples.append(sample)
+
+        threads = [threading.Thread(target=worker, args=[n]) for n in range(options['concurrency'])]
+        start = time.monotonic()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        elapsed = time.monotonic() - start
+
+        results = self.report(samples, elapsed, options)
+        if options['output']:
+            with open(options['output'], 'w') as f:
+                json.dump(results, f, indent=2)
+        if options['compare']:
+            with open(options['compare']) as f:
+                self.compare(json.load(f), results)
+
+    def sample_ids(self):
+        jobs = random_ids(Job, 1000)
+        applications = random_ids(Application, 1000)
+        if not jobs or not applications:
+            raise CommandError('No data to test against; run seed_loadtest first.')
+        return {'jobs': jobs, 'applications': applications}
+
+    def ids_for(self, n):
+        """Ids each role's pages pick from; recruiters only open their own applicants."""
+        own = list(
+            Application.objects.filter(job__recruiter__user__email=EMAIL_PATTERN.format(role='recruiter', n=n))
+            .values_list('pk', flat=True)[:1000]
+        )
+        connection.close()
+        return {
+            'anonymous': self.ids,
+            'employee': self.ids,
+            'recruiter': {**self.ids, 'applications': own or self.ids['applications']},
+        }
+
+    def session(self, role, n):
+        """A requests session, signed in as the n-th seeded user of the role."""
+        session = requests.Session()
+        if role == 'anonymous':
+            return session
+        login_url = self.base_url + reverse('login')
+        token = CSRF_RE.search(session.get(login_url).text).group(1)
+        response = session.post(
+            login_url,
+            data={'email': EMAIL_PATTERN.format(role=role, n=n), 'password': PASSWORD, 'csrfmiddlewaretoken': token},
+            headers={'Referer': login_url},
+            allow_redirects=False,
+        )
+        if response.status_code != 302:
+            raise CommandError(f'Could not sign in as {role} {n}; run seed_loadtest first.')
+        return session
+
+    def fetch(self, session, path):
+        start = time.perf_counter()
+        response = session.get(self.base_url + path, allow_redirects=False)
+        elapsed = (time.perf_counter() - start) * 1000
+        # Set by JobPortal.profiling.QueryBudgetMiddleware when the server runs with DEBUG
+        queries = response.headers.get('X-Query-Count')
+        return {'ms': elapsed, 'status': response.status_code, 'queries': int(queries) if queries else None}
+
+    def report(self, samples, elapsed, options):
+        by_url = defaultdict(list)
+        for sample in samples:
+            by_url[f"{sample['role']}:{sample['url']}"].append(sample)
+
+        results = {
+            'started_at': timezone.now().isoformat(),
+            'base_url': self.base_url,
+            'duration_s': round(elapsed, 1),
+            'concurrency': options['concurrency'],
+            'total': summarize(samples, elapsed),
+            'urls': {key: summarize(by_url[key], elapsed) for key in sorted(by_url)},
+        }
+
+        self.stdout.write(f"{'url':<32} {'reqs':>6} {'err':>4} {'rps':>7} {'p50':>8} {'p95':>8} {'p99':>8} {'queries':>7}")
+        for key, row in [*results['urls'].items(), ('TOTAL', results['total'])]:
+            self.stdout.write(
+                f"{key:<32} {row['requests']:>6} {row['errors']:>4} {row['rps']:>7} {row['p50_ms']:>8} "
+                f"{row['p95_ms']:>8} {row['p99_ms']:>8} {row['queries_per_request'] if row['queries_per_request'] is not None else '-':>7}"
+            )
+        return results
+
+    def compare(self, before, after):
+        self.stdout.write(f"\nchange vs {before['started_at']}  (p95 ms, rps)")
+        for key in sorted(set(before['urls']) | set(after['urls'])):
+            old, new = before['urls'].get(key), after['urls'].get(key)
+            if not old or not new:
+                self.stdout.write(f"{key:<32} {'only before' if old else 'only after'}")
+                continue
+            self.stdout.write(
+                f"{key:<32} p95 {old['p95_ms']:>8} -> {new['p95_ms']:<8} rps {old['rps']:>7} -> {new['rps']}"
+            )
@@ -0,0 +1,25 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from JobPortal import outbox
+
+
+class Command(BaseCommand):
+    help = 'Publish queued task calls from the outbox to the Celery broker, continuously by default'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--interval', type=float, default=1.0, help='Seconds to sleep when the outbox is empty')
+        parser.add_argument('--batch-size', type=int, help='Messages per transaction (default OUTBOX_BATCH_SIZE)')
+        parser.add_argument('--once', action='store_true', help='Drain the outbox once and exit')
+
+    def handle(self, *args, **options):
+        while True:
+            published = outbox.relay(batch_size=options['batch_size'])
+            if published:
+                self.stdout.write(f'published {published}')
+            if options['once']:
+                return
+            close_old_connections()
+            time.sleep(options['interval'])
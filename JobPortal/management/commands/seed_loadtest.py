@@ -0,0 +1,62 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from JobPortal import bulkgen
+from JobPortal.models import User
+from JobPortal.search import rebuild_index
+from JobPortal.stats import refresh_dashboard_stats
+
+
+# Login emails are predictable so the loadtest driver can sign in as any seeded user
+PREFIX = 'loadtest'
+EMAIL_PATTERN = bulkgen.EMAIL_PATTERN.format(prefix=PREFIX, role='{role}', n='{n}')
+PASSWORD = bulkgen.DEFAULT_PASSWORD
+
+
+class Command(BaseCommand):
+    help = 'Seed a production-sized dataset for load testing with the bulk generator'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--recruiters', type=int, default=50_000)
+        parser.add_argument('--employees', type=int, default=200_000)
+        parser.add_argument('--jobs', type=int, default=1_000_000)
+        parser.add_argument('--applications', type=int, default=10_000_000)
+        parser.add_argument('--scale', type=float, default=1.0, help='Multiply every count, e.g. 0.01 for a quick run')
+        parser.add_argument('--batch-size', type=int, default=2000)
+        parser.add_argument('--processes', type=int, default=1, help='Worker processes writing in parallel')
+        parser.add_argument('--seed', type=int, default=1)
+        parser.add_argument('--search-index', action='store_true', help='Also build the job search index')
+
+    def handle(self, *args, **options):
+        if User.objects.filter(email__startswith=f'{PREFIX}-').exists():
+            raise CommandError('Load test data is already seeded; flush the database first.')
+        counts = {
+            name: max(1, int(options[name] * options['scale']))
+            for name in ('recruiters', 'employees', 'jobs', 'applications')
+        }
+
+        self.label = None
+        start = self.tick = time.perf_counter()
+        bulkgen.generate(
+            **counts, seed=options['seed'], processes=options['processes'],
+            batch_size=options['batch_size'], prefix=PREFIX, progress=self.progress,
+        )
+        self.stdout.write(f'\ngenerated in {time.perf_counter() - start:.1f}s')
+
+        if options['search_index']:
+            start = time.perf_counter()
+            rebuild_index()
+            self.stdout.write(f'search index: {time.perf_counter() - start:.1f}s')
+        refresh_dashboard_stats()
+
+    def progress(self, label, done):
+        now = time.perf_counter()
+        if label != self.label:
+            # A stage starts when the previous one reported its last chunk
+            if self.label:
+                self.stdout.write('')
+            self.label, self.started = label, self.tick
+        self.tick = now
+        elapsed = now - self.started
+        self.stdout.write(f'\r{label}: {done} ({done / elapsed:.0f} rows/s)', ending='')
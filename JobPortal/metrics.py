@@ -0,0 +1,41 @@
+from django.core.cache import cache
+
+
+# Counters live in the default cache so every process (web and workers) adds
+# to the same totals. They are operational numbers and may reset on eviction.
+METRICS_PREFIX = 'metrics:'
+REGISTERED = set()
+
+
+def register(*names):
+    """Declare counters so they show up in snapshot() before their first increment."""
+    REGISTERED.update(names)
+
+
+def incr(name, delta=1):
+    if not delta:
+        return
+    key = METRICS_PREFIX + name
+    if not cache.add(key, delta, timeout=None):
+        cache.incr(key, delta)
+
+
+def set_value(name, value):
+    """Record a gauge, e.g. the duration of the last run of a task."""
+    cache.set(METRICS_PREFIX + name, value, timeout=None)
+
+
+def snapshot():
+    """
+    Current value of every registered metric, plus ``<x>.hit_ratio`` for each
+    pair of ``<x>.hits`` and ``<x>.misses`` counters (None before any lookup).
+    """
+    names = sorted(REGISTERED)
+    values = cache.get_many([METRICS_PREFIX + name for name in names])
+    result = {name: values.get(METRICS_PREFIX + name, 0) for name in names}
+    for name in names:
+        prefix = name.removesuffix('.hits')
+        if name.endswith('.hits') and f'{prefix}.misses' in result:
+            lookups = result[name] + result[f'{prefix}.misses']
+            result[f'{prefix}.hit_ratio'] = round(result[name] / lookups, 4) if lookups else None
+    return result
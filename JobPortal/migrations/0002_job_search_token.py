@@ -0,0 +1,78 @@
+# Generated by Django 5.1.2 on 2026-10-18 03:58
+
+import re
+from collections import Counter
+
+import django.db.models.deletion
+
+from django.db import migrations, models
+
+
+# Frozen copies of JobPortal.search as of this migration, so that later changes
+# to the tokenizer don't change what it writes
+TOKEN_RE = re.compile(r'[^\W_]+')
+MAX_TERM_LENGTH = 64
+STOP_WORDS = frozenset({
+    'an', 'and', 'are', 'as', 'at', 'be', 'by', 'for', 'from', 'in', 'is', 'it',
+    'of', 'on', 'or', 'that', 'the', 'this', 'to', 'we', 'will', 'with', 'you', 'your',
+})
+FIELD_WEIGHTS = {
+    'title': 8,
+    'company': 4,
+    'location': 4,
+    'description': 1,
+}
+
+
+def tokenize(text):
+    return [
+        term[:MAX_TERM_LENGTH]
+        for term in TOKEN_RE.findall((text or '').lower())
+        if len(term) > 1 and term not in STOP_WORDS
+    ]
+
+
+def build_index(apps, schema_editor):
+    Job = apps.get_model('JobPortal', 'Job')
+    JobSearchToken = apps.get_model('JobPortal', 'JobSearchToken')
+    tokens = []
+    for job in Job.objects.select_related('recruiter').iterator(chunk_size=500):
+        texts = {
+            'title': job.title,
+            'company': job.recruiter.company_name,
+            'location': job.location,
+            'description': job.description,
+        }
+        counts = Counter((field, term) for field, text in texts.items() for term in tokenize(text))
+        tokens += [
+            JobSearchToken(job_id=job.pk, field=field, term=term, weight=FIELD_WEIGHTS[field] * count)
+            for (field, term), count in counts.items()
+        ]
+        if len(tokens) >= 5000:
+            JobSearchToken.objects.bulk_create(tokens)
+            tokens = []
+    JobSearchToken.objects.bulk_create(tokens)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('JobPortal', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='JobSearchToken',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('field', models.CharField(choices=[('title', 'Title'), ('company', 'Company'), ('location', 'Location'), ('description', 'Description')], max_length=20)),
+                ('term', models.CharField(max_length=64)),
+                ('weight', models.PositiveIntegerField(default=1)),
+                ('job', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='search_tokens', to='JobPortal.job')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['term', 'field'], name='jobsearch_term_field_idx')],
+            },
+        ),
+        migrations.RunPython(build_index, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,32 @@
+# Generated by Django 5.1.2 on 2026-10-18 04:12
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('JobPortal', '0002_job_search_token'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DashboardStats',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('employees_count', models.PositiveIntegerField(default=0)),
+                ('active_employees_count', models.PositiveIntegerField(default=0)),
+                ('deactivated_employees_count', models.PositiveIntegerField(default=0)),
+                ('recruiters_count', models.PositiveIntegerField(default=0)),
+                ('active_recruiters_count', models.PositiveIntegerField(default=0)),
+                ('deactivated_recruiters_count', models.PositiveIntegerField(default=0)),
+                ('jobs_count', models.PositiveIntegerField(default=0)),
+                ('active_jobs_count', models.PositiveIntegerField(default=0)),
+                ('deactivated_jobs_count', models.PositiveIntegerField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'verbose_name_plural': 'Dashboard stats',
+            },
+        ),
+    ]
@@ -0,0 +1,28 @@
+# Generated by Django 5.1.2 on 2026-10-18 04:15
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('JobPortal', '0003_dashboard_stats'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='recruiter',
+            name='notification_mode',
+            field=models.CharField(choices=[('immediate', 'Email me for every application'), ('digest', 'Send me a periodic digest')], default='immediate', max_length=20),
+        ),
+        migrations.CreateModel(
+            name='PendingNotification',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('application', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='JobPortal.application')),
+                ('recruiter', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='pending_notifications', to='JobPortal.recruiter')),
+            ],
+        ),
+    ]
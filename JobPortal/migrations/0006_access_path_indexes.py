@@ -0,0 +1,56 @@
+# Generated by Django 5.1.2 on 2026-10-18 04:24
+
+from django.db import migrations, models
+from django.db.models import Count, Min
+
+
+def remove_duplicate_applications(apps, schema_editor):
+    # Keep the first application of each employee/job pair so the unique
+    # constraint can be created
+    Application = apps.get_model('JobPortal', 'Application')
+    duplicated = (
+        Application.objects.values('employee_id', 'job_id')
+        .annotate(first_id=Min('id'), copies=Count('id'))
+        .filter(copies__gt=1)
+    )
+    for pair in duplicated.iterator():
+        Application.objects.filter(employee_id=pair['employee_id'], job_id=pair['job_id']).exclude(id=pair['first_id']).delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('JobPortal', '0005_job_application_updated_at'),
+    ]
+
+    operations = [
+        migrations.RunPython(remove_duplicate_applications, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='application',
+            index=models.Index(fields=['job', 'status'], name='application_job_status_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='application',
+            index=models.Index(fields=['submitted_at'], name='application_submitted_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='application',
+            index=models.Index(fields=['employee', 'submitted_at'], name='application_employee_sub_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='job',
+            index=models.Index(fields=['posted_date'], name='job_posted_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='job',
+            index=models.Index(fields=['is_active', 'posted_date'], name='job_active_posted_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='job',
+            index=models.Index(fields=['recruiter', 'posted_date'], name='job_recruiter_posted_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='application',
+            constraint=models.UniqueConstraint(fields=('employee', 'job'), name='unique_application_per_job'),
+        ),
+    ]
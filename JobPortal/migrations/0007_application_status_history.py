@@ -0,0 +1,47 @@
+# Generated by Django 5.1.2 on 2026-10-18 04:51
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.conf import settings
+from django.db import migrations, models
+
+
+def backfill_history(apps, schema_editor):
+    # Earlier changes weren't logged: start each existing application with its
+    # submission and, if it has moved on, one step to its current status.
+    # INSERT ... SELECT keeps millions of rows inside the database.
+    Application = apps.get_model('JobPortal', 'Application')
+    Event = apps.get_model('JobPortal', 'ApplicationStatusEvent')
+    q = schema_editor.quote_name
+    insert = (
+        f"INSERT INTO {q(Event._meta.db_table)} (application_id, job_id, from_status, to_status, created_at) "
+        f"SELECT id, job_id, %s, {{to_status}}, {{created_at}} FROM {q(Application._meta.db_table)}"
+    )
+    schema_editor.execute(insert.format(to_status='%s', created_at='submitted_at'), ['', 'submitted'])
+    schema_editor.execute(insert.format(to_status='status', created_at='updated_at') + " WHERE status <> %s", ['submitted', 'submitted'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('JobPortal', '0006_access_path_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ApplicationStatusEvent',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('from_status', models.CharField(blank=True, max_length=50)),
+                ('to_status', models.CharField(choices=[('submitted', 'Submitted'), ('under_review', 'Under Review'), ('interview', 'Interview'), ('offered', 'Offered'), ('rejected', 'Rejected')], max_length=50)),
+                ('created_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('actor', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to=settings.AUTH_USER_MODEL)),
+                ('application', models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='status_events', to='JobPortal.application')),
+                ('job', models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='+', to='JobPortal.job')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['application', 'created_at'], name='status_event_app_time_idx'), models.Index(fields=['job', 'to_status', 'created_at'], name='status_event_job_stage_idx'), models.Index(fields=['to_status', 'created_at'], name='status_event_stage_time_idx')],
+            },
+        ),
+        migrations.RunPython(backfill_history, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 5.1.2 on 2026-10-18 05:02
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('JobPortal', '0008_task_outbox'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='job',
+            index=models.Index(fields=['is_active', 'application_deadline'], name='job_active_deadline_idx'),
+        ),
+    ]
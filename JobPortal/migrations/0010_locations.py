@@ -0,0 +1,49 @@
+# Generated by Django 5.1.2 on 2026-10-18 05:09
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('JobPortal', '0009_job_expiry'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='City',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=200)),
+                ('region', models.CharField(blank=True, max_length=200)),
+                ('country', models.CharField(max_length=100)),
+                ('latitude', models.FloatField()),
+                ('longitude', models.FloatField()),
+                ('population', models.PositiveIntegerField(default=0)),
+            ],
+            options={
+                'verbose_name_plural': 'Cities',
+                'indexes': [models.Index(fields=['latitude', 'longitude'], name='city_lat_lon_idx')],
+                'constraints': [models.UniqueConstraint(fields=('country', 'region', 'name'), name='unique_city_place')],
+            },
+        ),
+        migrations.AddField(
+            model_name='employee',
+            name='city',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='employees', to='JobPortal.city'),
+        ),
+        migrations.AddField(
+            model_name='job',
+            name='city',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='jobs', to='JobPortal.city'),
+        ),
+        migrations.CreateModel(
+            name='CityAlias',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=255, unique=True)),
+                ('city', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='aliases', to='JobPortal.city')),
+            ],
+        ),
+    ]
@@ -1,6 +1,7 @@
-from django.db import models
+from django.db import models, transaction
 from django.contrib.auth.models import AbstractUser, BaseUserManager
 from django.core.validators import MinValueValidator
+from django.utils import timezone
 
 
 # Custom user manager
@@ -81,6 +82,10 @@ class Recruiter(models.Model):
     company_name = models.CharField(max_length=255)  # Company name
     website = models.URLField(blank=True, null=True)  # Company website
     logo = models.ImageField(upload_to='company_logos/', blank=True, null=True)  # Company logo
+    notification_mode = models.CharField(max_length=20, choices=[
+        ('immediate', 'Email me for every application'),
+        ('digest', 'Send me a periodic digest'),
+    ], default='immediate')
     created_at = models.DateTimeField(auto_now_add=True)  # Creation date
     updated_at = models.DateTimeField(auto_now=True)  # Update date
 
@@ -91,12 +96,55 @@ class Recruiter(models.Model):
         verbose_name_plural = 'Recruiters'
 
 
+# Normalized places from the gazetteer (see locations.py); Job and Employee
+# point at one when their free-text location resolves
+class City(models.Model):
+    name = models.CharField(max_length=200)
+    region = models.CharField(max_length=200, blank=True)
+    country = models.CharField(max_length=100)
+    latitude = models.FloatField()
+    longitude = models.FloatField()
+    population = models.PositiveIntegerField(default=0)
+
+    def __str__(self):
+        return ', '.join(part for part in (self.name, self.region, self.country) if part)
+
+    class Meta:
+        verbose_name_plural = 'Cities'
+        constraints = [
+            models.UniqueConstraint(fields=['country', 'region', 'name'], name='unique_city_place'),
+        ]
+        indexes = [
+            models.Index(fields=['latitude', 'longitude'], name='city_lat_lon_idx'),  # radius bounding box
+        ]
+
+
+# Normalized spellings of a city's name ("bangalore", "bengaluru karnataka")
+class CityAlias(models.Model):
+    name = models.CharField(max_length=255, unique=True)
+    city = models.ForeignKey(City, on_delete=models.CASCADE, related_name='aliases')
+
+    def __str__(self):
+        return f"{self.name} -> {self.city_id}"
+
+
+class JobQuerySet(models.QuerySet):
+    def active(self):
+        """Jobs open to the public: listings, search and the API go through this."""
+        return self.filter(is_active=True)
+
+    def expired(self, now=None):
+        """Active jobs whose application deadline has passed."""
+        return self.active().filter(application_deadline__lt=now or timezone.now())
+
+
 # Job model representing job postings by companies (posted by recruiters)
 class Job(models.Model):
     title = models.CharField(max_length=255)
     description = models.TextField()
     recruiter = models.ForeignKey(Recruiter, on_delete=models.CASCADE, related_name='jobs')
     location = models.CharField(max_length=255)
+    city = models.ForeignKey(City, on_delete=models.SET_NULL, null=True, blank=True, related_name='jobs')  # from location
     job_type = models.CharField(max_length=50, choices=[
         ('full_time', 'Full Time'),
         ('part_time', 'Part Time'),
@@ -107,6 +155,9 @@ class Job(models.Model):
     posted_date = models.DateTimeField(auto_now_add=True)
     application_deadline = models.DateTimeField(blank=True, null=True)
     is_active = models.BooleanField(default=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    objects = JobQuerySet.as_manager()
 
     def __str__(self):
         return f"{self.title} at {self.recruiter.company_name}"
@@ -114,6 +165,12 @@ class Job(models.Model):
     class Meta:
         ordering = ['-posted_date']
         verbose_name_plural = 'Jobs'
+        indexes = [
+            models.Index(fields=['posted_date'], name='job_posted_idx'),  # job list
+            models.Index(fields=['is_active', 'posted_date'], name='job_active_posted_idx'),  # active listings, API
+            models.Index(fields=['recruiter', 'posted_date'], name='job_recruiter_posted_idx'),  # recruiter's jobs
+            models.Index(fields=['is_active', 'application_deadline'], name='job_active_deadline_idx'),  # expiry sweep
+        ]
 
 
 # Employee model representing additional data for employees
@@ -122,6 +179,7 @@ class Employee(models.Model):
     resume = models.FileField(upload_to='resumes/', blank=True, null=True)
     phone_number = models.CharField(max_length=20)
     location = models.CharField(max_length=255)
+    city = models.ForeignKey(City, on_delete=models.SET_NULL, null=True, blank=True, related_name='employees')  # from location
 
     def __str__(self):
         return self.user.email if self.user and self.user.email else "Unknown Employee"
@@ -144,11 +202,141 @@ class Application(models.Model):
         ('rejected', 'Rejected'),
     ], default='submitted')
     is_active = models.BooleanField(default=True)
+    updated_at = models.DateTimeField(auto_now=True)
 
     def __str__(self):
         return f"{self.employee.user.email} applied for {self.job.title}"
+
+    class Meta:
+        constraints = [
+            # Also the index behind the "already applied" checks
+            models.UniqueConstraint(fields=['employee', 'job'], name='unique_application_per_job'),
+        ]
+        indexes = [
+            models.Index(fields=['job', 'status'], name='application_job_status_idx'),
+            models.Index(fields=['submitted_at'], name='application_submitted_idx'),
+            models.Index(fields=['employee', 'submitted_at'], name='application_employee_sub_idx'),  # employee's list
+        ]
+
     def update_status(self, new_status, user=None):
-        if new_status in dict(Application.status.field.choices):
-            self.status = new_status
-            self.changed_by = user  
-            self.save()
+        """Write only the status columns and append the change to the status history."""
+        from .history import record
+        if new_status in dict(Application.status.field.choices) and new_status != self.status:
+            previous, self.status = self.status, new_status
+            with transaction.atomic():
+                self.save(update_fields=['status', 'updated_at'])
+                record(self.pk, self.job_id, previous, new_status, user)
+
+
+# Append-only log of Application.status changes (see history.py). job is copied
+# from the application so per-job funnels never have to join Application.
+class ApplicationStatusEvent(models.Model):
+    application = models.ForeignKey(Application, on_delete=models.CASCADE, related_name='status_events', db_index=False)
+    job = models.ForeignKey(Job, on_delete=models.CASCADE, related_name='+', db_index=False)
+    from_status = models.CharField(max_length=50, blank=True)  # blank for the submission itself
+    to_status = models.CharField(max_length=50, choices=Application.status.field.choices)
+    actor = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, blank=True, related_name='+')
+    created_at = models.DateTimeField(default=timezone.now)
+
+    def __str__(self):
+        return f"Application {self.application_id}: {self.from_status or '-'} -> {self.to_status}"
+
+    class Meta:
+        # The application and job foreign keys are served by the leading columns here
+        indexes = [
+            models.Index(fields=['application', 'created_at'], name='status_event_app_time_idx'),  # timeline, time in stage
+            models.Index(fields=['job', 'to_status', 'created_at'], name='status_event_job_stage_idx'),  # per-job funnel
+            models.Index(fields=['to_status', 'created_at'], name='status_event_stage_time_idx'),  # site-wide funnel
+        ]
+
+
+# Inverted index over job text used by the job search (see search.py)
+class JobSearchToken(models.Model):
+    FIELD_CHOICES = [
+        ('title', 'Title'),
+        ('company', 'Company'),
+        ('location', 'Location'),
+        ('description', 'Description'),
+    ]
+
+    job = models.ForeignKey(Job, on_delete=models.CASCADE, related_name='search_tokens')
+    field = models.CharField(max_length=20, choices=FIELD_CHOICES)
+    term = models.CharField(max_length=64)
+    weight = models.PositiveIntegerField(default=1)
+
+    def __str__(self):
+        return f"{self.term} ({self.field}) -> job {self.job_id}"
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['term', 'field'], name='jobsearch_term_field_idx'),
+        ]
+
+
+# Precomputed superadmin dashboard counters, refreshed by a periodic task (see stats.py)
+class DashboardStats(models.Model):
+    employees_count = models.PositiveIntegerField(default=0)
+    active_employees_count = models.PositiveIntegerField(default=0)
+    deactivated_employees_count = models.PositiveIntegerField(default=0)
+    recruiters_count = models.PositiveIntegerField(default=0)
+    active_recruiters_count = models.PositiveIntegerField(default=0)
+    deactivated_recruiters_count = models.PositiveIntegerField(default=0)
+    jobs_count = models.PositiveIntegerField(default=0)
+    active_jobs_count = models.PositiveIntegerField(default=0)
+    deactivated_jobs_count = models.PositiveIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"Dashboard stats as of {self.updated_at}"
+
+    class Meta:
+        verbose_name_plural = 'Dashboard stats'
+
+
+# Applications waiting to go out in a recruiter's next digest email (see tasks.send_recruiter_digests)
+class PendingNotification(models.Model):
+    recruiter = models.ForeignKey(Recruiter, on_delete=models.CASCADE, related_name='pending_notifications')
+    application = models.ForeignKey(Application, on_delete=models.CASCADE, related_name='+')
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return f"Application {self.application_id} pending for recruiter {self.recruiter_id}"
+
+
+# Celery task calls waiting to be published, written in the transaction that
+# caused them (see outbox.py)
+class OutboxMessage(models.Model):
+    task = models.CharField(max_length=255)
+    args = models.JSONField(default=list)
+    kwargs = models.JSONField(default=dict)
+    dedup_key = models.CharField(max_length=255, unique=True)  # also the Celery task id
+    created_at = models.DateTimeField(default=timezone.now)
+    sent_at = models.DateTimeField(null=True, blank=True)
+    attempts = models.PositiveIntegerField(default=0)
+    last_error = models.TextField(blank=True)
+
+    def __str__(self):
+        return f"{self.task} [{self.dedup_key}]"
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['sent_at', 'id'], name='outbox_pending_idx'),  # relay, purge
+        ]
+
+
+# Precomputed job suggestions, the top RECOMMENDATION_TOP_K per employee,
+# rewritten by the nightly pipeline (see recommendations.py)
+class JobRecommendation(models.Model):
+    employee = models.ForeignKey(Employee, on_delete=models.CASCADE, related_name='recommendations', db_index=False)
+    job = models.ForeignKey(Job, on_delete=models.CASCADE, related_name='+')
+    rank = models.PositiveSmallIntegerField()
+    score = models.FloatField()
+
+    def __str__(self):
+        return f"#{self.rank} for employee {self.employee_id}: job {self.job_id}"
+
+    class Meta:
+        constraints = [
+            # Also the index the employee dashboard reads through
+            models.UniqueConstraint(fields=['employee', 'rank'], name='unique_recommendation_rank'),
+        ]
@@ -0,0 +1,131 @@
+"""
+Transactional outbox for Celery tasks.
+
+Views call ``enqueue`` instead of ``.delay()``: the task call is stored as an
+OutboxMessage in the view's own transaction, so nothing is sent for a
+rollback and a slow or unreachable broker never holds up a request. ``relay``
+(run by the ``relay_outbox`` command, or the beat task of the same name)
+sends pending messages to the broker in batches and marks them sent.
+
+Delivery is at least once: a relay that dies between publishing and marking
+a batch sends it again on its next run. Each message is published with its
+dedup key as the Celery task id, and tasks based on ``OutboxTask`` skip ids
+that already completed. ``enqueue`` ignores a key it already holds, so a key
+like ``welcome:<user id>`` also keeps a retried request from queuing twice.
+"""
+import datetime
+import logging
+import uuid
+
+from celery import Task, current_app
+from kombu.exceptions import OperationalError
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.utils import timezone
+
+from . import metrics
+from .models import OutboxMessage
+
+
+logger = logging.getLogger(__name__)
+
+metrics.register('outbox.dispatched', 'outbox.failed', 'outbox.pending', 'outbox.lag_seconds')
+
+DONE_KEY_TIMEOUT = 60 * 60 * 24
+
+
+def enqueue(task, *args, dedup_key=None, **kwargs):
+    """Store a call of ``task`` (a task or its name) to be sent after this transaction commits."""
+    OutboxMessage.objects.bulk_create([
+        OutboxMessage(
+            task=task if isinstance(task, str) else task.name,
+            args=list(args),
+            kwargs=kwargs,
+            dedup_key=dedup_key or uuid.uuid4().hex,
+        )
+    ], ignore_conflicts=True)
+
+
+def relay(batch_size=None, max_batches=None):
+    """
+    Publish pending messages oldest first, ``batch_size`` per transaction,
+    until none are left. Stops at the first broker error, leaving that message
+    and the rest for the next run. A message failing for any other reason is
+    retried on later runs until it has failed OUTBOX_MAX_ATTEMPTS times, and
+    then stays unsent for someone to look at. Returns how many were published.
+    """
+    batch_size = batch_size or settings.OUTBOX_BATCH_SIZE
+    published = batches = last_id = 0
+    while max_batches is None or batches < max_batches:
+        batches += 1
+        with transaction.atomic():
+            # Concurrent relays take different rows instead of waiting on each other
+            messages = list(
+                OutboxMessage.objects.filter(sent_at__isnull=True, attempts__lt=settings.OUTBOX_MAX_ATTEMPTS, id__gt=last_id)
+                .order_by('id').select_for_update(skip_locked=True)[:batch_size]
+            )
+            sent, broker_down = _publish(messages)
+            OutboxMessage.objects.filter(pk__in=[message.pk for message in sent]).update(sent_at=timezone.now())
+        published += len(sent)
+        last_id = messages[-1].pk if messages else last_id
+        if broker_down or len(messages) < batch_size:
+            break
+    purge()
+    record_lag()
+    return published
+
+
+def _publish(messages):
+    """The messages the broker accepted, and whether it went away on the way."""
+    sent = []
+    for message in messages:
+        try:
+            current_app.tasks[message.task].apply_async(
+                message.args, message.kwargs, task_id=message.dedup_key, ignore_result=True,
+            )
+        except OperationalError as e:
+            logger.error(f'Broker unavailable, outbox relay paused: {str(e)}')
+            OutboxMessage.objects.filter(pk=message.pk).update(last_error=str(e)[:1000])
+            metrics.incr('outbox.failed')
+            return sent, True
+        except Exception as e:
+            logger.error(f'Outbox message {message.pk} ({message.task}) not sent: {str(e)}')
+            OutboxMessage.objects.filter(pk=message.pk).update(attempts=message.attempts + 1, last_error=str(e)[:1000])
+            metrics.incr('outbox.failed')
+            continue
+        sent.append(message)
+    metrics.incr('outbox.dispatched', len(sent))
+    return sent, False
+
+
+def purge():
+    """Drop sent messages older than OUTBOX_RETENTION seconds, a batch at a time."""
+    cutoff = timezone.now() - datetime.timedelta(seconds=settings.OUTBOX_RETENTION)
+    while True:
+        ids = list(OutboxMessage.objects.filter(sent_at__lt=cutoff).values_list('pk', flat=True)[:settings.OUTBOX_BATCH_SIZE])
+        if not ids:
+            return
+        OutboxMessage.objects.filter(pk__in=ids).delete()
+
+
+def record_lag():
+    """Gauges: pending messages, and seconds the oldest of them has waited."""
+    pending = OutboxMessage.objects.filter(sent_at__isnull=True, attempts__lt=settings.OUTBOX_MAX_ATTEMPTS)
+    oldest = pending.order_by('id').values_list('created_at', flat=True).first()
+    metrics.set_value('outbox.pending', pending.count())
+    metrics.set_value('outbox.lag_seconds', round((timezone.now() - oldest).total_seconds(), 1) if oldest else 0)
+
+
+class OutboxTask(Task):
+    """Base for tasks sent through the outbox: a task id that already completed is skipped."""
+
+    def __call__(self, *args, **kwargs):
+        key = f'outbox:done:{self.request.id}' if self.request.id else None
+        if key and cache.get(key):
+            logger.info(f'{self.name} {self.request.id} already ran; skipping the redelivery')
+            return None
+        result = super().__call__(*args, **kwargs)
+        if key:
+            cache.set(key, True, DONE_KEY_TIMEOUT)
+        return result
@@ -0,0 +1,148 @@
+import base64
+import binascii
+import json
+
+from asgiref.sync import sync_to_async
+from django.core.exceptions import ValidationError
+from django.db import connection
+from django.db.models import Q
+
+
+class CursorPage:
+    """One page of a CursorPaginator. Iterates like django.core.paginator.Page."""
+
+    def __init__(self, object_list, next_cursor=None, previous_cursor=None, approximate_count=None):
+        self.object_list = object_list
+        self.next_cursor = next_cursor
+        self.previous_cursor = previous_cursor
+        self.approximate_count = approximate_count
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def __getitem__(self, index):
+        return self.object_list[index]
+
+    def has_next(self):
+        return self.next_cursor is not None
+
+    def has_previous(self):
+        return self.previous_cursor is not None
+
+    def has_other_pages(self):
+        return self.has_next() or self.has_previous()
+
+
+class CursorPaginator:
+    """
+    Keyset paginator: pages are addressed by opaque cursors holding the ordering
+    values of the row at the page edge, so a page costs one indexed range query
+    with no COUNT(*) and no OFFSET scan, however deep it is.
+
+    ``ordering`` must make rows unique; end it with the primary key.
+    """
+
+    def __init__(self, queryset, per_page, ordering=('-id',), approximate_count=False):
+        self.queryset = queryset
+        self.per_page = per_page
+        self.ordering = [(name.lstrip('-'), name.startswith('-')) for name in ordering]
+        self.fields = [queryset.model._meta.get_field(name) for name, _ in self.ordering]
+        self.approximate_count = approximate_count
+
+    def get_page(self, cursor=None):
+        """Return the page for a cursor; missing or malformed cursors give the first page."""
+        position, backwards = self.decode_cursor(cursor)
+        rows = list(self._page_queryset(position, backwards))
+        approximate = approximate_count(self.queryset.model) if self.approximate_count else None
+        return self._page(rows, position, backwards, approximate)
+
+    async def aget_page(self, cursor=None):
+        """get_page() for async views."""
+        position, backwards = self.decode_cursor(cursor)
+        rows = [row async for row in self._page_queryset(position, backwards)]
+        approximate = await sync_to_async(approximate_count)(self.queryset.model) if self.approximate_count else None
+        return self._page(rows, position, backwards, approximate)
+
+    def _page_queryset(self, position, backwards):
+        ordering = [('-' if descending != backwards else '') + name for name, descending in self.ordering]
+        queryset = self.queryset.order_by(*ordering)
+        if position is not None:
+            queryset = queryset.filter(self._beyond(position, backwards))
+        return queryset[:self.per_page + 1]
+
+    def _page(self, rows, position, backwards, approximate):
+        has_more = len(rows) > self.per_page
+        rows = rows[:self.per_page]
+        if backwards:
+            rows.reverse()
+
+        next_cursor = previous_cursor = None
+        if rows:
+            if has_more or backwards:
+                next_cursor = self.encode_cursor(rows[-1], backwards=False)
+            if (has_more and backwards) or (position is not None and not backwards):
+                previous_cursor = self.encode_cursor(rows[0], backwards=True)
+        return CursorPage(rows, next_cursor, previous_cursor, approximate)
+
+    def _beyond(self, position, backwards):
+        # (a, b) > (x, y) spelled out as a > x OR (a = x AND b > y), which every
+        # backend can match against a composite index on the ordering columns.
+        condition = Q()
+        equal = {}
+        for (name, descending), value in zip(self.ordering, position):
+            lookup = 'lt' if descending != backwards else 'gt'
+            condition |= Q(**equal, **{f'{name}__{lookup}': value})
+            equal[name] = value
+        return condition
+
+    def encode_cursor(self, obj, backwards):
+        position = [getattr(obj, field.attname) for field in self.fields]
+        # default=str keeps full microsecond precision, which DjangoJSONEncoder drops
+        payload = json.dumps({'p': position, 'b': backwards}, default=str, separators=(',', ':'))
+        return base64.urlsafe_b64encode(payload.encode()).decode().rstrip('=')
+
+    def decode_cursor(self, cursor):
+        if not cursor:
+            return None, False
+        try:
+            payload = json.loads(base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4)))
+            position = [field.to_python(value) for field, value in zip(self.fields, payload['p'], strict=True)]
+            return position, bool(payload['b'])
+        except (binascii.Error, ValueError, TypeError, KeyError, ValidationError):
+            return None, False
+
+
+def approximate_count(model):
+    """
+    Table size estimate from the database statistics, or None where the backend
+    keeps none. On MySQL this reads information_schema instead of counting rows.
+    """
+    if connection.vendor != 'mysql':
+        return None
+    with connection.cursor() as cursor:
+        cursor.execute(
+            'SELECT TABLE_ROWS FROM information_schema.TABLES WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = %s',
+            [model._meta.db_table],
+        )
+        row = cursor.fetchone()
+    return row[0] if row else None
+
+
+def iterate_in_chunks(queryset, chunk_size=2000):
+    """
+    Yield every row of a queryset in primary key order, fetching ``chunk_size``
+    rows per query by keyset. Memory stays bounded on every backend, unlike
+    .iterator(), which MySQLdb still buffers client side.
+    """
+    last_pk = None
+    queryset = queryset.order_by('pk')
+    while True:
+        chunk = queryset if last_pk is None else queryset.filter(pk__gt=last_pk)
+        rows = list(chunk[:chunk_size])
+        yield from rows
+        if len(rows) < chunk_size:
+            return
+        last_pk = rows[-1].pk
@@ -0,0 +1,152 @@
+"""
+The signed-in user's Employee or Recruiter row, loaded once per request.
+
+ProfileBackend fetches the user and both profile relations in one joined
+query, and with PROFILE_CACHE_TIMEOUT set keeps that user in the cache across
+requests (dropped again by the signals whenever the user or profile is saved).
+The cached copy leaves out the password hash.
+ProfileMiddleware puts a lazy ``request.profile`` on the request; views that
+need a profile of a given kind use ``get_profile`` / ``profile_or_404``, and
+async views their ``a``-prefixed versions.
+"""
+from functools import partial
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.contrib.auth.backends import ModelBackend
+from django.core.cache import cache
+from django.http import Http404
+from django.utils.functional import SimpleLazyObject
+
+from .models import Employee, Recruiter
+
+
+PROFILE_MODELS = {'employee': Employee, 'recruiter': Recruiter}
+
+
+def _user_key(user_id):
+    return f'auth-user:{user_id}'
+
+
+def forget_user(user_id):
+    if settings.PROFILE_CACHE_TIMEOUT:
+        cache.delete(_user_key(user_id))
+
+
+def _values(obj, exclude=()):
+    return {field.attname: getattr(obj, field.attname) for field in obj._meta.concrete_fields if field.attname not in exclude}
+
+
+def _snapshot(user):
+    """
+    What the cache keeps of a user: field values without the password hash,
+    the session hash derived from it (what AuthenticationMiddleware checks
+    sessions against) and the profile rows.
+    """
+    profiles = {}
+    for name, model in PROFILE_MODELS.items():
+        try:
+            profiles[name] = _values(getattr(user, name))
+        except model.DoesNotExist:
+            profiles[name] = None
+    return {'user': _values(user, exclude={'password'}), 'session_hash': user.get_session_auth_hash(), 'profiles': profiles}
+
+
+def _restore(snapshot):
+    """A user as select_related would have loaded it, with the password deferred."""
+    User = get_user_model()
+    user = User.from_db(None, list(snapshot['user']), list(snapshot['user'].values()))
+    session_hash = snapshot['session_hash']
+    user.get_session_auth_hash = lambda: session_hash
+    for name, model in PROFILE_MODELS.items():
+        values = snapshot['profiles'][name]
+        profile = model.from_db(None, list(values), list(values.values())) if values is not None else None
+        User._meta.get_field(name).set_cached_value(user, profile)
+        if profile is not None:
+            model._meta.get_field('user').set_cached_value(profile, user)
+    return user
+
+
+class ProfileBackend(ModelBackend):
+    """ModelBackend whose get_user() also loads the Employee/Recruiter row."""
+
+    def get_user(self, user_id):
+        timeout = settings.PROFILE_CACHE_TIMEOUT
+        snapshot = cache.get(_user_key(user_id)) if timeout else None
+        if snapshot is not None:
+            user = _restore(snapshot)
+        else:
+            user = (
+                get_user_model()._default_manager.select_related(*PROFILE_MODELS)
+                .filter(pk=user_id).first()
+            )
+            if user is not None and timeout:
+                cache.set(_user_key(user_id), _snapshot(user), timeout)
+        return user if user is not None and self.user_can_authenticate(user) else None
+
+
+def load_profile(user):
+    model = PROFILE_MODELS.get(getattr(user, 'role', None))
+    if model is None or not user.is_authenticated:
+        return None
+    try:
+        # No query when the user came from ProfileBackend
+        return getattr(user, model._meta.model_name)
+    except model.DoesNotExist:
+        return None
+
+
+def get_profile(request, model=None):
+    """request.user's profile, or None if it has none (of ``model``, when given)."""
+    if not hasattr(request, '_cached_profile'):
+        request._cached_profile = load_profile(request.user)
+    profile = request._cached_profile
+    return profile if model is None or isinstance(profile, model) else None
+
+
+def profile_or_404(request, model):
+    profile = get_profile(request, model)
+    if profile is None:
+        raise Http404(f'No {model._meta.verbose_name} profile.')
+    return profile
+
+
+async def aget_user(request):
+    """
+    request.auser(), also stored as request.user: templates and context
+    processors read request.user, which would otherwise run a sync query.
+    """
+    request.user = user = await request.auser()
+    return user
+
+
+async def aget_profile(request, model=None):
+    if not hasattr(request, '_cached_profile'):
+        user = await aget_user(request)
+        request._cached_profile = await sync_to_async(load_profile)(user)
+    return get_profile(request, model)
+
+
+async def aprofile_or_404(request, model):
+    profile = await aget_profile(request, model)
+    if profile is None:
+        raise Http404(f'No {model._meta.verbose_name} profile.')
+    return profile
+
+
+class ProfileMiddleware:
+    """Adds ``request.profile`` and ``request.aprofile()``; goes after AuthenticationMiddleware."""
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        request.profile = SimpleLazyObject(lambda: get_profile(request))
+        request.aprofile = partial(aget_profile, request)
+        # Under ASGI this hands back the coroutine for the handler to await
+        return self.get_response(request)
@@ -0,0 +1,215 @@
+import logging
+import os
+import re
+import sys
+import time
+from collections import defaultdict
+
+from django.conf import settings
+from django.db import connections
+from django.test import Client
+
+
+logger = logging.getLogger(__name__)
+
+# "IN (%s, %s, %s)" and "IN (%s)" are the same query as far as N+1 goes
+IN_LIST_RE = re.compile(r'IN \((?:%s, )*%s\)')
+DJANGO_DIR = os.path.dirname(sys.modules['django'].__file__)
+DJANGO_DB_DIR = os.path.join(DJANGO_DIR, 'db')
+PROJECT_DIR = str(settings.BASE_DIR)
+IGNORED_FILES = {__file__, os.path.join(PROJECT_DIR, 'manage.py')}
+
+
+def fingerprint(sql):
+    """Normalize parameterized SQL so repeats of one query compare equal."""
+    return IN_LIST_RE.sub('IN (...)', sql)
+
+
+def query_location():
+    """
+    Describe what triggered the query being executed: the template tag for
+    queries issued while rendering (e.g. a lazy FK in {{ job.recruiter.name }}),
+    otherwise the innermost project source line, otherwise the innermost
+    framework line outside the ORM (e.g. the session or auth middleware).
+    """
+    fallback = None
+    frame = sys._getframe(2)
+    while frame is not None:
+        code = frame.f_code
+        filename = code.co_filename
+        if code.co_name == 'render_annotated' and filename.startswith(DJANGO_DIR):
+            node = frame.f_locals.get('self')
+            origin, token = getattr(node, 'origin', None), getattr(node, 'token', None)
+            if origin is not None and token is not None:
+                return f'{origin.template_name or origin.name}:{token.lineno}'
+        elif filename.startswith(PROJECT_DIR) and filename not in IGNORED_FILES and 'site-packages' not in filename:
+            return f'{os.path.relpath(filename, PROJECT_DIR)}:{frame.f_lineno} in {code.co_name}'
+        elif fallback is None and not filename.startswith(DJANGO_DB_DIR) and filename != __file__:
+            fallback = f'{os.path.relpath(filename, os.path.dirname(DJANGO_DIR))}:{frame.f_lineno} in {code.co_name}'
+        frame = frame.f_back
+    return fallback or 'unknown'
+
+
+class QueryRecorder:
+    """
+    Records every query run on the given connections while active, with its
+    duration and the location that triggered it.
+
+        with QueryRecorder() as recorder:
+            ...
+        print(recorder.report())
+    """
+
+    def __init__(self, using=None):
+        self.aliases = [using] if using else list(connections)
+        self.queries = []
+        self._wrappers = []
+
+    def __enter__(self):
+        for alias in self.aliases:
+            wrapper = connections[alias].execute_wrapper(self)
+            wrapper.__enter__()
+            self._wrappers.append(wrapper)
+        return self
+
+    def __exit__(self, *exc_info):
+        while self._wrappers:
+            self._wrappers.pop().__exit__(*exc_info)
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.queries.append({
+                'sql': sql,
+                'params': params,
+                'alias': context['connection'].alias,
+                'duration': time.perf_counter() - start,
+                'location': query_location(),
+            })
+
+    @property
+    def count(self):
+        return len(self.queries)
+
+    @property
+    def total_time(self):
+        return sum(query['duration'] for query in self.queries)
+
+    def duplicates(self):
+        """Queries run more than once, as {fingerprint: [locations]}."""
+        seen = defaultdict(list)
+        for query in self.queries:
+            seen[fingerprint(query['sql'])].append(query['location'])
+        return {sql: locations for sql, locations in seen.items() if len(locations) > 1}
+
+    def report(self, label='request', verbose=False):
+        """Summary with each repeated query and where it came from; ``verbose`` lists every query."""
+        lines = [f'{label}: {self.count} queries in {self.total_time * 1000:.1f}ms']
+        for sql, locations in sorted(self.duplicates().items(), key=lambda item: -len(item[1])):
+            lines.append(f'  {len(locations)}x {sql[:200]}')
+            for location in sorted(set(locations)):
+                lines.append(f'      from {location} ({locations.count(location)}x)')
+        if verbose:
+            lines.append('  all queries:')
+            for query in self.queries:
+                lines.append(f"    {query['duration'] * 1000:6.1f}ms {query['location']}: {query['sql'][:120]}")
+        return '\n'.join(lines)
+
+
+def plan_problems(sql, params=None, using='default'):
+    """
+    Ask the database how it runs a SELECT and list what an index should have
+    avoided: full table scans and sorts done outside an index. Backends other
+    than SQLite and MySQL report nothing.
+    """
+    connection = connections[using]
+    problems = []
+    with connection.cursor() as cursor:
+        if connection.vendor == 'sqlite':
+            cursor.execute('EXPLAIN QUERY PLAN ' + sql, params)
+            for *_, detail in cursor.fetchall():
+                if detail.startswith('SCAN ') and ' USING ' not in detail and detail != 'SCAN CONSTANT ROW':
+                    problems.append(f'full scan: {detail}')
+                elif detail.startswith('USE TEMP B-TREE FOR') and 'ORDER BY' in detail:
+                    problems.append(f'sort: {detail}')
+        elif connection.vendor == 'mysql':
+            cursor.execute('EXPLAIN ' + sql, params)
+            columns = [column[0] for column in cursor.description]
+            for row in cursor.fetchall():
+                row = dict(zip(columns, row))
+                if row['type'] == 'ALL':
+                    problems.append(f"full scan: {row['table']}")
+                if 'Using filesort' in (row['Extra'] or ''):
+                    problems.append(f"sort: {row['table']}")
+    return problems
+
+
+def assert_queries_use_indexes(recorder, allow=()):
+    """
+    Fail when a SELECT recorded by a QueryRecorder is planned as a full scan or
+    an unindexed sort. ``allow`` lists substrings of problems to tolerate.
+    """
+    failures = []
+    for query in recorder.queries:
+        if not query['sql'].lstrip().upper().startswith('SELECT'):
+            continue
+        problems = [
+            problem for problem in plan_problems(query['sql'], query['params'], query['alias'])
+            if not any(allowed in problem for allowed in allow)
+        ]
+        if problems:
+            failures.append(f"  {query['location']}: {'; '.join(problems)}\n    {query['sql'][:300]}")
+    if failures:
+        raise AssertionError('queries not served by an index:\n' + '\n'.join(failures))
+
+
+def query_budget(url_name):
+    """The query budget declared for a URL name in settings.QUERY_BUDGETS, if any."""
+    return getattr(settings, 'QUERY_BUDGETS', {}).get(url_name)
+
+
+class QueryBudgetMiddleware:
+    """
+    Reports SQL activity per request: X-Query-Count and X-DB-Time response
+    headers, and a logged warning with duplicate-query locations when a view
+    exceeds its QUERY_BUDGETS entry or repeats a query.
+    Keep it first in MIDDLEWARE so session and auth queries are included.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        with QueryRecorder() as recorder:
+            response = self.get_response(request)
+
+        response['X-Query-Count'] = str(recorder.count)
+        response['X-DB-Time'] = f'{recorder.total_time * 1000:.1f}ms'
+
+        url_name = getattr(request.resolver_match, 'url_name', None)
+        budget = query_budget(url_name)
+        if (budget is not None and recorder.count > budget) or recorder.duplicates():
+            logger.warning(recorder.report(f'{request.method} {request.path} ({url_name}, budget {budget})'))
+        return response
+
+
+class QueryBudgetClient(Client):
+    """
+    Test client that fails the request when the view it resolved to runs more
+    queries than its QUERY_BUDGETS entry. Use it as a TestCase client_class.
+    """
+
+    def request(self, **request):
+        with QueryRecorder() as recorder:
+            response = super().request(**request)
+
+        url_name = response.resolver_match.url_name if response.resolver_match else None
+        budget = query_budget(url_name)
+        if budget is not None and recorder.count > budget:
+            raise AssertionError(
+                f'{url_name} went over its query budget of {budget}\n'
+                + recorder.report(f"{request['REQUEST_METHOD']} {request['PATH_INFO']}", verbose=True)
+            )
+        return response
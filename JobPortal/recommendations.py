@@ -0,0 +1,213 @@
+"""
+Nightly top-K job recommendations for every employee.
+
+Each active job gets a score per employee from three signals:
+
+- text: cosine similarity between the job's TF-IDF vector and the employee's
+  profile, the sum of the vectors of the jobs they applied to (applications
+  that got further weigh more). Term counts come from the search index, so
+  title hits already count more than description hits.
+- location: ``exp(-distance / DISTANCE_SCALE_KM)`` between the employee's and
+  the job's gazetteer cities, 0 when either is unknown.
+- popularity: log-scaled application count, which is all that ranks jobs for
+  an employee with no applications and no city.
+
+Everything is matrix algebra. Job vectors are one scipy.sparse matrix, and
+employees are scored a block at a time as a dense float32 (employees x active
+jobs) array, so no Python loop runs per pair; RECOMMENDATION_BLOCK_SIZE caps
+the cells per block and with it the memory. Each block's results replace the
+employees' previous rows in one transaction.
+"""
+import time
+from array import array
+
+import numpy as np
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import Count
+from scipy import sparse
+
+from . import metrics
+from .locations import haversine_km
+from .models import Application, City, Employee, Job, JobRecommendation, JobSearchToken
+
+
+metrics.register(
+    'recommendations.last_seconds', 'recommendations.last_employees',
+    'recommendations.last_jobs', 'recommendations.last_rows',
+)
+
+WEIGHTS = {'text': 0.7, 'location': 0.2, 'popularity': 0.1}
+STATUS_WEIGHTS = {'submitted': 1.0, 'under_review': 1.0, 'interview': 2.0, 'offered': 2.0, 'rejected': 0.5}
+DISTANCE_SCALE_KM = 100
+TOKEN_CHUNK = 5000
+
+
+def _normalize_rows(matrix):
+    """Rows scaled to unit length; all-zero rows stay zero."""
+    norms = np.sqrt(np.asarray(matrix.multiply(matrix).sum(axis=1)).ravel())
+    norms[norms == 0] = 1
+    return sparse.diags((1 / norms).astype(matrix.dtype)) @ matrix
+
+
+def _positions(ids, values, order=None):
+    """Index in ``ids`` (unique, any order) of each of ``values``; -1 for values not in it."""
+    values = np.asarray(values, dtype=np.int64)
+    if not len(ids):
+        return np.full(len(values), -1)
+    order = np.argsort(ids) if order is None else order
+    found = order[np.minimum(np.searchsorted(ids, values, sorter=order), len(ids) - 1)]
+    return np.where(ids[found] == values, found, -1)
+
+
+def job_vectors(job_ids):
+    """L2-normalized TF-IDF vectors (float32 CSR, one row per id in ``job_ids``) from the search index."""
+    # Typed arrays rather than lists: a token costs bytes, not boxed objects
+    rows, columns, weights = array('q'), array('q'), array('f')
+    vocabulary = {}
+    for start in range(0, len(job_ids), TOKEN_CHUNK):
+        chunk = job_ids[start:start + TOKEN_CHUNK].tolist()
+        for job_id, term, weight in JobSearchToken.objects.filter(job_id__in=chunk).values_list('job_id', 'term', 'weight'):
+            rows.append(job_id)
+            columns.append(vocabulary.setdefault(term, len(vocabulary)))
+            weights.append(weight)
+    if not rows:
+        return sparse.csr_matrix((len(job_ids), 0), dtype=np.float32)
+
+    # One entry per (job, field, term); building the matrix sums a term's fields
+    tf = sparse.csr_matrix(
+        (np.log1p(np.frombuffer(weights, dtype=np.float32)), (_positions(job_ids, rows), np.frombuffer(columns, dtype=np.int64))),
+        shape=(len(job_ids), len(vocabulary)), dtype=np.float32,
+    )
+    tf.sum_duplicates()
+    df = np.bincount(tf.indices, minlength=len(vocabulary))
+    idf = (np.log((1 + len(job_ids)) / (1 + df)) + 1).astype(np.float32)
+    return _normalize_rows((tf @ sparse.diags(idf)).tocsr())
+
+
+def _cities(city_ids, coordinates):
+    """
+    (index of each row's city among the distinct cities, latitudes and
+    longitudes of the distinct cities); NaN coordinates for unknown cities.
+    """
+    city_ids = np.array([city_id or 0 for city_id in city_ids], dtype=np.int64)
+    unique, index = np.unique(city_ids, return_inverse=True)
+    points = np.array([coordinates.get(city_id, (np.nan, np.nan)) for city_id in unique.tolist()], dtype=np.float64)
+    return index.reshape(-1), points[:, 0], points[:, 1]
+
+
+class Scorer:
+    """The job side of the model, loaded once per run; ``top`` scores a block of employees against it."""
+
+    def __init__(self):
+        # Candidates are the active jobs. Jobs applied to that have closed
+        # since still shape profiles, so they get vectors too, after them.
+        active = list(Job.objects.active().order_by('pk').values_list('pk', 'city_id'))
+        self.candidate_ids = np.array([pk for pk, _ in active], dtype=np.int64)
+        closed = set(Application.objects.order_by().values_list('job_id', flat=True).distinct()) - set(self.candidate_ids.tolist())
+        self.job_ids = np.concatenate([self.candidate_ids, np.array(sorted(closed), dtype=np.int64)])
+        self.job_order = np.argsort(self.job_ids)
+
+        self.vectors = job_vectors(self.job_ids)
+        self.candidate_vectors = self.vectors[:len(self.candidate_ids)]
+        # Distances are computed between distinct cities, then spread over the jobs
+        self.coordinates = {pk: (lat, lon) for pk, lat, lon in City.objects.values_list('pk', 'latitude', 'longitude')}
+        self.job_city, self.city_lat, self.city_lon = _cities([city_id for _, city_id in active], self.coordinates)
+
+        counts = dict(
+            Application.objects.filter(job__is_active=True).order_by().values('job_id')
+            .annotate(n=Count('pk')).values_list('job_id', 'n')
+        )
+        self.popularity = np.log1p(np.array([counts.get(pk, 0) for pk in self.candidate_ids.tolist()], dtype=np.float32))
+        if self.popularity.size and self.popularity.max() > 0:
+            self.popularity /= self.popularity.max()
+
+    @property
+    def width(self):
+        """Cells per employee in a block: the score row or the dense profile, whichever is wider."""
+        return max(1, len(self.candidate_ids), self.vectors.shape[1])
+
+    def top(self, employees, top_k):
+        """(employee id, job id, rank, score) rows for a block of (employee id, city id) pairs."""
+        n_candidates = len(self.candidate_ids)
+        if not n_candidates:
+            return []
+        employee_ids = np.array([pk for pk, _ in employees], dtype=np.int64)
+        applications = list(
+            Application.objects.filter(employee_id__in=employee_ids.tolist()).values_list('employee_id', 'job_id', 'status')
+        )
+        applied = sparse.csr_matrix((len(employees), len(self.job_ids)), dtype=np.float32)
+        if applications:
+            employee_col, job_col, statuses = zip(*applications)
+            weights = np.array([STATUS_WEIGHTS.get(status, 1.0) for status in statuses], dtype=np.float32)
+            rows, columns = _positions(employee_ids, employee_col), _positions(self.job_ids, job_col, self.job_order)
+            known = columns >= 0  # skips jobs posted and applied to after the run started
+            applied = sparse.csr_matrix(
+                (weights[known], (rows[known], columns[known])), shape=(len(employees), len(self.job_ids)),
+            )
+
+        # Cosine of unit-length vectors. Profiles are dense per block, so this
+        # is a sparse x dense product with a dense result, not sparse x sparse.
+        profiles = _normalize_rows(applied @ self.vectors).toarray()
+        scores = (self.candidate_vectors @ profiles.T).T
+        scores *= WEIGHTS['text']
+
+        employee_city, employee_lat, employee_lon = _cities([city_id for _, city_id in employees], self.coordinates)
+        distance = haversine_km(employee_lat[:, None], employee_lon[:, None], self.city_lat[None, :], self.city_lon[None, :])
+        affinity = np.nan_to_num(np.exp(-distance / DISTANCE_SCALE_KM), nan=0.0).astype(np.float32)
+        scores += WEIGHTS['location'] * affinity[employee_city[:, None], self.job_city[None, :]]
+        scores += WEIGHTS['popularity'] * self.popularity[None, :]
+
+        # Never suggest a job the employee already applied to
+        already = applied[:, :n_candidates].tocoo()
+        scores[already.row, already.col] = -np.inf
+
+        k = min(top_k, n_candidates)
+        top = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+        top_scores = np.take_along_axis(scores, top, axis=1)
+        order = np.argsort(-top_scores, axis=1, kind='stable')
+        top, top_scores = np.take_along_axis(top, order, axis=1), np.take_along_axis(top_scores, order, axis=1)
+
+        # Scores are sorted, so the positive ones are a prefix of each row
+        keep = top_scores > 0
+        ranks = np.broadcast_to(np.arange(1, k + 1), top.shape)
+        return list(zip(
+            np.broadcast_to(employee_ids[:, None], top.shape)[keep].tolist(),
+            self.candidate_ids[top[keep]].tolist(),
+            ranks[keep].tolist(),
+            top_scores[keep].astype(np.float64).tolist(),
+        ))
+
+
+def _insert(rows):
+    # Plain tuples through executemany; model instances would cost more than the scoring
+    table = connection.ops.quote_name(JobRecommendation._meta.db_table)
+    columns = ', '.join(connection.ops.quote_name(column) for column in ('employee_id', 'job_id', 'rank', 'score'))
+    with connection.cursor() as cursor:
+        cursor.executemany(f'INSERT INTO {table} ({columns}) VALUES (%s, %s, %s, %s)', rows)
+
+
+def compute_recommendations(top_k=None, block_size=None):
+    """Rewrite every employee's recommendations. Returns the number of rows written."""
+    top_k = top_k or settings.RECOMMENDATION_TOP_K
+    block_size = block_size or settings.RECOMMENDATION_BLOCK_SIZE
+    start = time.perf_counter()
+
+    scorer = Scorer()
+    employees = list(Employee.objects.order_by('pk').values_list('pk', 'city_id'))
+    per_block = max(1, block_size // scorer.width)
+    written = 0
+    for offset in range(0, len(employees), per_block):
+        block = employees[offset:offset + per_block]
+        rows = scorer.top(block, top_k)
+        with transaction.atomic():
+            JobRecommendation.objects.filter(employee_id__in=[pk for pk, _ in block]).delete()
+            if rows:
+                _insert(rows)
+        written += len(rows)
+
+    metrics.set_value('recommendations.last_seconds', round(time.perf_counter() - start, 3))
+    metrics.set_value('recommendations.last_employees', len(employees))
+    metrics.set_value('recommendations.last_jobs', len(scorer.candidate_ids))
+    metrics.set_value('recommendations.last_rows', written)
+    return written
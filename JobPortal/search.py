@@ -0,0 +1,163 @@
+import re
+from collections import Counter
+from functools import reduce
+from operator import or_
+
+from django.db import transaction
+from django.db.models import Case, F, IntegerField, Lookup, Max, Q, Sum, When
+from django.db.models.lookups import Exact
+
+from .models import Job, JobSearchToken
+
+
+# Letters and digits only, so terms never contain LIKE/GLOB wildcards
+TOKEN_RE = re.compile(r'[^\W_]+')
+MAX_TERM_LENGTH = JobSearchToken._meta.get_field('term').max_length
+
+# Words that match almost every posting and only bloat the index. Other single
+# letters stay: "C", "R" and the "C" of "C++" are real search terms.
+STOP_WORDS = frozenset({
+    'a', 'i', 's', 't', 'an', 'and', 'are', 'as', 'at', 'be', 'by', 'for', 'from', 'in', 'is', 'it',
+    'of', 'on', 'or', 'that', 'the', 'this', 'to', 'we', 'will', 'with', 'you', 'your',
+})
+
+# A hit in the title is worth more than a hit somewhere in the description
+FIELD_WEIGHTS = {
+    'title': 8,
+    'company': 4,
+    'location': 4,
+    'description': 1,
+}
+
+# What a search argument is matched against when it has no index terms
+TEXT_LOOKUPS = {
+    None: ('title', 'recruiter__company_name', 'location', 'description'),
+    'title': ('title',),
+    'company': ('recruiter__company_name',),
+    'location': ('location',),
+}
+
+
+class TermPrefix(Lookup):
+    """
+    Prefix match on an index term that can be served from the term index.
+
+    MySQL uses the index for ``LIKE 'abc%'``; SQLite only does so for GLOB on a
+    column with the default binary collation. Terms are already lowercase.
+    """
+    lookup_name = 'prefix'
+
+    def as_sql(self, compiler, connection, operator='LIKE', wildcard='%'):
+        lhs, lhs_params = self.process_lhs(compiler, connection)
+        rhs, rhs_params = self.process_rhs(compiler, connection)
+        rhs_params = [f'{param}{wildcard}' for param in rhs_params]
+        return f'{lhs} {operator} {rhs}', lhs_params + rhs_params
+
+    def as_sqlite(self, compiler, connection):
+        return self.as_sql(compiler, connection, operator='GLOB', wildcard='*')
+
+
+JobSearchToken._meta.get_field('term').register_lookup(TermPrefix)
+
+
+def tokenize(text):
+    """Split text into lowercase index terms."""
+    return [
+        term[:MAX_TERM_LENGTH]
+        for term in TOKEN_RE.findall((text or '').lower())
+        if term not in STOP_WORDS
+    ]
+
+
+def term_match(term):
+    """
+    Lookup name for a search term. A single letter would prefix-match a
+    good part of the vocabulary, so it has to match a whole term.
+    """
+    return 'prefix' if len(term) > 1 else 'exact'
+
+
+def job_tokens(job):
+    """Build the (unsaved) index rows for a job. Expects job.recruiter to be loaded."""
+    texts = {
+        'title': job.title,
+        'company': job.recruiter.company_name,
+        'location': job.location,
+        'description': job.description,
+    }
+    counts = Counter((field, term) for field, text in texts.items() for term in tokenize(text))
+    return [
+        JobSearchToken(job_id=job.pk, field=field, term=term, weight=FIELD_WEIGHTS[field] * count)
+        for (field, term), count in counts.items()
+    ]
+
+
+def index_jobs(jobs):
+    """Replace the index rows of the given jobs."""
+    jobs = list(jobs)
+    if not jobs:
+        return
+    tokens = [token for job in jobs for token in job_tokens(job)]
+    with transaction.atomic():
+        JobSearchToken.objects.filter(job_id__in=[job.pk for job in jobs]).delete()
+        JobSearchToken.objects.bulk_create(tokens, batch_size=1000)
+
+
+def rebuild_index(batch_size=500):
+    """Re-index every job in primary key order. Returns the number of jobs indexed."""
+    indexed = 0
+    last_id = 0
+    queryset = Job.objects.select_related('recruiter').order_by('pk')
+    while True:
+        batch = list(queryset.filter(pk__gt=last_id)[:batch_size])
+        if not batch:
+            return indexed
+        index_jobs(batch)
+        indexed += len(batch)
+        last_id = batch[-1].pk
+
+
+def search_jobs(queryset, text='', title='', company='', location=''):
+    """
+    Restrict a Job queryset to postings matching every search term and rank them.
+
+    ``text`` is matched against all indexed fields, the other arguments only against
+    their own field. Each term is a prefix match, so "dev" finds "developer". Matching
+    jobs are annotated with ``search_score`` and ordered by it.
+
+    An argument made only of stop words or punctuation ("IT", "++") has no index
+    terms; it is matched as a substring of its fields instead.
+    """
+    clauses = []
+    for field, value in ((None, text), ('title', title), ('company', company), ('location', location)):
+        terms = tokenize(value)
+        clauses += [(field, term) for term in terms]
+        if not terms and (value or '').strip():
+            queryset = queryset.filter(reduce(or_, (
+                Q(**{f'{lookup}__icontains': value.strip()}) for lookup in TEXT_LOOKUPS[field]
+            )))
+    if not clauses:
+        return queryset
+
+    # One row per matching token is joined in; a job qualifies when every clause
+    # matched at least one of its tokens. The per-clause flags are built from
+    # expressions rather than Q(field__lookup) so the join stays INNER and the
+    # database can start from the term index.
+    matches_any = reduce(or_, (
+        Q(**{f'search_tokens__term__{term_match(term)}': term}, **({'search_tokens__field': field} if field else {}))
+        for field, term in clauses
+    ))
+    matched = {}
+    for i, (field, term) in enumerate(clauses):
+        lookup = TermPrefix if term_match(term) == 'prefix' else Exact
+        condition = Q(lookup(F('search_tokens__term'), term))
+        if field:
+            condition &= Q(Exact(F('search_tokens__field'), field))
+        matched[f'_match_{i}'] = Max(Case(When(condition, then=1), default=0, output_field=IntegerField()))
+
+    return (
+        queryset.filter(matches_any)
+        .annotate(search_score=Sum('search_tokens__weight'), **matched)
+        .filter(**{name: 1 for name in matched})
+        .order_by('-search_score', '-posted_date')
+    )
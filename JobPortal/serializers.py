@@ -26,12 +26,39 @@ class UserRegisterSerializer(serializers.ModelSerializer):
         user.save()
         return user
 
-class JobSerializer(serializers.ModelSerializer):
+class DynamicFieldsMixin:
+    """
+    Lets clients pick the fields they need with ?fields=id,title. Unknown
+    names are ignored; without the parameter every field is returned.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        requested = requested_fields(self.context.get('request'))
+        if requested:
+            for name in set(self.fields) - requested:
+                self.fields.pop(name)
+
+
+def requested_fields(request):
+    """Field names asked for in ?fields=, or None for all of them."""
+    value = request.query_params.get('fields') if request is not None else None
+    if not value:
+        return None
+    return {name.strip() for name in value.split(',') if name.strip()}
+
+
+class JobSerializer(DynamicFieldsMixin, serializers.ModelSerializer):
+    company_name = serializers.CharField(source='recruiter.company_name', read_only=True)
+
     class Meta:
         model = Job
         fields = '__all__'
 
-class ApplicationSerializer(serializers.ModelSerializer):
+class ApplicationSerializer(DynamicFieldsMixin, serializers.ModelSerializer):
+    job_title = serializers.CharField(source='job.title', read_only=True)
+    company_name = serializers.CharField(source='job.recruiter.company_name', read_only=True)
+
     class Meta:
         model = Application
         fields = '__all__'
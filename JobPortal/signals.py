@@ -0,0 +1,71 @@
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from .cache import bump_version
+from .locations import resolve
+from .models import Employee, Job, Recruiter, User
+from .profiles import forget_user
+from .search import index_jobs
+
+
+# Keep the search index in step with the jobs it covers. Deletes need no handler,
+# the index rows cascade with the job.
+@receiver(post_save, sender=Job)
+def reindex_job(sender, instance, raw=False, **kwargs):
+    if not raw:
+        index_jobs([instance])
+
+
+# The company name is indexed on every job of the recruiter, so a rename
+# reindexes them all; other profile saves leave the index alone.
+@receiver(pre_save, sender=Recruiter)
+def note_company_rename(sender, instance, raw=False, update_fields=None, **kwargs):
+    instance._company_renamed = (
+        not raw and instance.pk is not None
+        and (update_fields is None or 'company_name' in update_fields)
+        and Recruiter.objects.filter(pk=instance.pk).exclude(company_name=instance.company_name).exists()
+    )
+
+
+@receiver(post_save, sender=Recruiter)
+def reindex_recruiter_jobs(sender, instance, created=False, raw=False, **kwargs):
+    if getattr(instance, '_company_renamed', False):
+        instance._company_renamed = False
+        index_jobs(instance.jobs.select_related('recruiter'))
+
+
+# Free-text locations point at their gazetteer city. Saves limited to other
+# fields leave the link alone.
+@receiver(pre_save, sender=Job)
+@receiver(pre_save, sender=Employee)
+def link_city(sender, instance, raw=False, update_fields=None, **kwargs):
+    if not raw and update_fields is None:
+        instance.city_id = resolve(instance.location)
+
+
+# Cached fragments are keyed by object version; bumping it invalidates them all
+@receiver(post_save, sender=Job)
+@receiver(post_delete, sender=Job)
+def invalidate_job(sender, instance, **kwargs):
+    bump_version('job', instance.pk)
+
+
+@receiver(post_save, sender=Recruiter)
+@receiver(post_delete, sender=Recruiter)
+def invalidate_recruiter(sender, instance, **kwargs):
+    bump_version('recruiter', instance.pk)
+
+
+# Signed-in users are cached together with their profile
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def forget_cached_user(sender, instance, **kwargs):
+    forget_user(instance.pk)
+
+
+@receiver(post_save, sender=Employee)
+@receiver(post_delete, sender=Employee)
+@receiver(post_save, sender=Recruiter)
+@receiver(post_delete, sender=Recruiter)
+def forget_cached_profile_user(sender, instance, **kwargs):
+    forget_user(instance.user_id)
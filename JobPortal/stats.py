@@ -0,0 +1,58 @@
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Count, Q
+
+from .models import DashboardStats, Employee, Job, Recruiter
+
+
+STATS_CACHE_KEY = 'dashboard:stats'
+STAT_FIELDS = [
+    field.name for field in DashboardStats._meta.get_fields()
+    if field.name.endswith('_count')
+]
+
+
+def compute_dashboard_stats():
+    """All superadmin dashboard counters, one conditional aggregate per model."""
+    stats = {}
+    for model, prefix, active in (
+        (Employee, 'employees', Q(user__is_active=True)),
+        (Recruiter, 'recruiters', Q(user__is_active=True)),
+        (Job, 'jobs', Q(is_active=True)),
+    ):
+        counts = model.objects.aggregate(
+            total=Count('pk'),
+            active=Count('pk', filter=active),
+            deactivated=Count('pk', filter=~active),
+        )
+        stats[f'{prefix}_count'] = counts['total']
+        stats[f'active_{prefix}_count'] = counts['active']
+        stats[f'deactivated_{prefix}_count'] = counts['deactivated']
+    return stats
+
+
+def refresh_dashboard_stats():
+    """Recompute the counters into the DashboardStats row and the cache."""
+    stats = compute_dashboard_stats()
+    DashboardStats.objects.update_or_create(pk=1, defaults=stats)
+    cache.set(STATS_CACHE_KEY, stats, settings.DASHBOARD_STATS_TTL)
+    return stats
+
+
+def get_dashboard_stats():
+    """
+    Dashboard counters according to settings.DASHBOARD_STATS_MODE:
+
+    'cache' - live aggregates, cached for DASHBOARD_STATS_TTL seconds
+    'table' - the DashboardStats row kept current by the refresh_dashboard_stats
+              task, so a page load costs one primary key lookup at any data size
+    """
+    if settings.DASHBOARD_STATS_MODE == 'table':
+        stats = DashboardStats.objects.filter(pk=1).values(*STAT_FIELDS).first()
+        return stats if stats is not None else refresh_dashboard_stats()
+
+    stats = cache.get(STATS_CACHE_KEY)
+    if stats is None:
+        stats = compute_dashboard_stats()
+        cache.set(STATS_CACHE_KEY, stats, settings.DASHBOARD_STATS_TTL)
+    return stats
@@ -1,148 +1,204 @@
+import itertools
+from collections import defaultdict
 from django.core.mail import EmailMultiAlternatives
-from django.urls import reverse
 from django.conf import settings
 from celery import shared_task
 import logging
+from . import emails, expiry, mailer, outbox, recommendations, stats as dashboard_stats
+from .models import Application, PendingNotification
 
 logger = logging.getLogger(__name__)
 
-@shared_task
-def send_welcome_email(user_email, user_name, user_role):
-    subject = 'Welcome to Our Platform'
-    text_message = f'Hi {user_name}, thank you for signing up as a {user_role}! We are excited to have you on board.'
-    
-    # HTML version of the email
-    html_message = f"""
-    <html>
-    <body style="font-family: Arial, sans-serif; color: #333;">
-        <h2>Welcome, {user_name}!</h2>
-        <p>Thank you for signing up as a <strong>{user_role}</strong>. We are excited to have you on board!</p>
-        <p>Feel free to explore our platform.</p>
-        <p>Best Regards,<br>Your Job Portal Team</p>
-    </body>
-    </html>
-    """
+STATUS_LABELS = dict(Application.status.field.choices)
 
-    try:
-        email = EmailMultiAlternatives(
-            subject=subject,
-            body=text_message,  # Plain text message
-            from_email=settings.EMAIL_HOST_USER,
-            to=[user_email]
-        )
-        
-        # Attach the HTML content
-        email.attach_alternative(html_message, "text/html")
-        email.send()
 
+@shared_task(base=outbox.OutboxTask)
+def send_welcome_email(user_email, user_name, user_role):
+    try:
+        mailer.send_messages([emails.build('welcome', user_email, {'name': user_name, 'role': user_role})])
         logger.info(f'Welcome email sent successfully to {user_email}')
     except Exception as e:
         logger.error(f'Failed to send welcome email to {user_email}: {str(e)}')
 
 
+@shared_task(base=outbox.OutboxTask)
+def send_application_notification(recruiter_email, job_title, applicant_name, job_id):
+    values = {'applicant_name': applicant_name, 'job_title': job_title, 'job_link': emails.link('job_detail', job_id)}
+    try:
+        mailer.send_messages([emails.build('application_received', recruiter_email, values)])
+        logger.info(f'Email sent successfully to {recruiter_email}')
+    except Exception as e:
+        logger.error(f'Failed to send email to {recruiter_email}: {str(e)}')
 
 
-logger = logging.getLogger(__name__)
+def status_update_values(application_status, job_title, application_id):
+    return {
+        'status': STATUS_LABELS.get(application_status, application_status),
+        'job_title': job_title,
+        'application_link': emails.link('application_detail', application_id),
+    }
 
-@shared_task
-def send_application_notification(recruiter_email, job_title, applicant_name, job_id):
-    # Subject of the email
-    subject = f'New Application for {job_title}'
-    
-    # Create the link to the job post (assuming you have a job detail view)
-    job_link = f"{settings.SITE_URL}{reverse('job_detail', args=[job_id])}"
-
-    # Plain text version of the email (in case the HTML email cannot be rendered)
-    text_message = f'{applicant_name} has applied for the position of {job_title}. You can view the job post here: {job_link}'
-    
-    # HTML version of the email with inline CSS
-    html_message = f"""
-    <html>
-    <body style="font-family: Arial, sans-serif; color: #333; padding: 20px; background-color: #f9f9f9; margin: 0; width: 100%; box-sizing: border-box;">
-        <div style="max-width: 600px; margin: auto; background-color: #ffffff; border: 1px solid #e0e0e0; border-radius: 8px; padding: 20px;">
-            <p style="font-size: 16px;">Dear Recruiter,</p>
-            <p style="font-size: 16px; color: #333;">
-                <span style="color: #2c3e50; font-weight: bold;">{applicant_name}</span> has applied for the position of 
-                <a href="{job_link}" style="font-size: 18px; color: #3498db; text-decoration: none;">{job_title}</a>.
-            </p>
-            <p style="font-size: 16px; color: #333;">You can view the job post by clicking on the job title above.</p>
-            <p style="margin-top: 20px; font-size: 12px; color: #777;">
-                Thank you, <br> Your Job Portal Team
-            </p>
-        </div>
-    </body>
-    </html>
-    """
 
-    # Sending email
-    try:
-        email = EmailMultiAlternatives(
-            subject=subject,
-            body=text_message,  # Plain text message
-            from_email=settings.EMAIL_HOST_USER,
-            to=[recruiter_email]
-        )
-        
-        # Attach the HTML content
-        email.attach_alternative(html_message, "text/html")
-        email.send()
+def build_status_update_email(employee_email, application_status, job_title, application_id):
+    return emails.build('status_update', employee_email, status_update_values(application_status, job_title, application_id))
 
-        logger.info(f'Email sent successfully to {recruiter_email}')
+
+@shared_task(base=outbox.OutboxTask)
+def send_application_status_update_notification(employee_email, application_status, job_title, application_id):
+    # Sending the email
+    try:
+        mailer.send_messages([build_status_update_email(employee_email, application_status, job_title, application_id)])
+        logger.info(f'Notification sent successfully to {employee_email}')
     except Exception as e:
-        logger.error(f'Failed to send email to {recruiter_email}: {str(e)}')
+        logger.error(f'Failed to send notification to {employee_email}: {str(e)}')
+
 
+@shared_task(base=outbox.OutboxTask)
+def send_application_status_update_batch(notifications):
+    """
+    Status update emails for a bulk change, as lists of the arguments of
+    send_application_status_update_notification. Sent EMAIL_BATCH_SIZE at a
+    time over the pooled connection; a failed chunk is logged and skipped.
+    """
+    sent = 0
+    for start in range(0, len(notifications), settings.EMAIL_BATCH_SIZE):
+        chunk = notifications[start:start + settings.EMAIL_BATCH_SIZE]
+        try:
+            messages = emails.build_batch(
+                'status_update', [(email, status_update_values(*rest)) for email, *rest in chunk]
+            )
+            sent += mailer.send_messages(messages)
+        except Exception as e:
+            logger.error(f'Failed to send {len(chunk)} status update notifications: {str(e)}')
+    logger.info(f'{sent} of {len(notifications)} status update notifications sent')
+    return sent
 
 
 
+@shared_task
+def relay_outbox():
+    published = outbox.relay()
+    if published:
+        logger.info(f'Relayed {published} outbox messages')
+    return published
 
 
+@shared_task
+def expire_jobs():
+    expired = expiry.expire_jobs()
+    logger.info(f'Deactivated {expired} jobs past their application deadline')
+    return expired
 
-logger = logging.getLogger(__name__)
 
 @shared_task
-def send_application_status_update_notification(employee_email, application_status, job_title, application_id):
-    # Subject of the email
-    subject = '📩 Your Application Status has been Updated'
-
-    # Create the link to the application detail view
-    application_link = f"{settings.SITE_URL}{reverse('application_detail', args=[application_id])}"
-
-    # HTML version of the email with inline styles
-    html_message = f"""
-    <html>
-    <body style="font-family: 'Arial', sans-serif; background-color: #f4f4f4; margin: 0; padding: 20px;">
-        <div style="background-color: #ffffff; border-radius: 8px; box-shadow: 0 2px 5px rgba(0, 0, 0, 0.1); padding: 20px; max-width: 600px; margin: auto;">
-            <div style="background-color: #3498db; color: white; padding: 15px; border-radius: 8px 8px 0 0; text-align: center;">
-                Application Status Update
-            </div>
-            <div style="padding: 20px; font-size: 16px; color: #333;">
-                <p>Dear Applicant,</p>
-                <p>Your application for the position of <strong style="color: #e74c3c;">{job_title}</strong> has been updated to:</p>
-                <p style="font-weight: bold; font-size: 18px; color: #3498db;">{application_status}</p>
-                <p>You can view your application details by clicking the button below:</p>
-                <a href="{application_link}" style="display: inline-block; padding: 12px 20px; background-color: #3498db; color: white; border-radius: 5px; text-decoration: none; margin-top: 20px; transition: background-color 0.3s ease-in-out;">View Application</a>
-            </div>
-            <div style="margin-top: 30px; font-size: 12px; color: #7f8c8d; text-align: center;">
-                Thank you for your interest!<br>
-                Your Job Portal Team
-            </div>
-        </div>
-    </body>
-    </html>
+def compute_recommendations():
+    written = recommendations.compute_recommendations()
+    logger.info(f'Wrote {written} job recommendations')
+    return written
+
+
+@shared_task
+def refresh_dashboard_stats():
+    stats = dashboard_stats.refresh_dashboard_stats()
+    logger.info(f'Dashboard stats refreshed: {stats}')
+
+
+
+def build_recruiter_digest(recruiter, applications):
+    """One summary email listing the new applications of a recruiter, grouped by job."""
+    by_job = defaultdict(list)
+    for application in applications:
+        by_job[application.job].append(application.employee.user.name)
+    jobs = [{'title': job.title, 'link': emails.link('job_detail', job.id), 'names': names} for job, names in by_job.items()]
+    return emails.build('recruiter_digest', recruiter.user.email, {'count': len(applications), 'jobs': jobs})
+
+
+def pending_digests(batch_size):
     """
+    (recruiter, entries) for every recruiter with buffered applications, in
+    recruiter order. Entries are loaded ``batch_size`` recruiters at a time.
+    """
+    last_id = 0
+    while True:
+        recruiter_ids = list(
+            PendingNotification.objects.filter(recruiter_id__gt=last_id).order_by('recruiter_id')
+            .values_list('recruiter_id', flat=True).distinct()[:batch_size]
+        )
+        if not recruiter_ids:
+            return
+        last_id = recruiter_ids[-1]
+        by_recruiter = defaultdict(list)
+        for entry in (
+            PendingNotification.objects.filter(recruiter_id__in=recruiter_ids)
+            .select_related('recruiter__user', 'application__job', 'application__employee__user')
+            .order_by('recruiter_id', 'application__job_id', 'id')
+        ):
+            by_recruiter[entry.recruiter].append(entry)
+        yield from by_recruiter.items()
 
-    # Sending the email
-    try:
+
+@shared_task
+def send_recruiter_digests():
+    """
+    Send every recruiter in digest mode one email covering their buffered
+    applications over pooled SMTP connections. A failed send discards its
+    connection and the remaining digests go over a fresh one. Entries are
+    removed only once their recruiter's email went out, so a failed send is
+    retried next run.
+    """
+    digests = pending_digests(settings.DIGEST_BATCH_SIZE)
+    first = next(digests, None)
+    if first is None:
+        return 0
+    digests = itertools.chain([first], digests)
+    pool = mailer.get_pool()
+    sent = covered = 0
+    while True:
+        recruiter = None
+        try:
+            # The pool closes the connection instead of taking it back when
+            # the block raises, and the next pass of the loop opens a new one
+            with pool.connection() as connection:
+                for recruiter, entries in digests:
+                    connection.send_messages([build_recruiter_digest(recruiter, [entry.application for entry in entries])])
+                    PendingNotification.objects.filter(id__in=[entry.id for entry in entries]).delete()
+                    sent += 1
+                    covered += len(entries)
+            break
+        except Exception as e:
+            if recruiter is None:
+                # No connection to be had; what is left waits for the next run
+                logger.error(f'Recruiter digests stopped, could not connect: {str(e)}')
+                break
+            logger.error(f'Failed to send digest to {recruiter.user.email}: {str(e)}')
+
+    if sent:
+        logger.info(f'Sent {sent} recruiter digests covering {covered} applications')
+    return sent
+
+
+@shared_task
+def send_email_batch(messages):
+    """
+    Send many emails in one task over one pooled connection. Each message is a
+    dict with ``subject``, ``body``, ``to`` and optionally ``html``.
+    """
+    batch = []
+    for message in messages:
         email = EmailMultiAlternatives(
-            subject=subject,
-            body="This email contains HTML content. Please enable HTML to view the content.",
+            subject=message['subject'],
+            body=message['body'],
             from_email=settings.EMAIL_HOST_USER,
-            to=[employee_email]
+            to=message['to']
         )
-        email.attach_alternative(html_message, "text/html")
-        email.send()
+        if message.get('html'):
+            email.attach_alternative(message['html'], "text/html")
+        batch.append(email)
 
-        logger.info(f'Notification sent successfully to {employee_email}')
+    try:
+        sent = mailer.send_messages(batch)
+        logger.info(f'Batch of {sent} emails sent successfully')
+        return sent
     except Exception as e:
-        logger.error(f'Failed to send notification to {employee_email}: {str(e)}')
-
+        logger.error(f'Failed to send batch of {len(batch)} emails: {str(e)}')
+        return 0
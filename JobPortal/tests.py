@@ -1,7 +1,36 @@
-from django.test import TestCase
+from django.db import IntegrityError, connection, transaction
+from django.test import AsyncClient, TestCase, TransactionTestCase, override_settings
 from django.urls import reverse
-from .models import User, Application, Job
+from django.utils import timezone
+from unittest import skipIf
+from unittest.mock import patch
+import csv
+import datetime
+import json
+import math
+import os
+import smtplib
+import tempfile
+import threading
+from io import StringIO
+from django.core import mail
+from django.core.management import call_command
+from rest_framework_simplejwt.tokens import RefreshToken
+from kombu.exceptions import OperationalError
+from TalentHunt import celery_app
+from django.core.cache import cache
+import factory
+from . import bulkgen, emails, expiry, facets, history, locations, mailer, metrics, outbox, recommendations
+from .models import User, Application, ApplicationStatusEvent, City, Job, JobRecommendation, Employee, Recruiter, OutboxMessage, PendingNotification
+from .cache import get_job, job_cards
+from . import cache as job_cache
+from .forms import ApplicationForm
 from .factories import UserFactory, RecruiterFactory, JobFactory, EmployeeFactory, ApplicationFactory
+from .pagination import CursorPaginator
+from .profiling import QueryBudgetClient, QueryRecorder, assert_queries_use_indexes
+from .search import search_jobs
+from .stats import compute_dashboard_stats, get_dashboard_stats
+from .tasks import refresh_dashboard_stats, send_email_batch, send_recruiter_digests
 
 
 class UserFactoryTest(TestCase):
@@ -15,6 +44,14 @@ class UserFactoryTest(TestCase):
         user = UserFactory(role='recruiter')
         self.assertEqual(user.role, 'recruiter')
 
+    def test_explicit_password_is_hashed(self):
+        user = UserFactory(password='s3cret-pass')
+        self.assertTrue(user.check_password('s3cret-pass'))
+        self.assertTrue(self.client.login(email=user.email, password='s3cret-pass'))
+        with patch.object(UserFactory, '_bulk_threshold', 2):
+            users = UserFactory.create_batch(2, password='other-pass')
+        self.assertTrue(all(user.check_password('other-pass') for user in users))
+
 
 class RecruiterFactoryTest(TestCase):
 
@@ -60,6 +97,7 @@ class ApplicationFactoryTest(TestCase):
 
 
 class JobListingViewTest(TestCase):
+    client_class = QueryBudgetClient
 
     def setUp(self):
         self.recruiter = RecruiterFactory()
@@ -77,6 +115,7 @@ class JobListingViewTest(TestCase):
 
 
 class JobApplicationSubmissionTest(TestCase):
+    client_class = QueryBudgetClient
 
     def setUp(self):
         self.employee = EmployeeFactory()
@@ -93,3 +132,1157 @@ class JobApplicationSubmissionTest(TestCase):
         })
         self.assertRedirects(response, reverse('application_list'))  # Expect redirect to application list
         self.assertEqual(Application.objects.filter(employee=self.employee, job=self.job).count(), 1)  # Ensure only one application exists
+
+
+class JobSearchIndexTest(TestCase):
+    client_class = QueryBudgetClient
+
+    def setUp(self):
+        self.recruiter = RecruiterFactory(company_name='Hooli')
+        self.backend = JobFactory(recruiter=self.recruiter, title='Senior Python Developer', location='Pune')
+        self.frontend = JobFactory(recruiter=self.recruiter, title='Frontend Engineer', location='Mumbai',
+                                   description='React developer with some python')
+        self.other = JobFactory(title='Sales Manager', location='Pune')
+
+    def test_index_follows_job_and_recruiter_saves(self):
+        self.backend.title = 'Golang Developer'
+        self.backend.save()
+        self.assertNotIn(self.backend, search_jobs(Job.objects.all(), title='python'))
+        self.assertIn(self.backend, search_jobs(Job.objects.all(), title='golang'))
+
+        self.recruiter.company_name = 'Pied Piper'
+        self.recruiter.save()
+        self.assertEqual(set(search_jobs(Job.objects.all(), company='piper')), {self.backend, self.frontend})
+
+    def test_every_term_must_match_and_title_hits_rank_first(self):
+        results = list(search_jobs(Job.objects.all(), text='python dev'))
+        self.assertEqual(results, [self.backend, self.frontend])
+        self.assertEqual(list(search_jobs(Job.objects.all(), title='developer', location='pune')), [self.backend])
+
+    def test_job_search_view_uses_index(self):
+        response = self.client.get(reverse('job_search'), {'job_title': 'pyth', 'location': 'pune'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(list(response.context['jobs']), [self.backend])
+
+    def test_short_and_stop_word_queries_still_filter(self):
+        cpp = JobFactory(title='C++ Developer', description='Systems work', location='Pune')
+        support = JobFactory(title='IT Support Engineer', description='Helpdesk', location='Pune')
+        # "C" is a whole term, not a prefix of "customer" or "consultant"
+        JobFactory(title='Customer Consultant', description='Client work', location='Pune')
+        self.assertEqual(list(search_jobs(Job.objects.all(), title='C++')), [cpp])
+        # "IT" is only a stop word, so it falls back to a substring match
+        response = self.client.get(reverse('job_search'), {'job_title': 'IT'})
+        self.assertEqual(list(response.context['jobs']), [support])
+        self.assertEqual(list(search_jobs(Job.objects.all(), text='++')), [cpp])
+
+    def test_saving_recruiter_without_rename_skips_reindex(self):
+        self.recruiter.website = 'https://hooli.example'
+        with patch('JobPortal.signals.index_jobs') as index_jobs:
+            self.recruiter.save()
+            self.recruiter.save(update_fields=['website'])
+        index_jobs.assert_not_called()
+
+
+class CursorPaginationTest(TestCase):
+    client_class = QueryBudgetClient
+
+    def setUp(self):
+        recruiter = RecruiterFactory()
+        self.jobs = JobFactory.create_batch(7, recruiter=recruiter)
+        # Give some jobs the same posted_date so the id tie-breaker matters
+        Job.objects.filter(pk__in=[job.pk for job in self.jobs[:4]]).update(posted_date=self.jobs[0].posted_date)
+        self.expected = list(Job.objects.order_by('-posted_date', '-id'))
+
+    def test_walk_forward_and_back(self):
+        paginator = CursorPaginator(Job.objects.all(), 3, ordering=('-posted_date', '-id'))
+        first = paginator.get_page()
+        second = paginator.get_page(first.next_cursor)
+        third = paginator.get_page(second.next_cursor)
+
+        self.assertFalse(first.has_previous())
+        self.assertEqual(list(first) + list(second) + list(third), self.expected)
+        self.assertFalse(third.has_next())
+        self.assertEqual(list(paginator.get_page(third.previous_cursor)), list(second))
+        self.assertEqual(list(paginator.get_page(second.previous_cursor)), list(first))
+
+    def test_invalid_cursor_gives_first_page(self):
+        response = self.client.get(reverse('job_list'), {'cursor': 'not-a-cursor'})
+        self.assertEqual(list(response.context['page_obj']), self.expected[:10])
+
+
+class QueryBudgetTest(TestCase):
+    client_class = QueryBudgetClient
+
+    def setUp(self):
+        # Full pages from distinct recruiters, so any lazy FK per row shows up as N+1
+        self.employee = EmployeeFactory()
+        self.jobs = JobFactory.create_batch(12)
+        self.applications = [ApplicationFactory(employee=self.employee, job=job) for job in self.jobs[:6]]
+        self.recruiter = self.jobs[0].recruiter
+        ApplicationFactory.create_batch(5, job=self.jobs[0])
+        EmployeeFactory.create_batch(11)
+        self.admin = User.objects.create_superuser('admin@example.com', 'password123')
+
+    def test_employee_views_within_budget(self):
+        self.client.force_login(self.employee.user)
+        for url in [reverse('job_list'), reverse('job_search'), reverse('application_list'),
+                    reverse('employee_dashboard'), reverse('job_detail', args=[self.jobs[0].id]),
+                    reverse('application_detail', args=[self.applications[0].id])]:
+            self.assertEqual(self.client.get(url).status_code, 200)
+
+    def test_recruiter_views_within_budget(self):
+        self.client.force_login(self.recruiter.user)
+        for url in [reverse('job_list'), reverse('application_list'), reverse('recruiter_dashboard'),
+                    reverse('job_detail', args=[self.jobs[0].id])]:
+            self.assertEqual(self.client.get(url).status_code, 200)
+
+    def test_superadmin_views_within_budget(self):
+        self.client.force_login(self.admin)
+        for url in [reverse('superadmin_dashboard'), reverse('recruiter_list'), reverse('employee_list'),
+                    reverse('recruiter_detail', args=[self.recruiter.id]),
+                    reverse('employee_detail', args=[self.employee.id])]:
+            self.assertEqual(self.client.get(url).status_code, 200)
+
+    @override_settings(QUERY_BUDGETS={'employee_list': 3})
+    def test_over_budget_names_the_template_line(self):
+        self.client.force_login(self.admin)
+        # Without select_related every row loads its user from the template
+        with patch('JobPortal.views.Employee.objects.select_related', return_value=Employee.objects.all()):
+            with self.assertRaisesMessage(AssertionError, 'dashboard/employee_list.html:'):
+                self.client.get(reverse('employee_list'))
+
+
+class DashboardStatsTest(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        EmployeeFactory.create_batch(3)
+        RecruiterFactory.create_batch(2)
+        JobFactory.create_batch(4)
+        inactive_employee = EmployeeFactory()
+        inactive_employee.user.is_active = False
+        inactive_employee.user.save()
+        JobFactory(is_active=False)
+
+    def naive_counts(self):
+        return {
+            'employees_count': Employee.objects.count(),
+            'active_employees_count': Employee.objects.filter(user__is_active=True).count(),
+            'deactivated_employees_count': Employee.objects.filter(user__is_active=False).count(),
+            'recruiters_count': Recruiter.objects.count(),
+            'active_recruiters_count': Recruiter.objects.filter(user__is_active=True).count(),
+            'deactivated_recruiters_count': Recruiter.objects.filter(user__is_active=False).count(),
+            'jobs_count': Job.objects.count(),
+            'active_jobs_count': Job.objects.filter(is_active=True).count(),
+            'deactivated_jobs_count': Job.objects.filter(is_active=False).count(),
+        }
+
+    def test_aggregates_match_naive_counts(self):
+        expected = self.naive_counts()
+        with self.assertNumQueries(3):
+            stats = compute_dashboard_stats()
+        self.assertEqual(stats, expected)
+
+    def test_cache_mode_serves_from_cache(self):
+        self.assertEqual(get_dashboard_stats(), self.naive_counts())
+        with self.assertNumQueries(0):
+            get_dashboard_stats()
+
+    @override_settings(DASHBOARD_STATS_MODE='table')
+    def test_table_mode_reads_refreshed_row(self):
+        self.assertEqual(get_dashboard_stats(), self.naive_counts())
+        JobFactory()
+        self.assertEqual(get_dashboard_stats()['jobs_count'], 5)  # stale until the next refresh
+
+        refresh_dashboard_stats()
+        expected = self.naive_counts()
+        with self.assertNumQueries(1):
+            stats = get_dashboard_stats()
+        self.assertEqual(stats, expected)
+
+
+class JobCardCacheTest(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.recruiter = RecruiterFactory(company_name='Acme')
+        self.job = JobFactory(recruiter=self.recruiter, title='Backend Developer')
+
+    def render(self):
+        return job_cards(Job.objects.select_related('recruiter'))[0]
+
+    def test_second_render_is_a_hit(self):
+        first = self.render()
+        self.assertIn('Backend Developer', first['header'])
+        second = self.render()
+        self.assertEqual(second['header'], first['header'])
+        stats = metrics.snapshot()
+        self.assertEqual((stats['job_cards.hits'], stats['job_cards.misses']), (1, 1))
+
+    def test_job_and_recruiter_saves_invalidate(self):
+        self.render()
+        self.job.title = 'Platform Engineer'
+        self.job.save()
+        self.assertIn('Platform Engineer', self.render()['header'])
+
+        self.recruiter.company_name = 'Globex'
+        self.recruiter.save()
+        self.assertIn('Globex', self.render()['header'])
+        self.assertEqual(metrics.snapshot()['job_cards.misses'], 3)
+
+    def test_listing_keeps_per_user_badge(self):
+        employee = EmployeeFactory()
+        ApplicationFactory(employee=employee, job=self.job)
+        self.client.login(email=employee.user.email, password='password123')
+        self.client.get(reverse('job_list'))
+        response = self.client.get(reverse('job_list'))
+        self.assertContains(response, 'Backend Developer')
+        self.assertContains(response, 'Applied')
+        self.assertEqual(metrics.snapshot()['job_cards.hits'], 1)
+
+
+class RecruiterDigestTest(TestCase):
+    client_class = QueryBudgetClient
+
+    def setUp(self):
+        self.recruiter = RecruiterFactory(notification_mode='digest')
+        self.jobs = JobFactory.create_batch(2, recruiter=self.recruiter)
+
+    def apply(self, job):
+        employee = EmployeeFactory()
+        self.client.force_login(employee.user)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post(reverse('apply_job', kwargs={'job_id': job.id}), {'cover_letter': 'Hello', 'phone_number': '5550100'})
+        return employee
+
+    def test_digest_mode_buffers_and_sends_one_email(self):
+        applicants = [self.apply(self.jobs[0]), self.apply(self.jobs[0]), self.apply(self.jobs[1])]
+        self.assertFalse(OutboxMessage.objects.exists())
+        self.assertEqual(PendingNotification.objects.count(), 3)
+
+        self.assertEqual(send_recruiter_digests(), 1)
+        self.assertEqual(len(mail.outbox), 1)
+        self.assertEqual(mail.outbox[0].to, [self.recruiter.user.email])
+        for applicant in applicants:
+            self.assertIn(applicant.user.name, mail.outbox[0].body)
+        self.assertFalse(PendingNotification.objects.exists())
+        self.assertEqual(send_recruiter_digests(), 0)
+
+    def test_failed_send_moves_on_over_a_new_connection(self):
+        other = RecruiterFactory(notification_mode='digest')
+        for recruiter in (self.recruiter, other):
+            PendingNotification.objects.create(recruiter=recruiter, application=ApplicationFactory(job=JobFactory(recruiter=recruiter)))
+        connections = []
+        original = mail.backends.locmem.EmailBackend.send_messages
+
+        def send_messages(backend, messages):
+            connections.append(backend)
+            if len(connections) == 1:
+                raise smtplib.SMTPServerDisconnected('gone')
+            return original(backend, messages)
+
+        with patch.object(mail.backends.locmem.EmailBackend, 'send_messages', send_messages):
+            self.assertEqual(send_recruiter_digests(), 1)
+        self.assertIsNot(connections[0], connections[1])
+        self.assertEqual(mail.outbox[0].to, [other.user.email])
+        self.assertEqual(list(PendingNotification.objects.values_list('recruiter', flat=True)), [self.recruiter.pk])
+
+    @override_settings(DIGEST_BATCH_SIZE=1)
+    def test_recruiters_are_loaded_in_batches(self):
+        recruiters = [self.recruiter, RecruiterFactory(notification_mode='digest'), RecruiterFactory(notification_mode='digest')]
+        for recruiter in recruiters:
+            PendingNotification.objects.create(recruiter=recruiter, application=ApplicationFactory(job=JobFactory(recruiter=recruiter)))
+        self.assertEqual(send_recruiter_digests(), 3)
+        self.assertEqual(sorted(email.to[0] for email in mail.outbox), sorted(r.user.email for r in recruiters))
+        self.assertFalse(PendingNotification.objects.exists())
+
+    def test_immediate_mode_sends_right_away(self):
+        self.recruiter.notification_mode = 'immediate'
+        self.recruiter.save()
+        self.apply(self.jobs[0])
+        self.assertEqual(list(OutboxMessage.objects.values_list('task', flat=True)), ['JobPortal.tasks.send_application_notification'])
+        self.assertFalse(PendingNotification.objects.exists())
+
+
+class MailerPoolTest(TestCase):
+
+    def test_pool_reuses_connections_up_to_its_size(self):
+        pool = mailer.ConnectionPool(size=1)
+        with pool.connection() as first, pool.connection() as second:
+            self.assertIsNot(first, second)
+        with pool.connection() as again:
+            self.assertIn(again, (first, second))
+        self.assertEqual(len(pool._idle), 1)
+
+    def test_failed_connection_is_not_reused(self):
+        pool = mailer.ConnectionPool()
+        with self.assertRaises(RuntimeError):
+            with pool.connection() as broken:
+                raise RuntimeError
+        with pool.connection() as connection:
+            self.assertIsNot(connection, broken)
+
+    def test_batch_task_sends_every_message(self):
+        sent = send_email_batch([
+            {'subject': f'Hello {i}', 'body': 'Hi', 'to': [f'user{i}@example.com'], 'html': '<p>Hi</p>'}
+            for i in range(3)
+        ])
+        self.assertEqual(sent, 3)
+        self.assertEqual([email.to for email in mail.outbox], [[f'user{i}@example.com'] for i in range(3)])
+
+
+class JobsImportExportTest(TestCase):
+
+    def setUp(self):
+        self.recruiter = RecruiterFactory()
+        self.dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.dir.cleanup)
+
+    def write(self, name, content):
+        path = os.path.join(self.dir.name, name)
+        with open(path, 'w') as f:
+            f.write(content)
+        return path
+
+    def test_import_keeps_going_past_bad_rows(self):
+        path = self.write('jobs.csv', (
+            'title,description,location,job_type,salary\n'
+            'Python Developer,Build APIs,Pune,full_time,50000\n'
+            ',Missing title,Pune,full_time,\n'
+            'Data Analyst,Dashboards,Mumbai,internship,\n'
+        ))
+        stdout, stderr = StringIO(), StringIO()
+        call_command('jobs_import', path, recruiter=self.recruiter.user.email, chunk_size=2, stdout=stdout, stderr=stderr)
+
+        self.assertEqual(sorted(Job.objects.values_list('title', flat=True)), ['Data Analyst', 'Python Developer'])
+        self.assertIn('line 3: title: This field is required.', stderr.getvalue())
+        self.assertIn('Imported 2 jobs', stdout.getvalue())
+        # bulk_create skips post_save, so the import indexes the jobs itself
+        self.assertEqual(list(search_jobs(Job.objects.all(), text='python')), [Job.objects.get(title='Python Developer')])
+
+    def test_export_round_trips_through_import(self):
+        JobFactory.create_batch(3, recruiter=self.recruiter)
+        path = os.path.join(self.dir.name, 'jobs.jsonl')
+        call_command('jobs_export', path, chunk_size=2, stderr=StringIO())
+        with open(path) as f:
+            rows = [json.loads(line) for line in f]
+        self.assertEqual([row['id'] for row in rows], list(Job.objects.order_by('pk').values_list('pk', flat=True)))
+        self.assertEqual({row['recruiter_email'] for row in rows}, {self.recruiter.user.email})
+
+        call_command('jobs_import', path, stdout=StringIO(), stderr=StringIO())
+        self.assertEqual(Job.objects.count(), 6)
+
+
+class ApplicationExportTest(TestCase):
+
+    def setUp(self):
+        self.recruiter = RecruiterFactory()
+        self.job, other_job = JobFactory.create_batch(2, recruiter=self.recruiter)
+        self.applications = ApplicationFactory.create_batch(4, job=self.job)
+        ApplicationFactory(job=other_job)
+        ApplicationFactory()  # another recruiter's applicant
+        self.client.force_login(self.recruiter.user)
+
+    def export(self, **params):
+        response = self.client.get(reverse('application_export'), params)
+        self.assertEqual(response['Content-Type'], 'text/csv')
+        return [line.split(',') for line in b''.join(response.streaming_content).decode().splitlines()]
+
+    def test_exports_only_own_applicants(self):
+        rows = self.export()
+        self.assertEqual(rows[0][0], 'Application ID')
+        self.assertEqual(len(rows), 6)
+
+    def test_filters_by_job_and_status(self):
+        self.applications[0].update_status('interview')
+        rows = self.export(job=self.job.id, status='interview')
+        self.assertEqual([row[0] for row in rows[1:]], [str(self.applications[0].id)])
+
+    def test_formulas_are_quoted(self):
+        employee = self.applications[0].employee
+        employee.user.name = '=HYPERLINK("http://evil.example")'
+        employee.user.save()
+        employee.location = '@SUM(A1)'
+        employee.save()
+        response = self.client.get(reverse('application_export'), {'job': self.job.id})
+        rows = list(csv.reader(b''.join(response.streaming_content).decode().splitlines()))
+        row = next(row for row in rows if row[0] == str(self.applications[0].id))
+        self.assertEqual(row[3], '\'=HYPERLINK("http://evil.example")')
+        self.assertEqual(row[6], "'@SUM(A1)")
+
+    @patch('JobPortal.views.EXPORT_CHUNK_SIZE', 2)
+    def test_reads_in_bounded_chunks(self):
+        response = self.client.get(reverse('application_export'), {'job': self.job.id})
+        with self.assertNumQueries(3):  # 2 + 2 + an empty last chunk
+            lines = list(response.streaming_content)
+        self.assertEqual(len(lines), 5)
+
+    def test_employees_cannot_export(self):
+        self.client.force_login(self.applications[0].employee.user)
+        response = self.client.get(reverse('application_export'))
+        self.assertTemplateUsed(response, '403.html')
+
+
+class JobApiTest(TestCase):
+    client_class = QueryBudgetClient
+
+    def setUp(self):
+        self.recruiter = RecruiterFactory(company_name='Acme')
+        self.jobs = JobFactory.create_batch(3, recruiter=self.recruiter)
+        self.employee = EmployeeFactory()
+        token = RefreshToken.for_user(self.employee.user).access_token
+        self.auth = {'HTTP_AUTHORIZATION': f'Bearer {token}'}
+
+    def test_list_with_field_selection(self):
+        response = self.client.get(reverse('api-job-list'), {'fields': 'id,title,company_name'}, **self.auth)
+        self.assertEqual(response.status_code, 200)
+        results = response.json()['results']
+        self.assertEqual(len(results), 3)
+        self.assertEqual(set(results[0]), {'id', 'title', 'company_name'})
+        self.assertEqual(results[0]['company_name'], 'Acme')
+
+    def test_conditional_get_until_something_changes(self):
+        url = reverse('api-job-list')
+        first = self.client.get(url, **self.auth)
+        etag = first['ETag']
+        self.assertIn('Last-Modified', first)
+
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag, **self.auth).status_code, 304)
+
+        self.recruiter.company_name = 'Globex'
+        self.recruiter.save()
+        changed = self.client.get(url, HTTP_IF_NONE_MATCH=etag, **self.auth)
+        self.assertEqual(changed.status_code, 200)
+        self.assertNotEqual(changed['ETag'], etag)
+
+    def test_detail_not_modified(self):
+        url = reverse('api-job-detail', args=[self.jobs[0].id])
+        first = self.client.get(url, **self.auth)
+        self.assertEqual(first.json()['title'], self.jobs[0].title)
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=first['ETag'], **self.auth)
+        self.assertEqual(response.status_code, 304)
+
+    def test_applications_are_scoped_to_the_user(self):
+        mine = ApplicationFactory(employee=self.employee, job=self.jobs[0])
+        ApplicationFactory(job=self.jobs[1])
+        response = self.client.get(reverse('api-application-list'), **self.auth)
+        self.assertEqual([row['id'] for row in response.json()['results']], [mine.id])
+
+    def test_requires_authentication(self):
+        self.assertEqual(self.client.get(reverse('api-job-list')).status_code, 401)
+
+
+class IndexUsageTest(TestCase):
+
+    def setUp(self):
+        self.recruiter = RecruiterFactory()
+        self.jobs = JobFactory.create_batch(3, recruiter=self.recruiter)
+        self.employee = EmployeeFactory()
+        self.application = ApplicationFactory(employee=self.employee, job=self.jobs[0])
+
+    def assertViewsUseIndexes(self, user, urls, allow=()):
+        self.client.force_login(user)
+        with QueryRecorder() as recorder:
+            for url in urls:
+                self.client.get(url)
+        assert_queries_use_indexes(recorder, allow)
+
+    def test_employee_views(self):
+        self.assertViewsUseIndexes(self.employee.user, [
+            reverse('job_list'),
+            reverse('job_detail', args=[self.jobs[0].id]),
+            reverse('apply_job', args=[self.jobs[1].id]),
+            reverse('application_list'),
+            reverse('employee_dashboard'),
+        ])
+
+    def test_recruiter_views(self):
+        self.assertViewsUseIndexes(self.recruiter.user, [
+            reverse('job_list'),
+            reverse('recruiter_dashboard'),
+            reverse('application_detail', args=[self.application.id]),
+        ])
+        # Applications across several jobs are merged, so their order needs a sort
+        self.assertViewsUseIndexes(self.recruiter.user, [reverse('application_list')], allow=['sort'])
+
+    def test_one_application_per_employee_and_job(self):
+        with self.assertRaises(IntegrityError):
+            ApplicationFactory(employee=self.employee, job=self.jobs[0])
+
+
+class ConcurrentApplyTest(TransactionTestCase):
+
+    def setUp(self):
+        self.job = JobFactory()
+        self.employee = EmployeeFactory()
+
+    def submit(self):
+        client = QueryBudgetClient()
+        client.force_login(self.employee.user)
+        return client
+
+    def post(self, client):
+        return client.post(
+            reverse('apply_job', kwargs={'job_id': self.job.id}),
+            {'cover_letter': 'Hello', 'phone_number': '5550100'},
+        )
+
+    def test_resubmit_hits_the_constraint(self):
+        # No existence check runs before the insert, so this is the path the
+        # loser of a real race takes
+        client = self.submit()
+        self.assertRedirects(self.post(client), reverse('application_list'))
+        self.assertRedirects(self.post(client), reverse('application_list'))
+        self.assertEqual(Application.objects.filter(employee=self.employee, job=self.job).count(), 1)
+        self.assertEqual(OutboxMessage.objects.count(), 1)
+
+    @skipIf(connection.vendor == 'sqlite', 'SQLite test databases do not allow concurrent writers')
+    def test_parallel_submits_create_one_application(self):
+        threads = 4
+        barrier = threading.Barrier(threads)
+        clients = [self.submit() for _ in range(threads)]
+        responses = []
+
+        def submit(client):
+            barrier.wait(timeout=10)
+            try:
+                responses.append(self.post(client))
+            finally:
+                connection.close()
+
+        workers = [threading.Thread(target=submit, args=[client]) for client in clients]
+        for worker in workers:
+            worker.start()
+        for worker in workers:
+            worker.join()
+
+        self.assertEqual([response.status_code for response in responses], [302] * threads)
+        self.assertEqual(Application.objects.filter(employee=self.employee, job=self.job).count(), 1)
+        self.assertEqual(OutboxMessage.objects.count(), 1)
+
+
+class SeedLoadtestTest(TestCase):
+
+    def test_seeds_requested_volumes_with_known_logins(self):
+        call_command(
+            'seed_loadtest', recruiters=3, employees=4, jobs=10, applications=25, batch_size=4,
+            search_index=True, stdout=StringIO(),
+        )
+        self.assertEqual(Recruiter.objects.count(), 3)
+        self.assertEqual(Employee.objects.count(), 4)
+        self.assertEqual(Job.objects.count(), 10)
+        self.assertEqual(Application.objects.count(), 25)
+        self.assertTrue(self.client.login(email='loadtest-employee-0@example.com', password='password123'))
+
+    def test_loadtest_samples_existing_ids_without_sorting(self):
+        from .management.commands.loadtest import random_ids
+        jobs = JobFactory.create_batch(6)
+        Job.objects.filter(pk__in=[jobs[1].pk, jobs[4].pk]).delete()
+        with QueryRecorder() as recorder:
+            ids = random_ids(Job, 3)
+        self.assertLessEqual(len(ids), 3)
+        self.assertTrue(set(ids) <= set(Job.objects.values_list('pk', flat=True)))
+        self.assertFalse(any('RANDOM()' in q['sql'] for q in recorder.queries))
+
+
+class BulkGenTest(TestCase):
+
+    def test_large_factory_batches_are_bulk_created(self):
+        recruiter = RecruiterFactory()
+        with patch.object(JobFactory, '_bulk_threshold', 5), self.assertNumQueries(2):
+            jobs = JobFactory.create_batch(8, recruiter=recruiter, is_active=False)
+        self.assertEqual(Job.objects.filter(recruiter=recruiter, is_active=False).count(), 8)
+        self.assertTrue(all(job.pk for job in jobs))
+
+        with patch.object(ApplicationFactory, '_bulk_threshold', 5):
+            applications = ApplicationFactory.create_batch(6, job=jobs[0])
+        self.assertEqual(jobs[0].applications.count(), 6)
+        self.assertTrue(applications[0].employee.user.check_password('password123'))
+
+    def test_declarations_take_the_factory_path(self):
+        with patch.object(JobFactory, '_bulk_threshold', 2):
+            jobs = JobFactory.create_batch(3, title=factory.Iterator(['a', 'b', 'c']))
+        self.assertEqual([job.title for job in jobs], ['a', 'b', 'c'])
+
+    def test_generate_is_reproducible_from_the_seed(self):
+        for prefix in ('one', 'two'):
+            bulkgen.generate(recruiters=2, employees=5, jobs=6, applications=12, seed=7, batch_size=4, prefix=prefix)
+        names = {
+            prefix: list(User.objects.filter(email__startswith=prefix).order_by('pk').values_list('name', flat=True))
+            for prefix in ('one', 'two')
+        }
+        self.assertEqual(len(names['one']), 7)
+        self.assertEqual(names['one'], names['two'])
+        self.assertEqual(Job.objects.count(), 12)
+        self.assertEqual(Application.objects.count(), 24)
+        self.assertTrue(self.client.login(email='one-employee-4@example.com', password='password123'))
+
+
+class ProfileLoaderTest(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.employee = EmployeeFactory(phone_number='5550100')
+
+    def test_profile_comes_with_the_user(self):
+        self.client.force_login(self.employee.user)
+        with QueryRecorder() as recorder:
+            self.client.get(reverse('employee_dashboard'))
+        profile_lookups = [q for q in recorder.queries if q['sql'].startswith('SELECT') and 'FROM "JobPortal_employee"' in q['sql']]
+        self.assertEqual(profile_lookups, [])
+
+        with self.assertNumQueries(0):
+            form = ApplicationForm(employee=self.employee)
+        self.assertEqual(form.initial['phone_number'], '5550100')
+
+    def test_missing_profile_is_a_404(self):
+        self.client.force_login(UserFactory(role='recruiter'))
+        self.assertEqual(self.client.get(reverse('recruiter_dashboard')).status_code, 404)
+
+    @override_settings(PROFILE_CACHE_TIMEOUT=60)
+    def test_cached_user_is_dropped_on_profile_update(self):
+        self.client.force_login(self.employee.user)
+        self.client.get(reverse('employee_dashboard'))
+        with QueryRecorder() as recorder:
+            self.client.get(reverse('employee_dashboard'))
+        self.assertFalse(any('FROM "JobPortal_user"' in q['sql'] for q in recorder.queries))
+
+        self.client.post(reverse('employee_profile_update'), {'phone_number': '5550199', 'location': 'Pune'})
+        response = self.client.get(reverse('apply_job', args=[JobFactory().id]))
+        self.assertEqual(response.context['form'].initial['phone_number'], '5550199')
+
+    @override_settings(PROFILE_CACHE_TIMEOUT=60)
+    def test_cached_user_leaves_out_the_password_hash(self):
+        self.client.force_login(self.employee.user)
+        self.client.get(reverse('employee_dashboard'))
+        snapshot = cache.get(f'auth-user:{self.employee.user.pk}')
+        self.assertNotIn('password', snapshot['user'])
+        self.assertNotIn(self.employee.user.password, repr(snapshot))
+        # The session still verifies against the cached user
+        response = self.client.get(reverse('employee_dashboard'))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.context['user'].pk, self.employee.user.pk)
+
+    def test_sessions_from_model_backend_stay_signed_in(self):
+        self.client.force_login(self.employee.user, backend='django.contrib.auth.backends.ModelBackend')
+        self.assertEqual(self.client.get(reverse('employee_dashboard')).status_code, 200)
+
+
+class AsyncViewsTest(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.employee = EmployeeFactory()
+        cls.jobs = JobFactory.create_batch(3)
+        ApplicationFactory(employee=cls.employee, job=cls.jobs[0])
+
+    def setUp(self):
+        cache.clear()
+
+    async def test_pages_render_under_asgi(self):
+        # Any query left for the template would raise SynchronousOnlyOperation here
+        client = AsyncClient()
+        response = await client.get(reverse('job_list'))
+        self.assertEqual(len(response.context['job_cards']), 3)
+
+        await client.aforce_login(self.employee.user)
+        response = await client.get(reverse('job_list'))
+        self.assertEqual(response.context['applied_job_ids'], {self.jobs[0].id})
+        response = await client.get(reverse('job_detail', args=[self.jobs[0].id]))
+        self.assertTrue(response.context['already_applied'])
+        response = await client.get(reverse('employee_dashboard'))
+        self.assertEqual(len(response.context['applications']), 1)
+        response = await client.get(reverse('job_search'), {'q': self.jobs[1].title.split()[0]})
+        self.assertIn(self.jobs[1], response.context['jobs'])
+        self.assertEqual((await client.get(reverse('job_detail', args=[0]))).status_code, 404)
+
+
+class JobBundleCacheTest(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.job = JobFactory(title='Backend Developer', recruiter__company_name='Initech')
+
+    def test_second_read_is_served_from_the_cache(self):
+        get_job(self.job.pk)
+        with self.assertNumQueries(0):
+            job = get_job(self.job.pk)
+            self.assertEqual((job.title, job.recruiter.company_name), ('Backend Developer', 'Initech'))
+        stats = metrics.snapshot()
+        self.assertEqual((stats['job_bundles.hits'], stats['job_bundles.misses'], stats['job_bundles.hit_ratio']), (1, 1, 0.5))
+
+    def test_saves_and_deletes_invalidate(self):
+        get_job(self.job.pk)
+        self.job.title = 'Platform Engineer'
+        self.job.save()
+        self.assertEqual(get_job(self.job.pk).title, 'Platform Engineer')
+
+        self.job.recruiter.company_name = 'Globex'
+        self.job.recruiter.save()
+        self.assertEqual(get_job(self.job.pk).recruiter.company_name, 'Globex')
+
+        self.job.delete()
+        with self.assertRaises(Job.DoesNotExist):
+            get_job(self.job.pk)
+
+    def test_job_update_writes_over_the_stored_row(self):
+        get_job(self.job.pk)
+        # A change the cached bundle never heard of
+        Job.objects.filter(pk=self.job.pk).update(is_active=False)
+        self.client.force_login(self.job.recruiter.user)
+        response = self.client.post(reverse('job_update', args=[self.job.pk]), {
+            'title': 'Platform Engineer', 'description': 'Infra', 'location': 'Pune', 'job_type': 'full_time',
+            'salary': 50000, 'application_deadline': '2099-01-01 00:00',
+        })
+        self.assertRedirects(response, reverse('recruiter_dashboard'), fetch_redirect_response=False)
+        job = Job.objects.get(pk=self.job.pk)
+        self.assertEqual((job.title, job.is_active), ('Platform Engineer', False))
+
+    def test_waits_for_the_process_rebuilding_the_bundle(self):
+        cache.add(f'lock:jobbundle:{self.job.pk}', 1)
+        # Another process finishes its rebuild while this one waits
+        with patch('JobPortal.cache.time.sleep', side_effect=lambda seconds: job_cache._fetch_job(self.job.pk)):
+            job = get_job(self.job.pk)
+        self.assertEqual(job.title, 'Backend Developer')
+        self.assertEqual(metrics.snapshot()['job_bundles.misses'], 0)
+
+
+class InMemoryBrokerMixin:
+    """Sends tasks to an in-memory broker instead of running them; run_worker() executes what is queued."""
+
+    def setUp(self):
+        super().setUp()
+        conf = celery_app.conf
+        saved = {key: conf.get(key) for key in ('CELERY_TASK_ALWAYS_EAGER', 'CELERY_BROKER_URL')}
+        conf.update(CELERY_TASK_ALWAYS_EAGER=False, CELERY_BROKER_URL='memory://')
+        self.addCleanup(conf.update, saved)
+        # Fresh broker connections for this test only
+        for target, attribute in ((celery_app, '_pool'), (celery_app.amqp, '_producer_pool')):
+            patcher = patch.object(target, attribute, None)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        self.drain()
+        self.addCleanup(self.drain)
+
+    def drain(self):
+        with celery_app.connection_for_write() as conn:
+            queue = conn.SimpleQueue(celery_app.conf.task_default_queue, no_ack=True)
+            messages = []
+            while queue.qsize():
+                messages.append(queue.get(block=False))
+            queue.close()
+        return messages
+
+    def run_worker(self):
+        """Run every queued task here, as a worker would, and return their ids."""
+        ids = []
+        for message in self.drain():
+            args, kwargs, _ = message.payload
+            celery_app.tasks[message.headers['task']].apply(args, kwargs, task_id=message.headers['id'])
+            ids.append(message.headers['id'])
+        return ids
+
+
+class ApplicationBulkStatusTest(InMemoryBrokerMixin, TestCase):
+    client_class = QueryBudgetClient
+
+    def setUp(self):
+        super().setUp()
+        self.job = JobFactory()
+        self.recruiter = self.job.recruiter
+        self.applications = ApplicationFactory.create_batch(3, job=self.job, status='under_review')
+        self.other = ApplicationFactory(status='under_review')
+        self.client.force_login(self.recruiter.user)
+
+    def post(self, data):
+        response = self.client.post(reverse('application_bulk_status'), data)
+        outbox.relay()
+        self.run_worker()
+        return response
+
+    @override_settings(EMAIL_BATCH_SIZE=2)
+    def test_updates_ticked_applications_and_mails_in_chunks(self):
+        ids = [self.applications[0].id, self.applications[1].id, self.other.id]
+        with patch('JobPortal.tasks.mailer.send_messages', wraps=mailer.send_messages) as send:
+            response = self.post({'status': 'interview', 'application_ids': ids})
+        self.assertRedirects(response, reverse('application_list'), fetch_redirect_response=False)
+
+        statuses = dict(Application.objects.values_list('id', 'status'))
+        self.assertEqual(
+            [statuses[a.id] for a in [*self.applications, self.other]],
+            ['interview', 'interview', 'under_review', 'under_review'],
+        )
+        # Another recruiter's applicant is neither updated nor mailed
+        self.assertEqual(sorted(m.to[0] for m in mail.outbox), sorted(a.employee.user.email for a in self.applications[:2]))
+        self.assertEqual(send.call_count, 1)
+        self.assertGreater(Application.objects.get(pk=ids[0]).updated_at, self.applications[0].updated_at)
+
+    def test_rejects_everyone_under_review_for_a_job(self):
+        Application.objects.filter(pk=self.applications[2].pk).update(status='interview')
+        with patch('JobPortal.tasks.mailer.send_messages', wraps=mailer.send_messages) as send, \
+                override_settings(EMAIL_BATCH_SIZE=1):
+            self.post({'status': 'rejected', 'job': self.job.id, 'from_status': 'under_review'})
+        self.assertEqual(
+            list(self.job.applications.order_by('pk').values_list('status', flat=True)),
+            ['rejected', 'rejected', 'interview'],
+        )
+        self.assertEqual(len(mail.outbox), 2)
+        self.assertEqual(send.call_count, 2)
+
+
+class StatusHistoryTest(TestCase):
+
+    def setUp(self):
+        self.job = JobFactory()
+        self.recruiter = self.job.recruiter
+        self.application = ApplicationFactory(job=self.job)
+
+    def transitions(self, application):
+        return list(application.status_events.order_by('created_at', 'id').values_list('from_status', 'to_status'))
+
+    def test_update_status_writes_only_status_columns_and_logs(self):
+        with QueryRecorder() as recorder:
+            self.application.update_status('interview', self.recruiter.user)
+        update = next(q['sql'] for q in recorder.queries if q['sql'].startswith('UPDATE'))
+        self.assertNotIn('cover_letter', update)
+        event = self.application.status_events.get()
+        self.assertEqual((event.from_status, event.to_status, event.job_id, event.actor), ('submitted', 'interview', self.job.id, self.recruiter.user))
+
+        self.application.update_status('interview')  # unchanged: nothing logged
+        self.assertEqual(self.application.status_events.count(), 1)
+
+    def test_views_log_submission_and_bulk_changes(self):
+        employee = EmployeeFactory()
+        self.client.force_login(employee.user)
+        self.client.post(reverse('apply_job', args=[self.job.id]), {'cover_letter': 'Hi', 'phone_number': '123'})
+        applied = Application.objects.get(employee=employee)
+        self.assertEqual(self.transitions(applied), [('', 'submitted')])
+
+        self.client.force_login(self.recruiter.user)
+        with patch.object(ApplicationStatusEvent.objects, 'bulk_create', wraps=ApplicationStatusEvent.objects.bulk_create) as bulk_create:
+            self.client.post(reverse('application_bulk_status'), {'status': 'under_review', 'application_ids': [applied.id, self.application.id]})
+        self.assertEqual(bulk_create.call_count, 1)
+        self.assertEqual(self.transitions(applied), [('', 'submitted'), ('submitted', 'under_review')])
+        self.assertEqual(self.transitions(self.application), [('submitted', 'under_review')])
+
+    def test_buffer_flushes_in_batches_and_drops_on_error(self):
+        applications = ApplicationFactory.create_batch(5, job=self.job)
+        with patch.object(ApplicationStatusEvent.objects, 'bulk_create', wraps=ApplicationStatusEvent.objects.bulk_create) as bulk_create:
+            with history.buffered(batch_size=2):
+                for application in applications:
+                    application.update_status('rejected')
+                self.assertEqual(ApplicationStatusEvent.objects.count(), 4)
+        self.assertEqual(bulk_create.call_count, 3)
+        self.assertEqual(ApplicationStatusEvent.objects.count(), 5)
+
+        with self.assertRaises(ValueError), history.buffered():
+            history.record(self.application.id, self.job.id, 'submitted', 'offered')
+            raise ValueError
+        self.assertEqual(ApplicationStatusEvent.objects.count(), 5)
+
+    def test_funnel_and_time_in_stage_use_the_event_indexes(self):
+        start = timezone.now()
+        for application, steps in ((self.application, ['under_review', 'interview']), (ApplicationFactory(job=self.job), ['under_review'])):
+            history.record(application.id, self.job.id, '', 'submitted', at=start)
+            for hours, status in enumerate(steps, 1):
+                history.record(application.id, self.job.id, '', status, at=start + datetime.timedelta(hours=hours * 2))
+        history.record(ApplicationFactory().id, JobFactory().id, '', 'submitted')
+
+        with QueryRecorder() as recorder:
+            self.assertEqual(history.funnel(self.job.id), {'submitted': 2, 'under_review': 2, 'interview': 1})
+            stages = history.time_in_stage(self.job.id)
+        self.assertEqual(stages, {'submitted': datetime.timedelta(hours=2), 'under_review': datetime.timedelta(hours=2)})
+        self.assertEqual(history.funnel()['submitted'], 3)
+        # Sorting one job's events by application is expected; scanning is not
+        assert_queries_use_indexes(recorder, allow=['sort:'])
+        self.assertFalse(any('JobPortal_application"' in q['sql'] for q in recorder.queries))
+
+
+class OutboxTest(InMemoryBrokerMixin, TestCase):
+
+    def setUp(self):
+        super().setUp()
+        cache.clear()
+
+    def signup(self, email='new@example.com'):
+        return self.client.post(reverse('signup'), {
+            'email': email, 'name': 'New User', 'role': 'employee',
+            'password1': 'S3cure-pass-123', 'password2': 'S3cure-pass-123',
+        })
+
+    def test_signup_mail_waits_for_the_relay(self):
+        self.signup()
+        message = OutboxMessage.objects.get()
+        self.assertEqual((message.task, message.args[0]), ('JobPortal.tasks.send_welcome_email', 'new@example.com'))
+        self.assertEqual(self.drain(), [])
+
+        self.assertEqual(outbox.relay(), 1)
+        self.assertEqual(self.run_worker(), [message.dedup_key])
+        self.assertEqual(mail.outbox[0].to, ['new@example.com'])
+        self.assertIsNotNone(OutboxMessage.objects.get().sent_at)
+        stats = metrics.snapshot()
+        self.assertEqual((stats['outbox.dispatched'], stats['outbox.pending'], stats['outbox.lag_seconds']), (1, 0, 0))
+
+    def test_broker_outage_keeps_messages_for_the_next_run(self):
+        self.signup()
+        with patch('celery.app.task.Task.apply_async', side_effect=OperationalError('connection refused')):
+            self.assertEqual(outbox.relay(), 0)
+        message = OutboxMessage.objects.get()
+        self.assertEqual((message.sent_at, message.attempts, message.last_error), (None, 0, 'connection refused'))
+        self.assertEqual(metrics.snapshot()['outbox.pending'], 1)
+
+        self.assertEqual(outbox.relay(), 1)
+        self.assertEqual(len(self.drain()), 1)
+
+    def test_redelivered_message_runs_once(self):
+        self.signup()
+        outbox.relay()
+        # A relay that published but died before marking the batch sends it again
+        OutboxMessage.objects.update(sent_at=None)
+        outbox.relay()
+        self.assertEqual(len(set(self.run_worker())), 1)
+        self.assertEqual(len(mail.outbox), 1)
+
+    def test_enqueue_is_transactional_and_deduplicated(self):
+        with self.assertRaises(ValueError), transaction.atomic():
+            outbox.enqueue('JobPortal.tasks.send_email_batch', [], dedup_key='rolled-back')
+            raise ValueError
+        outbox.enqueue('JobPortal.tasks.send_email_batch', [], dedup_key='once')
+        outbox.enqueue('JobPortal.tasks.send_email_batch', [], dedup_key='once')
+        self.assertEqual(list(OutboxMessage.objects.values_list('dedup_key', flat=True)), ['once'])
+
+    @override_settings(OUTBOX_BATCH_SIZE=2, OUTBOX_MAX_ATTEMPTS=2)
+    def test_a_broken_message_does_not_hold_up_the_rest(self):
+        outbox.enqueue('JobPortal.tasks.no_such_task')
+        for n in range(3):
+            outbox.enqueue(send_email_batch, [], dedup_key=f'batch-{n}')
+        self.assertEqual(outbox.relay(), 3)
+        self.assertEqual(outbox.relay(), 0)
+        broken = OutboxMessage.objects.get(sent_at__isnull=True)
+        self.assertEqual(broken.attempts, 2)
+        self.assertIn('no_such_task', broken.last_error)
+        self.assertEqual(metrics.snapshot()['outbox.pending'], 0)
+
+
+class EmailTemplateTest(TestCase):
+
+    def setUp(self):
+        emails.compiled.cache_clear()
+
+    def test_values_are_escaped_in_html_only(self):
+        subject, text, html = emails.render('application_received', {
+            'applicant_name': '<script>x</script>', 'job_title': 'R&D', 'job_link': emails.link('job_detail', 5),
+        })
+        self.assertEqual(subject, 'New Application for R&D')
+        self.assertIn('<script>x</script> has applied for the position of R&D', text)
+        self.assertIn('&lt;script&gt;x&lt;/script&gt;', html)
+        self.assertNotIn('<script>', html)
+        self.assertIn(f'href="http://127.0.0.1:8000{reverse("job_detail", args=[5])}"', html)
+
+    def test_layout_and_templates_are_prepared_once_per_kind(self):
+        emails.build('welcome', 'a@example.com', {'name': 'A', 'role': 'employee'})
+        with patch('JobPortal.emails.get_template') as get_template:
+            messages = emails.build_batch('welcome', [(f'{n}@example.com', {'name': f'N{n}', 'role': 'recruiter'}) for n in range(3)])
+        get_template.assert_not_called()
+        self.assertEqual([m.to for m in messages], [[f'{n}@example.com'] for n in range(3)])
+        html = messages[2].alternatives[0][0]
+        self.assertIn('Welcome, N2!', html)
+        self.assertTrue(html.lstrip().startswith('<html>') and 'Your Job Portal Team' in html)
+
+    @override_settings(SITE_URL='https://jobs.example.com/')
+    def test_status_update_batch_fills_each_recipient(self):
+        from .tasks import send_application_status_update_batch
+        send_application_status_update_batch([['a@example.com', 'under_review', 'Dev', 1], ['b@example.com', 'offered', 'Ops', 2]])
+        first, second = mail.outbox
+        self.assertIn('updated to: Under Review', first.body)
+        self.assertIn(f'https://jobs.example.com{reverse("application_detail", args=[2])}', second.body)
+        self.assertIn('Offered', second.alternatives[0][0])
+
+
+class JobExpiryTest(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        past = timezone.now() - datetime.timedelta(days=1)
+        self.recruiter = RecruiterFactory()
+        self.expired = JobFactory.create_batch(5, recruiter=self.recruiter, application_deadline=past, title='Expired role')
+        self.open = JobFactory.create_batch(2, recruiter=self.recruiter, title='Open role')
+        self.open.append(JobFactory(recruiter=self.recruiter, application_deadline=None, title='Open role'))
+
+    def test_sweep_deactivates_in_batches_and_invalidates_cached_jobs(self):
+        self.assertTrue(get_job(self.expired[0].pk).is_active)
+        with QueryRecorder() as recorder:
+            self.assertEqual(expiry.expire_jobs(batch_size=2), 5)
+        assert_queries_use_indexes(recorder)
+
+        self.assertEqual(set(Job.objects.active()), set(self.open))
+        self.assertFalse(get_job(self.expired[0].pk).is_active)
+        stats = metrics.snapshot()
+        self.assertEqual((stats['job_expiry.last_rows'], stats['job_expiry.last_batches']), (5, 3))
+        self.assertEqual(expiry.expire_jobs(), 0)
+        self.assertEqual(metrics.snapshot()['job_expiry.expired'], 5)
+
+    def test_public_pages_show_only_active_jobs(self):
+        expiry.expire_jobs()
+        response = self.client.get(reverse('job_list'))
+        self.assertEqual({card['job'] for card in response.context['job_cards']}, set(self.open))
+        response = self.client.get(reverse('job_search'), {'q': 'role'})
+        self.assertEqual(set(response.context['jobs']), set(self.open))
+
+        self.client.force_login(self.recruiter.user)
+        response = self.client.get(reverse('job_list'))
+        self.assertEqual(len(response.context['job_cards']), 8)
+
+    def test_cannot_apply_to_an_inactive_job(self):
+        expiry.expire_jobs()
+        self.client.force_login(EmployeeFactory().user)
+        response = self.client.post(reverse('apply_job', args=[self.expired[0].pk]), {'cover_letter': 'Hi', 'phone_number': '123'})
+        self.assertRedirects(response, reverse('job_detail', args=[self.expired[0].pk]), fetch_redirect_response=False)
+        self.assertFalse(Application.objects.exists())
+
+
+class JobFacetsTest(TestCase):
+    client_class = QueryBudgetClient
+
+    def setUp(self):
+        cache.clear()
+        recruiter = RecruiterFactory()
+        JobFactory.create_batch(3, recruiter=recruiter, title='Python Developer', location='Pune', salary=60000)
+        JobFactory(recruiter=recruiter, title='Python Intern', location='Pune', job_type='internship', salary=20000)
+        JobFactory(recruiter=recruiter, title='Python Developer', location='Mumbai', job_type='contract', salary=None)
+        JobFactory(recruiter=recruiter, title='Sales Manager', location='Mumbai', salary=120000)
+
+    def test_counts_for_the_filtered_set_in_one_query(self):
+        with QueryRecorder() as recorder:
+            result = facets.compute(search_jobs(Job.objects.active(), text='python'))
+        self.assertEqual(len(recorder.queries), 1)
+        self.assertEqual(result['total'], 5)
+        self.assertEqual({value: count for value, _, count in result['job_type']},
+                         {'full_time': 3, 'part_time': 0, 'internship': 1, 'contract': 1})
+        self.assertEqual(result['location'], [('Pune', 4), ('Mumbai', 1)])
+        self.assertEqual(dict(result['salary'])[50000], 3)
+        self.assertEqual(dict(facets.compute(Job.objects.all())['salary'])[100000], 1)
+
+    def test_equivalent_searches_share_a_cache_entry(self):
+        self.assertEqual(facets.signature({'q': 'Developer  python', 'location': '', 'min_salary': '050'}),
+                         facets.signature({'q': 'python developer', 'min_salary': '50'}))
+        self.assertNotEqual(facets.signature({'q': 'python'}), facets.signature({'job_title': 'python'}))
+        # Queries without index terms are still told apart, and from no query at all
+        keys = {facets.signature({'q': q}) for q in ('IT', 'C++', '++', '')}
+        self.assertEqual(len(keys), 4)
+        self.assertEqual(facets.signature({'q': 'IT'}), facets.signature({'q': ' it '}))
+
+        first = self.client.get(reverse('job_search'), {'q': 'Python'})
+        second = self.client.get(reverse('job_search'), {'q': ' python '})
+        self.assertEqual(first.context['facets'], second.context['facets'])
+        self.assertEqual(first.context['facets']['total'], 5)
+        stats = metrics.snapshot()
+        self.assertEqual((stats['facets.hits'], stats['facets.misses']), (1, 1))
+        self.assertContains(second, 'Internship</a> <span class="facet-count">(1)</span>', html=False)
+
+
+class LocationsTest(TestCase):
+    client_class = QueryBudgetClient
+
+    def setUp(self):
+        cache.clear()
+        locations.load_gazetteer()
+        recruiter = RecruiterFactory()
+        self.bengaluru = JobFactory(recruiter=recruiter, title='Backend Developer', location='Bangalore')
+        self.mysuru = JobFactory(recruiter=recruiter, title='Backend Developer', location='Mysore, Karnataka')
+        self.chennai = JobFactory(recruiter=recruiter, title='Backend Developer', location='Chennai')
+        self.unknown = JobFactory(recruiter=recruiter, title='Backend Developer', location='Atlantis')
+
+    def test_spellings_resolve_to_one_city(self):
+        city = City.objects.get(name='Bengaluru')
+        self.assertEqual(locations.resolve_many(['Bangalore', 'Bengaluru', 'Bengaluru, KA', ' BENGALURU ']),
+                         dict.fromkeys(['Bangalore', 'Bengaluru', 'Bengaluru, KA', ' BENGALURU '], city.pk))
+        self.assertEqual(self.bengaluru.city, city)
+        self.assertIsNone(self.unknown.city)
+        self.assertEqual(EmployeeFactory(location='Bombay').city.name, 'Mumbai')
+        # Reloading updates in place
+        self.assertEqual(locations.load_gazetteer()[0], City.objects.count())
+
+    def test_link_locations_backfills_unlinked_rows(self):
+        Job.objects.update(city=None)
+        get_job(self.chennai.pk)
+        self.assertEqual(locations.link_locations(Job, batch_size=2), 3)
+        self.assertEqual(get_job(self.chennai.pk).city.name, 'Chennai')
+
+    def test_bounding_box_encloses_the_circle(self):
+        self.assertEqual(locations.bounding_box(89.5, 10, 100)[2], [(-180, 180)])
+        min_lat, max_lat, lon_ranges = locations.bounding_box(-17, 179.5, 200)
+        self.assertEqual(len(lon_ranges), 2)
+        # Every point on the circle lies inside the box
+        for bearing in range(0, 360, 5):
+            lat, lon = self.destination(-17, 179.5, bearing, 199.9)
+            self.assertTrue(min_lat <= lat <= max_lat)
+            self.assertTrue(any(low <= lon <= high for low, high in lon_ranges))
+
+    def destination(self, lat, lon, bearing, km):
+        lat, lon, bearing, angle = math.radians(lat), math.radians(lon), math.radians(bearing), km / locations.EARTH_RADIUS_KM
+        lat2 = math.asin(math.sin(lat) * math.cos(angle) + math.cos(lat) * math.sin(angle) * math.cos(bearing))
+        lon2 = lon + math.atan2(math.sin(bearing) * math.sin(angle) * math.cos(lat), math.cos(angle) - math.sin(lat) * math.sin(lat2))
+        return math.degrees(lat2), (math.degrees(lon2) + 540) % 360 - 180
+
+    def test_radius_search(self):
+        origin = locations.find_city('Bengaluru, Karnataka')
+        distances = locations.cities_within(origin.latitude, origin.longitude, 150)
+        self.assertEqual(set(distances), {origin.pk, self.mysuru.city_id})
+        self.assertAlmostEqual(distances[self.mysuru.city_id], 128, delta=5)
+        self.assertEqual(set(locations.jobs_within(Job.objects.all(), origin, 400)), {self.bengaluru, self.mysuru, self.chennai})
+
+        response = self.client.get(reverse('job_search'), {'q': 'backend', 'location': 'bangalore', 'radius': '150'})
+        self.assertEqual(set(response.context['jobs']), {self.bengaluru, self.mysuru})
+        # Without a radius, or for an unknown place, the location is matched as text
+        response = self.client.get(reverse('job_search'), {'location': 'bangalore'})
+        self.assertEqual(list(response.context['jobs']), [self.bengaluru])
+        response = self.client.get(reverse('job_search'), {'location': 'atlantis', 'radius': '50'})
+        self.assertEqual(list(response.context['jobs']), [self.unknown])
+
+
+class RecommendationsTest(TestCase):
+    client_class = QueryBudgetClient
+
+    def setUp(self):
+        cache.clear()
+        locations.load_gazetteer()
+        recruiter = RecruiterFactory()
+        self.python_pune = JobFactory(recruiter=recruiter, title='Python Developer', location='Pune',
+                                      description='Django and python services')
+        self.python_delhi = JobFactory(recruiter=recruiter, title='Python Engineer', location='Delhi',
+                                       description='Backend python APIs')
+        self.sales_pune = JobFactory(recruiter=recruiter, title='Sales Manager', location='Pune',
+                                     description='Grow enterprise accounts')
+        closed = JobFactory(recruiter=recruiter, title='Python Developer', location='Mumbai',
+                            description='Django services', is_active=False)
+        self.employee = EmployeeFactory(location='Pune')
+        ApplicationFactory(employee=self.employee, job=closed, status='interview')
+        ApplicationFactory(employee=EmployeeFactory(location='Delhi'), job=self.sales_pune)
+
+    def test_ranks_by_text_location_and_popularity(self):
+        newcomer = EmployeeFactory(location='Atlantis')
+        self.assertEqual(recommendations.compute_recommendations(top_k=3, block_size=3), 6)
+
+        ranked = list(JobRecommendation.objects.filter(employee=self.employee).order_by('rank'))
+        # The closed job's text and the employee's city both point at the first;
+        # a popular job next door still beats a similar one 1,200 km away
+        self.assertEqual([r.job for r in ranked], [self.python_pune, self.sales_pune, self.python_delhi])
+        self.assertGreater(ranked[0].score, ranked[1].score)
+        # No history and no city: popularity alone, and only jobs that have any
+        self.assertEqual([r.job for r in JobRecommendation.objects.filter(employee=newcomer)], [self.sales_pune])
+        # Jobs already applied to are never suggested
+        self.assertFalse(JobRecommendation.objects.filter(job=self.sales_pune, employee__applications__job=self.sales_pune).exists())
+        self.assertEqual(metrics.snapshot()['recommendations.last_rows'], 6)
+
+    def test_rerun_replaces_rows_and_dashboard_shows_them(self):
+        recommendations.compute_recommendations()
+        self.python_delhi.is_active = False
+        self.python_delhi.save()
+        recommendations.compute_recommendations()
+        self.assertFalse(JobRecommendation.objects.filter(job=self.python_delhi).exists())
+
+        self.client.force_login(self.employee.user)
+        response = self.client.get(reverse('employee_dashboard'))
+        self.assertEqual([r.job for r in response.context['recommendations']], [self.python_pune, self.sales_pune])
+        self.assertContains(response, 'Recommended for You')
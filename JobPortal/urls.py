@@ -1,7 +1,10 @@
-from django.urls import path
+from django.urls import include, path
 from . import views
 from django.conf import settings
 from django.conf.urls.static import static
+from rest_framework.routers import DefaultRouter
+from rest_framework_simplejwt.views import TokenObtainPairView, TokenRefreshView
+from . import api
 from .views import (
     job_search,
     application_list,
@@ -21,6 +24,10 @@ from .views import (
     application_detail_view,
 )
 
+router = DefaultRouter()
+router.register('jobs', api.JobViewSet, basename='api-job')
+router.register('applications', api.ApplicationViewSet, basename='api-application')
+
 
 urlpatterns = [
     path('signup/', signup_view, name='signup'),
@@ -32,6 +39,8 @@ urlpatterns = [
     path('jobs/<int:job_id>/', job_detail_view, name='job_detail'),
     path('jobs/<int:job_id>/apply/', apply_job, name='apply_job'),
     path('applications/', application_list, name='application_list'),
+    path('applications/export/', views.application_export, name='application_export'),
+    path('applications/status/', views.application_bulk_status, name='application_bulk_status'),
     path('applications/<int:application_id>/', application_detail_view, name='application_detail'),
  
     path('employee/dashboard/', employee_dashboard_view, name='employee_dashboard'),
@@ -47,6 +56,10 @@ urlpatterns = [
     path('recruiters/<int:recruiter_id>/', views.recruiter_detail_view, name='recruiter_detail'),
     
     path('logout/', views.user_logout, name='logout'),
+
+    path('api/', include(router.urls)),
+    path('api/token/', TokenObtainPairView.as_view(), name='token_obtain_pair'),
+    path('api/token/refresh/', TokenRefreshView.as_view(), name='token_refresh'),
     
 ]
 if settings.DEBUG:
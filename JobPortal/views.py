@@ -1,21 +1,38 @@
+from asgiref.sync import sync_to_async
 from django.shortcuts import render, redirect, get_object_or_404
 from django.contrib.auth.decorators import login_required
 from django.contrib import messages
 from django.contrib.auth import logout, login, authenticate
+from django.db import IntegrityError, transaction
+from django.http import StreamingHttpResponse
+from django.template.defaultfilters import pluralize
+from django.utils import timezone
+import asyncio
+import csv
+import itertools
 from .forms import SignupForm, EmployeeForm, RecruiterForm, JobForm, ApplicationForm
-from .models import Employee, Recruiter, Job, Application
-from django.core.paginator import Paginator
-from .tasks import send_application_notification, send_application_status_update_notification, send_welcome_email
+from .models import Employee, Recruiter, Job, Application, JobRecommendation, PendingNotification
+from .cache import aget_job_or_404, get_job_or_404, job_cards
+from . import facets, history, locations, outbox
+from .pagination import CursorPaginator, iterate_in_chunks
+from .profiles import aget_profile, aget_user, aprofile_or_404, get_profile, profile_or_404
+from .search import search_jobs
+from .stats import get_dashboard_stats
+from .tasks import (
+    send_application_notification, send_application_status_update_batch,
+    send_application_status_update_notification, send_welcome_email,
+)
 
 
 def signup_view(request):
     if request.method == 'POST':
         form = SignupForm(request.POST)
         if form.is_valid():
-            user = form.save()
-            login(request, user)
-
-            send_welcome_email.delay(user.email, user.name, user.role)
+            with transaction.atomic():
+                user = form.save()
+                outbox.enqueue(send_welcome_email, user.email, user.name, user.role, dedup_key=f'welcome:{user.pk}')
+            # Not authenticated through a backend, and more than one is configured
+            login(request, user, backend='JobPortal.profiles.ProfileBackend')
 
             return redirect('recruiter_profile_update' if user.role == 'recruiter' else 'employee_profile_update')
     else:
@@ -25,7 +42,7 @@ def signup_view(request):
 
 @login_required
 def employee_profile_update(request):
-    employee, _ = Employee.objects.get_or_create(user=request.user)
+    employee = get_profile(request, Employee) or Employee.objects.get_or_create(user=request.user)[0]
     form = EmployeeForm(request.POST or None, request.FILES or None, instance=employee)
     if request.method == 'POST' and form.is_valid():
         form.save()
@@ -35,7 +52,7 @@ def employee_profile_update(request):
 
 @login_required
 def recruiter_profile_update(request):
-    recruiter, _ = Recruiter.objects.get_or_create(user=request.user)
+    recruiter = get_profile(request, Recruiter) or Recruiter.objects.get_or_create(user=request.user)[0]
     form = RecruiterForm(request.POST or None, instance=recruiter)
     if request.method == 'POST' and form.is_valid():
         form.save()
@@ -62,41 +79,14 @@ def login_view(request):
 
 
 @login_required
-def superadmin_dashboard_view(request):
-    if request.user.role != 'superadmin':
+async def superadmin_dashboard_view(request):
+    user = await aget_user(request)
+    if user.role != 'superadmin':
         return redirect('login')  # Redirect if not a superadmin
 
-    # Count all users based on roles
-    employees_count = Employee.objects.count()
-    recruiters_count = Recruiter.objects.count()
-    jobs_count = Job.objects.count()
-
-    # Assuming there is a Guest model
-    # guest_users_count = Guest.objects.count()
-
-    # Active and deactivated recruiters and employees
-    active_recruiters_count = Recruiter.objects.filter(user__is_active=True).count()
-    deactivated_recruiters_count = Recruiter.objects.filter(user__is_active=False).count()
-
-    active_employees_count = Employee.objects.filter(user__is_active=True).count()
-    deactivated_employees_count = Employee.objects.filter(user__is_active=False).count()
-
-    # Job posts (assuming jobs have active/deactivated statuses)
-    active_jobs_count = Job.objects.filter(is_active=True).count()
-    deactivated_jobs_count = Job.objects.filter(is_active=False).count()
-
     # Render superadmin dashboard
     return render(request, 'dashboard/superadmin_dashboard.html', {
-        'employees_count': employees_count,
-        'recruiters_count': recruiters_count,
-        'jobs_count': jobs_count,
-        # 'guest_users_count': guest_users_count,
-        'active_recruiters_count': active_recruiters_count,
-        'deactivated_recruiters_count': deactivated_recruiters_count,
-        'active_employees_count': active_employees_count,
-        'deactivated_employees_count': deactivated_employees_count,
-        'active_jobs_count': active_jobs_count,
-        'deactivated_jobs_count': deactivated_jobs_count,
+        **await sync_to_async(get_dashboard_stats)(),
         'message': 'Welcome to the Superadmin Dashboard!',
     })
 
@@ -108,9 +98,9 @@ def recruiter_list_view(request):
         messages.error(request, 'You do not have permission to view this page.')
         return redirect('login')
 
-    recruiters = Recruiter.objects.all() 
-    paginator = Paginator(recruiters, 10) 
-    page_obj = paginator.get_page(request.GET.get('page'))
+    recruiters = Recruiter.objects.select_related('user')
+    paginator = CursorPaginator(recruiters, 10, ordering=('id',), approximate_count=True)
+    page_obj = paginator.get_page(request.GET.get('cursor'))
 
     return render(request, 'dashboard/recruiter_list.html', {'page_obj': page_obj})
 
@@ -121,9 +111,9 @@ def employee_list_view(request):
         messages.error(request, 'You do not have permission to view this page.')
         return redirect('login') 
 
-    employees = Employee.objects.all() 
-    paginator = Paginator(employees, 10)
-    page_obj = paginator.get_page(request.GET.get('page'))
+    employees = Employee.objects.select_related('user')
+    paginator = CursorPaginator(employees, 10, ordering=('id',), approximate_count=True)
+    page_obj = paginator.get_page(request.GET.get('cursor'))
 
     return render(request, 'dashboard/employee_list.html', {'page_obj': page_obj})
 
@@ -134,7 +124,7 @@ def employee_list_view(request):
 
 @login_required
 def recruiter_detail_view(request, recruiter_id):
-    recruiter = get_object_or_404(Recruiter, id=recruiter_id)
+    recruiter = get_object_or_404(Recruiter.objects.select_related('user'), id=recruiter_id)
 
     # Only superadmins can view recruiter details
     if request.user.role != 'superadmin':
@@ -156,7 +146,7 @@ def recruiter_detail_view(request, recruiter_id):
 
 @login_required
 def employee_detail_view(request, employee_id):
-    employee = get_object_or_404(Employee, id=employee_id)
+    employee = get_object_or_404(Employee.objects.select_related('user'), id=employee_id)
 
     # Only superadmins can view employee details
     if request.user.role != 'superadmin':
@@ -174,22 +164,40 @@ def employee_detail_view(request, employee_id):
     return render(request, 'dashboard/employee_detail.html', {'employee': employee})
 
 
+# The read-heavy pages below are async so an ASGI server doesn't tie up a
+# thread per request. Querysets are evaluated in the view: templates run
+# sync code and must not hit the database.
+
 @login_required
-def employee_dashboard_view(request):
-    employee = Employee.objects.get(user=request.user)
-    applications = Application.objects.filter(employee=employee)
-    return render(request, 'dashboard/employee_dashboard.html', {'applications': applications})
+async def employee_dashboard_view(request):
+    employee = await aprofile_or_404(request, Employee)
+
+    async def applications():
+        return [a async for a in Application.objects.filter(employee=employee).select_related('job__recruiter')]
+
+    async def recommendations():
+        # Precomputed nightly; read through the (employee, rank) index
+        return [r async for r in JobRecommendation.objects.filter(employee=employee, job__is_active=True)
+                .select_related('job__recruiter').order_by('rank')]
+
+    applications, recommendations = await asyncio.gather(applications(), recommendations())
+    return render(request, 'dashboard/employee_dashboard.html', {
+        'applications': applications,
+        'recommendations': recommendations,
+    })
 
 
 @login_required
-def recruiter_dashboard_view(request):
-    recruiter = get_object_or_404(Recruiter, user=request.user)
-    jobs = Job.objects.filter(recruiter=recruiter).order_by('-posted_date')
+async def recruiter_dashboard_view(request):
+    recruiter = await aprofile_or_404(request, Recruiter)
+    jobs = [job async for job in Job.objects.filter(recruiter=recruiter).order_by('-posted_date')]
     return render(request, 'dashboard/recruiter_dashboard.html', {'jobs': jobs, 'message': 'Welcome to the Recruiter Dashboard!'})
 
 
-def job_search(request):
+async def job_search(request):
+    await aget_user(request)
     search_params = {
+        'q': request.GET.get('q', '').strip(),
         'company_name': request.GET.get('company_name', '').strip(),
         'job_title': request.GET.get('job_title', '').strip(),
         'job_type': request.GET.get('job_type', ''),
@@ -197,17 +205,27 @@ def job_search(request):
         'min_salary': request.GET.get('min_salary', ''),
         'posted_after': request.GET.get('posted_after', ''),
         'deadline_before': request.GET.get('deadline_before', ''),
+        'radius': request.GET.get('radius', '').strip(),
     }
 
-    jobs = Job.objects.all()
-    if search_params['company_name']:
-        jobs = jobs.filter(recruiter__company_name__icontains=search_params['company_name'])
-    if search_params['job_title']:
-        jobs = jobs.filter(title__icontains=search_params['job_title'])
+    # With a radius, a location that names a known city matches every city
+    # within it; otherwise the location is searched as text
+    origin = None
+    if search_params['radius'].isdigit() and search_params['location']:
+        origin = await sync_to_async(locations.find_city)(search_params['location'])
+
+    # Free-text criteria go through the search index, the rest are plain filters
+    jobs = search_jobs(
+        Job.objects.active().select_related('recruiter'),
+        text=search_params['q'],
+        title=search_params['job_title'],
+        company=search_params['company_name'],
+        location='' if origin else search_params['location'],
+    )
+    if origin:
+        jobs = await sync_to_async(locations.jobs_within)(jobs, origin, int(search_params['radius']))
     if search_params['job_type']:
         jobs = jobs.filter(job_type=search_params['job_type'])
-    if search_params['location']:
-        jobs = jobs.filter(location__icontains=search_params['location'])
     if search_params['min_salary'].isdigit():
         jobs = jobs.filter(salary__gte=int(search_params['min_salary']))
     if search_params['posted_after']:
@@ -215,74 +233,174 @@ def job_search(request):
     if search_params['deadline_before']:
         jobs = jobs.filter(application_deadline__lte=search_params['deadline_before'])
 
-    return render(request, 'jobs/job_search.html', {'jobs': jobs, **search_params})
+    async def results():
+        return [job async for job in jobs]
+
+    # The facet counts don't depend on the result rows
+    jobs, job_facets = await asyncio.gather(results(), sync_to_async(facets.job_facets)(search_params, jobs))
+    return render(request, 'jobs/job_search.html', {'jobs': jobs, 'facets': job_facets, **search_params})
+
 
+async def applied_job_ids(employee):
+    if employee is None:
+        return set()
+    return {job_id async for job_id in Application.objects.filter(employee=employee).values_list('job_id', flat=True)}
 
-def job_list_view(request):
-    jobs = Job.objects.filter(recruiter__user=request.user) if request.user.is_authenticated and request.user.role == 'recruiter' else Job.objects.all()
 
-    paginator = Paginator(jobs, 10)
-    page_obj = paginator.get_page(request.GET.get('page'))
+async def job_list_view(request):
+    user = await aget_user(request)
+    # Recruiters see all their own postings, everyone else only open ones
+    jobs = Job.objects.filter(recruiter__user=user) if user.is_authenticated and user.role == 'recruiter' else Job.objects.active()
+    jobs = jobs.select_related('recruiter')
 
-    applied_job_ids = []
-    if request.user.is_authenticated and request.user.role == 'employee':
-        employee = Employee.objects.get(user=request.user)
-        applied_job_ids = Application.objects.filter(employee=employee).values_list('job_id', flat=True)
+    paginator = CursorPaginator(jobs, 10, ordering=('-posted_date', '-id'))
+    employee = await aget_profile(request, Employee)
+    # Neither query needs the other's result
+    page_obj, applied = await asyncio.gather(
+        paginator.aget_page(request.GET.get('cursor')),
+        applied_job_ids(employee),
+    )
+
+    return render(request, 'jobs/job_list.html', {
+        'page_obj': page_obj,
+        'job_cards': await sync_to_async(job_cards)(page_obj),
+        'applied_job_ids': applied,
+    })
 
-    return render(request, 'jobs/job_list.html', {'page_obj': page_obj, 'applied_job_ids': applied_job_ids})
+
+async def has_applied(user, job_id):
+    if user.role != 'employee':
+        return False
+    return await Application.objects.filter(employee__user=user, job_id=job_id).aexists()
 
 
 @login_required
-def job_detail_view(request, job_id):
-    job = get_object_or_404(Job, id=job_id)
-    already_applied = Application.objects.filter(employee__user=request.user, job=job).exists() if request.user.role == 'employee' else False
+async def job_detail_view(request, job_id):
+    user = await aget_user(request)
+    job, already_applied = await asyncio.gather(aget_job_or_404(job_id), has_applied(user, job_id))
     return render(request, 'jobs/job_detail.html', {'job': job, 'already_applied': already_applied})
 
 
+def notify_recruiter(job, application, applicant):
+    """Buffer the application for the recruiter's digest, or queue an email in the outbox."""
+    if job.recruiter.notification_mode == 'digest':
+        PendingNotification.objects.create(recruiter=job.recruiter, application=application)
+    else:
+        outbox.enqueue(
+            send_application_notification, job.recruiter.user.email, job.title, applicant.name, job.id,
+            dedup_key=f'application:{application.pk}',
+        )
+
+
 @login_required
 def apply_job(request, job_id):
     if request.user.role != 'employee':
         messages.error(request, 'Only employees can apply for jobs.')
         return redirect('job_list')
 
-    job = get_object_or_404(Job, id=job_id)
-    employee = get_object_or_404(Employee, user=request.user)
+    if request.method == 'POST':
+        # The cached bundle stops at the recruiter; notify_recruiter needs their
+        # email too, so a submit loads all three rows in one joined query
+        job = get_object_or_404(Job.objects.select_related('recruiter__user'), pk=job_id)
+    else:
+        job = get_job_or_404(job_id)
+    if not job.is_active:
+        messages.error(request, 'This job is no longer accepting applications.')
+        return redirect('job_detail', job_id=job.id)
+    employee = profile_or_404(request, Employee)
 
+    form = ApplicationForm(request.POST or None, employee=employee)
+    if request.method == 'POST' and form.is_valid():
+        application = form.save(commit=False)
+        application.job = job
+        application.employee = employee
+        # The unique (employee, job) constraint decides duplicates, so a double
+        # submit can't slip in between a check and the insert.
+        try:
+            with transaction.atomic():
+                application.save()
+                history.record(application.pk, job.pk, '', application.status, request.user)
+                notify_recruiter(job, application, request.user)
+        except IntegrityError:
+            messages.error(request, 'You have already applied for this job.')
+            return redirect('application_list')
+
+        messages.success(request, 'Your application has been submitted successfully!')
+        return redirect('application_list')
+
+    # Off the submit path: tell returning applicants before they fill the form in
     if Application.objects.filter(employee=employee, job=job).exists():
         messages.error(request, 'You have already applied for this job.')
         return redirect('application_list')
 
-    if request.method == 'POST':
-        form = ApplicationForm(request.POST, user=request.user)
-        if form.is_valid():
-            application = form.save(commit=False)
-            application.job = job
-            application.employee = employee
-            application.save()
-
-            send_application_notification.delay(job.recruiter.user.email, job.title, request.user.name, job_id)
-
-            messages.success(request, 'Your application has been submitted successfully!')
-            return redirect('application_list')
-    else:
-        form = ApplicationForm(user=request.user)
-
     return render(request, 'jobs/job_apply.html', {'job': job, 'form': form})
 
 
 @login_required
 def application_list(request):
     applications = Application.objects.filter(employee__user=request.user) if request.user.role == 'employee' else Application.objects.filter(job__recruiter__user=request.user)
+    applications = applications.select_related('job__recruiter')
 
-    paginator = Paginator(applications, 5)
-    page_obj = paginator.get_page(request.GET.get('page'))
+    paginator = CursorPaginator(applications, 5, ordering=('-submitted_at', '-id'))
+    page_obj = paginator.get_page(request.GET.get('cursor'))
 
     return render(request, 'applications/application_list.html', {'page_obj': page_obj})
 
 
+EXPORT_CHUNK_SIZE = 2000
+
+
+class Echo:
+    """File-like object for csv.writer that returns each line instead of storing it."""
+
+    def write(self, value):
+        return value
+
+
+# Spreadsheets run a cell that starts with one of these as a formula
+FORMULA_PREFIXES = ('=', '+', '-', '@', '\t', '\r')
+
+
+def spreadsheet_safe(value):
+    """Text an applicant typed in, quoted so Excel or Sheets shows it instead of evaluating it."""
+    return f"'{value}" if isinstance(value, str) and value.startswith(FORMULA_PREFIXES) else value
+
+
+@login_required
+def application_export(request):
+    if request.user.role != 'recruiter':
+        return render(request, '403.html')
+
+    applications = Application.objects.filter(job__recruiter__user=request.user)
+    if request.GET.get('job', '').isdigit():
+        applications = applications.filter(job_id=request.GET['job'])
+    if request.GET.get('status') in dict(Application.status.field.choices):
+        applications = applications.filter(status=request.GET['status'])
+    applications = applications.select_related('employee__user', 'job').only(
+        'status', 'submitted_at', 'job__title', 'employee__phone_number', 'employee__location',
+        'employee__user__name', 'employee__user__email',
+    )
+
+    # Rows are written as they are fetched, so large exports start downloading at once
+    writer = csv.writer(Echo())
+    header = ['Application ID', 'Job ID', 'Job Title', 'Applicant', 'Email', 'Phone', 'Location', 'Status', 'Submitted At']
+    rows = (
+        [a.id, a.job_id, *map(spreadsheet_safe, [
+            a.job.title, a.employee.user.name, a.employee.user.email, a.employee.phone_number, a.employee.location,
+        ]), a.get_status_display(), a.submitted_at.isoformat()]
+        for a in iterate_in_chunks(applications, EXPORT_CHUNK_SIZE)
+    )
+    response = StreamingHttpResponse(
+        (writer.writerow(row) for row in itertools.chain([header], rows)),
+        content_type='text/csv',
+    )
+    response['Content-Disposition'] = 'attachment; filename="applicants.csv"'
+    return response
+
+
 @login_required
 def application_detail_view(request, application_id):
-    application = get_object_or_404(Application, id=application_id)
+    application = get_object_or_404(Application.objects.select_related('employee__user', 'job__recruiter__user'), id=application_id)
     is_employee = application.employee.user == request.user
     is_recruiter = application.job.recruiter.user == request.user
 
@@ -291,14 +409,13 @@ def application_detail_view(request, application_id):
 
     if request.method == 'POST' and is_recruiter:
         new_status = request.POST.get('status')
-        application.update_status(new_status, request.user) 
-        
-        # Send notification to the employee about the status update
-        employee_email = application.employee.user.email
-        job_title = application.job.title
-        
-        # Pass the application_id to the notification task
-        send_application_status_update_notification.delay(employee_email, new_status, job_title, application.id)
+        with transaction.atomic():
+            application.update_status(new_status, request.user)
+
+            # Notify the employee about the status update once this commits
+            employee_email = application.employee.user.email
+            job_title = application.job.title
+            outbox.enqueue(send_application_status_update_notification, employee_email, new_status, job_title, application.id)
 
         messages.success(request, 'Application status updated successfully!')
         return redirect('application_list')  # Redirect to the application list after updating status
@@ -312,9 +429,50 @@ def application_detail_view(request, application_id):
 
 
 
+@login_required
+def application_bulk_status(request):
+    """
+    Set one status on many of the recruiter's applications: the ticked
+    ``application_ids``, or all of ``job`` currently in ``from_status``. One
+    UPDATE, one history INSERT and one outbox message for a task that mails
+    every applicant.
+    """
+    job_id = request.POST.get('job', '')
+    back = 'recruiter_dashboard' if job_id else 'application_list'
+    if request.method != 'POST' or request.user.role != 'recruiter':
+        return redirect('application_list')
+    new_status = request.POST.get('status')
+    if new_status not in dict(Application.status.field.choices):
+        messages.error(request, 'Choose a valid status.')
+        return redirect(back)
+
+    applications = Application.objects.filter(job__recruiter__user=request.user).exclude(status=new_status)
+    if job_id:
+        applications = applications.filter(job_id=job_id, status=request.POST.get('from_status')) if job_id.isdigit() else applications.none()
+    else:
+        applications = applications.filter(pk__in=[pk for pk in request.POST.getlist('application_ids') if pk.isdigit()])
+
+    now = timezone.now()
+    with transaction.atomic(), history.buffered():
+        # Only the application rows are locked, not the users and jobs joined in
+        rows = list(
+            applications.select_for_update(of=('self',))
+            .values_list('id', 'job_id', 'status', 'employee__user__email', 'job__title')
+        )
+        Application.objects.filter(pk__in=[row[0] for row in rows]).update(status=new_status, updated_at=now)
+        for pk, job, status, _, _ in rows:
+            history.record(pk, job, status, new_status, request.user, at=now)
+        if rows:
+            notifications = [[email, new_status, title, pk] for pk, _, _, email, title in rows]
+            outbox.enqueue(send_application_status_update_batch, notifications)
+
+    messages.success(request, f'{len(rows)} application{pluralize(len(rows))} updated.')
+    return redirect(back)
+
+
 @login_required
 def create_job_view(request):
-    recruiter = get_object_or_404(Recruiter, user=request.user)
+    recruiter = profile_or_404(request, Recruiter)
     form = JobForm(request.POST or None)
     if request.method == 'POST' and form.is_valid():
         job = form.save(commit=False)
@@ -327,23 +485,29 @@ def create_job_view(request):
 
 @login_required
 def update_job_view(request, job_id):
-    job = get_object_or_404(Job, id=job_id)
-    form = JobForm(request.POST or None, instance=job)
-    if request.method == 'POST' and form.is_valid():
-        form.save()
-        messages.success(request, 'Job updated successfully!')
-        return redirect('recruiter_dashboard')
+    if request.method != 'POST':
+        form = JobForm(instance=get_job_or_404(job_id))
+        return render(request, 'jobs/job_post_form.html', {'job_form': form, 'is_update': True})
+
+    # The cached copy is only for reads: saving it would write back whatever
+    # it holds for the columns the form doesn't cover (is_active, city, ...)
+    with transaction.atomic():
+        job = get_object_or_404(Job.objects.select_for_update(), pk=job_id)
+        form = JobForm(request.POST, instance=job)
+        if form.is_valid():
+            form.save()
+            messages.success(request, 'Job updated successfully!')
+            return redirect('recruiter_dashboard')
     return render(request, 'jobs/job_post_form.html', {'job_form': form, 'is_update': True})
 
 
 @login_required
 def delete_job_view(request, job_id):
-    job = get_object_or_404(Job, id=job_id)
     if request.method == 'POST':
-        job.delete()
+        get_object_or_404(Job, pk=job_id).delete()
         messages.success(request, 'Job deleted successfully!')
         return redirect('recruiter_dashboard')
-    return render(request, 'jobs/delete_job.html', {'job': job})
+    return render(request, 'jobs/delete_job.html', {'job': get_job_or_404(job_id)})
 
 
 def user_logout(request):
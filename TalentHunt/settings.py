@@ -13,6 +13,7 @@ https://docs.djangoproject.com/en/5.0/ref/settings/
 from pathlib import Path
 import os
 from dotenv import load_dotenv
+from celery.schedules import crontab
 
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
@@ -54,10 +55,39 @@ MIDDLEWARE = [
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'JobPortal.profiles.ProfileMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
 
+# Per-request SQL reporting (X-Query-Count / X-DB-Time headers, N+1 warnings)
+if DEBUG:
+    MIDDLEWARE.insert(0, 'JobPortal.profiling.QueryBudgetMiddleware')
+
+# Maximum SQL queries per request by URL name, session and auth lookups included.
+# QueryBudgetClient fails tests that go over; QueryBudgetMiddleware logs it.
+QUERY_BUDGETS = {
+    'job_list': 4,
+    'job_search': 6,  # facets only on a cache miss; a radius adds the city and bounding-box lookups
+    'job_detail': 4,
+    'apply_job': 8,  # submit: one joined job/recruiter/user SELECT, then the inserts in a savepoint
+    'application_list': 3,
+    'application_detail': 4,
+    'application_bulk_status': 8,  # any number of rows: one SELECT, one UPDATE, one history and one outbox INSERT
+    'employee_dashboard': 4,  # applications and recommendations
+    'recruiter_dashboard': 3,
+    'superadmin_dashboard': 5,
+    'recruiter_list': 3,
+    'employee_list': 3,
+    'recruiter_detail': 3,
+    'employee_detail': 3,
+    # JSON API: JWT user lookup plus the page query
+    'api-job-list': 2,
+    'api-job-detail': 2,
+    'api-application-list': 2,
+    'api-application-detail': 2,
+}
+
 ROOT_URLCONF = 'TalentHunt.urls'
 
 TEMPLATES = [
@@ -101,6 +131,26 @@ DATABASES = {
 }
 
 
+# Redis in deployments (set REDIS_CACHE_URL), per-process memory otherwise
+if os.getenv('REDIS_CACHE_URL'):
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': os.getenv('REDIS_CACHE_URL'),
+        }
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        }
+    }
+
+# Seconds to keep signed-in users (with their profile) cached between requests.
+# Only with a shared cache: a per-process one would miss invalidations.
+PROFILE_CACHE_TIMEOUT = int(os.getenv('PROFILE_CACHE_TIMEOUT', 300 if os.getenv('REDIS_CACHE_URL') else 0))
+
+
 # Password validation
 # https://docs.djangoproject.com/en/5.0/ref/settings/#auth-password-validators
 
@@ -175,6 +225,14 @@ EMAIL_HOST_PASSWORD = os.getenv('EMAIL_HOST_PASSWORD', 'rzmj rxkx kmnr lxxo')
 EMAIL_USE_TLS = True
 DEFAULT_FROM_EMAIL = EMAIL_HOST_USER  # Use the same default sender
 
+# Open SMTP connections each worker process keeps for reuse (see JobPortal/mailer.py)
+EMAIL_POOL_SIZE = 2
+EMAIL_POOL_MAX_IDLE = 60
+# Messages per SMTP send in batched notification tasks
+EMAIL_BATCH_SIZE = 100
+# Recruiters whose buffered applications send_recruiter_digests loads at once
+DIGEST_BATCH_SIZE = 500
+
 
 
 # TalentHunt/settings.py
@@ -184,6 +242,52 @@ CELERY_BROKER_URL = 'redis://localhost:6379/0'  # Redis as the broker
 CELERY_ACCEPT_CONTENT = ['json']
 CELERY_TASK_SERIALIZER = 'json'
 CELERY_RESULT_BACKEND = 'redis://localhost:6379/0'
+CELERY_BEAT_SCHEDULE = {
+    'refresh-dashboard-stats': {
+        'task': 'JobPortal.tasks.refresh_dashboard_stats',
+        'schedule': 60.0,
+    },
+    'send-recruiter-digests': {
+        'task': 'JobPortal.tasks.send_recruiter_digests',
+        'schedule': float(os.getenv('RECRUITER_DIGEST_WINDOW', 3600)),
+    },
+    'expire-jobs': {
+        'task': 'JobPortal.tasks.expire_jobs',
+        'schedule': float(os.getenv('JOB_EXPIRY_INTERVAL', 300)),
+    },
+    'compute-recommendations': {
+        'task': 'JobPortal.tasks.compute_recommendations',
+        'schedule': crontab(hour=int(os.getenv('RECOMMENDATION_HOUR', 2)), minute=0),
+    },
+    # Fallback when no `manage.py relay_outbox` process is running
+    'relay-outbox': {
+        'task': 'JobPortal.tasks.relay_outbox',
+        'schedule': float(os.getenv('OUTBOX_RELAY_INTERVAL', 5)),
+    },
+}
+
+# Jobs deactivated per transaction by the expiry sweep (see JobPortal/expiry.py)
+JOB_EXPIRY_BATCH_SIZE = 1000
+
+# Task outbox (see JobPortal/outbox.py): messages per relay transaction, failed
+# sends before a message is left alone, and how long sent rows are kept
+OUTBOX_BATCH_SIZE = 500
+OUTBOX_MAX_ATTEMPTS = 10
+OUTBOX_RETENTION = 60 * 60 * 24
+
+# Nightly job recommendations (see JobPortal/recommendations.py): suggestions
+# kept per employee, and scores computed per NumPy block (float32 cells, so
+# about 4 bytes each, times a few temporaries)
+RECOMMENDATION_TOP_K = 10
+RECOMMENDATION_BLOCK_SIZE = 2_000_000
+
+# Seconds job_search facet counts are cached per filter signature (see JobPortal/facets.py)
+FACETS_TIMEOUT = 60
+
+# Superadmin dashboard counters: 'cache' (live aggregates cached for the TTL) or
+# 'table' (the DashboardStats row refreshed by the beat task above)
+DASHBOARD_STATS_MODE = os.getenv('DASHBOARD_STATS_MODE', 'cache')
+DASHBOARD_STATS_TTL = 30
 
 
 REST_FRAMEWORK = {
@@ -195,6 +299,12 @@ REST_FRAMEWORK = {
     ),
 }
 AUTH_USER_MODEL = 'JobPortal.User'
+# Loads the Employee/Recruiter row with the user, see JobPortal.profiles.
+# ModelBackend stays listed for the sessions signed in before it.
+AUTHENTICATION_BACKENDS = [
+    'JobPortal.profiles.ProfileBackend',
+    'django.contrib.auth.backends.ModelBackend',
+]
 CORS_ALLOW_ALL_ORIGINS = True
 LOGIN_URL = '/login/'
 LOGIN_REDIRECT_URL = '/dashboard/'